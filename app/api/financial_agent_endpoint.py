@@ -1,76 +1,175 @@
+from datetime import datetime
+from typing import Optional, Tuple
+import os
+import threading
+import time
 from flask import Blueprint, request
 from twilio.twiml.messaging_response import MessagingResponse
-from app.models.message_models import convert_history
-from app.models.research_models import ResearchResponse
-from app.services.opena_ai_service import OpenAIService
-from app.services.conversation_history_service import ConversationHistoryService
+from app.services.chat_turn_service import ChatTurnService, RESPOSTA_ERRO
+from app.services.phone_turn_coordinator import PhoneBusyError, PhoneTurnCoordinator
 from app.core.config import log_error_to_file
-from app.core.prompts import research_prompt
+from app.core.metrics import bot_request_duration, bot_requests
+from app.core.tracing import tracer
+from app.services.query_accounting import track_queries
 
 financial_agent_bp = Blueprint("financialAgent", __name__)
 
-# PROD
-research_service = OpenAIService(research_prompt, ResearchResponse)
-conversation_service = ConversationHistoryService()
+# Com BOT_ASYNC_MODE=true o webhook só enfileira o turno e a resposta sai pelo OutboundSender
+BOT_ASYNC_MODE = os.getenv("BOT_ASYNC_MODE", "false").lower() in ("1", "true", "yes")
+HISTORY_COMPACTION_ENABLED = os.getenv("HISTORY_COMPACTION_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPOSTA_OCUPADO = "Estou com muitas mensagens no momento. Tente novamente em alguns instantes."
+
+# Objetos pesados (agente, LLM, tools) são construídos no primeiro uso ou em prewarm(),
+# não no import, para o worker ficar pronto mais rápido
+_services_lock = threading.Lock()
+_research_service = None
+_chat_turn_service = None
+_agent_worker_pool = None
+phone_turn_coordinator = PhoneTurnCoordinator.from_env()
+
+
+def get_research_service():
+    """Serviço do agente (OpenAIService), construído no primeiro uso"""
+    global _research_service
+    if _research_service is None:
+        with _services_lock:
+            if _research_service is None:
+                from app.services.opena_ai_service import OpenAIService
+                from app.models.research_models import ResearchResponse
+                from app.core.prompts import research_prompt
+                from app.services.fake_chat_model import FakeChatModel
+                # PROD (LLM_FAKE_MODE troca o modelo por um falso, para testes de carga offline)
+                _research_service = OpenAIService(research_prompt, ResearchResponse, llm=FakeChatModel.from_env())
+    return _research_service
+
+
+def get_chat_turn_service():
+    """Pipeline de turno (fast-path, histórico, agente), construído no primeiro uso"""
+    global _chat_turn_service
+    if _chat_turn_service is None:
+        research_service = get_research_service()
+        with _services_lock:
+            if _chat_turn_service is None:
+                from app.services.conversation_history_service import ConversationHistoryService
+                from app.services.history_compactor import HistoryCompactor
+                from app.services.intent_router import intent_router
+                from app.services.service_registry import service_registry
+                _chat_turn_service = ChatTurnService(
+                    research_service,
+                    service_registry.get(ConversationHistoryService),
+                    intent_router,
+                    history_compactor=HistoryCompactor.from_env() if HISTORY_COMPACTION_ENABLED else None,
+                )
+    return _chat_turn_service
+
+
+def process_turn(numero_telefone: str, mensagem: str, recebida_em: datetime) -> Optional[str]:
+    """Processa o turno na vez do telefone; None se a mensagem foi juntada a outro turno"""
+    return phone_turn_coordinator.submit(numero_telefone, mensagem, recebida_em, get_chat_turn_service().process)
+
+
+def _send_reply(numero_telefone: str, resposta: str) -> None:
+    """Envia a resposta de um turno do modo assíncrono"""
+    with tracer.span("outbound.send", chars=len(resposta)):
+        _agent_worker_pool.sender.send(numero_telefone, resposta)
+
+
+def process_turn_async(numero_telefone: str, mensagem: str, recebida_em: datetime) -> None:
+    """Handler dos workers: se outro worker já processa o telefone, a mensagem entra na
+    fila dele em vez de prender este worker esperando a vez; as respostas saem por _send_reply"""
+    phone_turn_coordinator.submit_nowait(
+        numero_telefone, mensagem, recebida_em, get_chat_turn_service().process, _send_reply)
+
+
+def get_agent_worker_pool():
+    """Pool de workers do modo assíncrono (None se BOT_ASYNC_MODE estiver desligado)"""
+    global _agent_worker_pool
+    if BOT_ASYNC_MODE and _agent_worker_pool is None:
+        with _services_lock:
+            if _agent_worker_pool is None:
+                from app.services.agent_worker_pool import AgentWorkerPool
+                from app.services.outbound_sender import outbound_sender_from_env
+                _agent_worker_pool = AgentWorkerPool.from_env(process_turn_async, outbound_sender_from_env())
+    return _agent_worker_pool
+
+
+def current_agent_worker_pool():
+    """Pool de workers já criado, sem criá-lo (None antes do primeiro uso ou fora do modo assíncrono)"""
+    return _agent_worker_pool
+
+
+def prewarm() -> None:
+    """Constrói o agente, abre as conexões mínimas do pool e resolve as tabelas obrigatórias"""
+    get_chat_turn_service()
+    get_agent_worker_pool()
+    from app.services.connection_pool import get_pool
+    from app.services.postgres_service import PostgresService
+    from app.services.service_registry import service_registry
+    pool = get_pool()
+    pool.putconn(pool.getconn())
+    service_registry.get(PostgresService).resolve_table_names()
 
 
 @financial_agent_bp.route("/bot", methods=["POST"])
 def bot():
     """Twilio webhook that routes the message through the financial agent tools."""
+    # Id do request nos spans: X-Request-ID do proxy ou o MessageSid do Twilio
+    request_id = request.headers.get("X-Request-ID") or request.values.get("MessageSid")
+    started = time.perf_counter()
+    with tracer.start_trace("bot", request_id=request_id, async_mode=BOT_ASYNC_MODE) as span, \
+            track_queries() as queries:
+        response, outcome = _handle_bot(span)
+        queries.annotate(span)
+    bot_requests.inc(outcome)
+    bot_request_duration.observe(time.perf_counter() - started)
+    return response
+
+
+def _handle_bot(span) -> Tuple[str, str]:
+    """Processa a mensagem do webhook; retorna o TwiML da resposta e o resultado (para as métricas)"""
     resp = MessagingResponse()
-    msg = resp.message()
+    recebida_em = datetime.now()
 
     try:
         payload = request.get_json(silent=True) or {}
         incoming_msg = payload.get("query") or request.values.get("Body", "")
-        
-        # Obtém o número de telefone do usuário 
+
+        # Obtém o número de telefone do usuário
         phone_number = payload.get("phone_number") or request.values.get("From", "")
 
         if not incoming_msg:
-            msg.body("Nenhuma mensagem recebida.")
-            return str(resp)
-        
+            resp.message("Nenhuma mensagem recebida.")
+            return str(resp), "invalid"
+
         if not phone_number:
-            msg.body("Não foi possível identificar o número de telefone.")
-            return str(resp)
-
-        # Recupera o histórico do banco de dados (últimas 10 mensagens das últimas 24h)
-        chat_history = conversation_service.get_history(
-            numero_telefone=phone_number,
-            limit=10,
-            hours_back=24
-        )
-        
-        # Converte para o formato esperado pelo LangChain
-        formatted_history = convert_history(chat_history)
-        
-        # Salva a mensagem do usuário no banco
-        conversation_service.save_message(
-            numero_telefone=phone_number,
-            tipo_mensageiro="user",
-            conteudo_mensagem=incoming_msg
-        )
-        
-        # Processa a mensagem com o agente
-        result = research_service.run(incoming_msg, formatted_history)
-
-        if not result:
-            msg.body("Não consegui gerar uma resposta agora. Tente novamente mais tarde.")
-            return str(resp)
-
-        response_text = result.summary
-        
-        # Salva a resposta do assistente no banco
-        conversation_service.save_message(
-            numero_telefone=phone_number,
-            tipo_mensageiro="assistant",
-            conteudo_mensagem=response_text
-        )
-        
-        msg.body(response_text)
-        return str(resp)
+            resp.message("Não foi possível identificar o número de telefone.")
+            return str(resp), "invalid"
+
+        span.set_attribute("message_chars", len(incoming_msg))
+        agent_worker_pool = get_agent_worker_pool()
+        if agent_worker_pool is not None:
+            # Responde ao Twilio na hora (TwiML vazio); a resposta é enviada pelo worker
+            accepted = agent_worker_pool.submit(phone_number, incoming_msg, recebida_em)
+            span.set_attribute("queued", accepted)
+            if not accepted:
+                resp.message(RESPOSTA_OCUPADO)
+                return str(resp), "busy"
+            return str(resp), "queued"
+
+        try:
+            response_text = process_turn(phone_number, incoming_msg, recebida_em)
+        except PhoneBusyError:
+            # O turno anterior do telefone não terminou a tempo do webhook
+            span.set_attribute("busy", True)
+            resp.message(RESPOSTA_OCUPADO)
+            return str(resp), "busy"
+        span.set_attribute("coalesced", response_text is None)
+        if response_text is None:
+            return str(resp), "coalesced"
+        resp.message(response_text)
+        return str(resp), "replied"
     except Exception as e:
         log_error_to_file(e)
-        msg.body("Ocorreu um erro no agente financeiro. Tente novamente em instantes.")
-        return str(resp)
\ No newline at end of file
+        span.set_error(e)
+        resp.message(RESPOSTA_ERRO)
+        return str(resp), "error"
@@ -0,0 +1,85 @@
+from typing import Dict, List, Tuple
+from flask import Blueprint, Response
+from app.core.metrics import metrics_registry
+
+metrics_bp = Blueprint("metrics", __name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _log_queue_stats() -> Dict[str, int]:
+    from app.services.logs_service import log_service
+    return log_service.queue_stats()
+
+
+def _log_rate_limited() -> int:
+    from app.services.logs_service import log_service
+    limiter = log_service.rate_limiter
+    return limiter.stats()["suppressed"] if limiter is not None else 0
+
+
+def _pool_stats() -> Dict[str, float]:
+    from app.services.connection_pool import pool_stats
+    return pool_stats()
+
+
+def _query_totals() -> Dict[str, float]:
+    from app.services.query_accounting import query_totals
+    return query_totals()
+
+
+def _agent_worker_stats() -> Dict[str, int]:
+    # Lê o pool já criado (não cria um só para a coleta)
+    from app.api.financial_agent_endpoint import current_agent_worker_pool
+    pool = current_agent_worker_pool()
+    return pool.stats() if pool is not None else {}
+
+
+def _labeled(stats: Dict[str, float], keys: List[str]) -> List[Tuple[Tuple[str, ...], float]]:
+    """Valores de `stats` como amostras com o nome da chave no label"""
+    return [((key,), stats[key]) for key in keys if key in stats]
+
+
+# Valores lidos na hora da coleta (as fontes já mantêm os próprios contadores)
+metrics_registry.callback(
+    "chatbot_log_queue_depth", "Registros de log aguardando gravação no banco",
+    lambda: _log_queue_stats().get("queue_depth", 0))
+metrics_registry.callback(
+    "chatbot_log_records_total", "Registros de log por resultado da gravação em segundo plano",
+    lambda: _labeled(_log_queue_stats(), ["written", "dropped", "failed"]), labels=("result",), kind="counter")
+metrics_registry.callback(
+    "chatbot_log_rate_limited_total", "Logs INFO/DEBUG descartados pelo limite por ponto do código",
+    _log_rate_limited, kind="counter")
+metrics_registry.callback(
+    "chatbot_db_pool_connections", "Conexões abertas do pool por estado",
+    lambda: _labeled(_pool_stats(), ["idle", "in_use"]), labels=("state",))
+metrics_registry.callback(
+    "chatbot_db_pool_max_connections", "Tamanho máximo do pool (DB_POOL_MAX_SIZE)",
+    lambda: _pool_stats().get("max_size", 0))
+metrics_registry.callback(
+    "chatbot_db_pool_waiting", "Threads aguardando uma conexão do pool",
+    lambda: _pool_stats().get("waiting", 0))
+metrics_registry.callback(
+    "chatbot_db_pool_checkouts_total", "Conexões emprestadas pelo pool",
+    lambda: _pool_stats().get("checkouts", 0), kind="counter")
+metrics_registry.callback(
+    "chatbot_db_pool_timeouts_total", "Esperas por conexão que estouraram o timeout do pool",
+    lambda: _pool_stats().get("timeouts", 0), kind="counter")
+metrics_registry.callback(
+    "chatbot_db_queries_total", "Comandos SQL executados (AccountingCursor), por tipo",
+    lambda: _labeled(_query_totals(), ["queries", "slow", "suppressed"]), labels=("kind",), kind="counter")
+metrics_registry.callback(
+    "chatbot_db_query_seconds_total", "Tempo total dos comandos SQL contabilizados",
+    lambda: _query_totals().get("time_ms", 0.0) / 1000, kind="counter")
+metrics_registry.callback(
+    "chatbot_agent_queue_depth", "Turnos aguardando um worker (BOT_ASYNC_MODE)",
+    lambda: _agent_worker_stats().get("queue_depth", 0))
+metrics_registry.callback(
+    "chatbot_agent_in_flight", "Turnos em processamento pelos workers (BOT_ASYNC_MODE)",
+    lambda: _agent_worker_stats().get("in_flight", 0))
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Métricas do processo no formato texto do Prometheus."""
+    return Response(metrics_registry.render(), mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE)
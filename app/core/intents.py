@@ -0,0 +1,96 @@
+# Rotas do fast-path de intenções (ver app/services/intent_router.py).
+#
+# Cada padrão é uma expressão regular aplicada à mensagem INTEIRA já normalizada
+# (minúsculas, sem acentos, sem pontuação e com espaços simples). Só mensagens que
+# casam por completo são respondidas direto pela tool; o resto segue para o agente.
+# Para sobrescrever, aponte INTENT_ROUTES_FILE para um JSON com a mesma estrutura.
+intent_routes = [
+    {
+        "tool": "WelcomeOrSetup",
+        "topic": "Configuração da Conta",
+        "patterns": [
+            r"(oi |ola )?(o |me (manda|passa|envia) o )?link( do site| de configuracao)?",
+            r"(qual (e |eh )?o )?site( de configuracao)?",
+            r"(quero )?(configurar|configuracao|cadastro|cadastrar)( (a |minha )?conta)?",
+        ],
+    },
+    {
+        "tool": "AnalyzeFinancialBalance",
+        "topic": "Consulta de Saldo",
+        "patterns": [
+            r"(qual (e |eh )?(o )?)?(meu )?saldo( atual| disponivel)?",
+            r"(meu )?balanco( financeiro)?",
+            r"como (estao|esta) (as |minhas )?(minha )?financas",
+        ],
+    },
+    {
+        "tool": "GetFaturasPendentes",
+        "topic": "Faturas Pendentes",
+        "patterns": [
+            r"(quais (sao )?)?(as )?(minhas )?faturas? (pendentes?|em aberto|nao pagas?|a pagar)",
+        ],
+    },
+    {
+        "tool": "AnalyzeFaturasPorCartao",
+        "topic": "Faturas por Cartão",
+        "patterns": [
+            r"(qual )?(o )?cartao (com|tem) (a )?maior fatura",
+            r"faturas por cartao",
+        ],
+    },
+    {
+        "tool": "GetBancosInfo",
+        "topic": "Bancos Cadastrados",
+        "patterns": [
+            r"(quais (sao )?)?(os )?(meus )?bancos( cadastrados)?",
+        ],
+    },
+    {
+        "tool": "GetCartoesInfo",
+        "topic": "Cartões Cadastrados",
+        "patterns": [
+            r"(quais (sao )?)?(os )?(meus )?cartoes( de credito)?( cadastrados)?",
+        ],
+    },
+    {
+        "tool": "GetEntradasInfo",
+        "topic": "Entradas",
+        "patterns": [
+            r"(quais (sao )?)?(as )?(minhas )?(entradas|receitas)( mensais| cadastradas)?",
+        ],
+    },
+    {
+        "tool": "GetSaidasInfo",
+        "topic": "Saídas Frequentes",
+        "patterns": [
+            r"(quais (sao )?)?(as )?(minhas )?(saidas|despesas)( frequentes| fixas| mensais| cadastradas)?",
+        ],
+    },
+    {
+        "tool": "GetCategoriasDisponiveis",
+        "topic": "Categorias",
+        "patterns": [
+            r"(quais (sao )?(as )?)?categorias( disponiveis| cadastradas)?",
+        ],
+    },
+    {
+        "tool": "GetComprasPorCategoria",
+        "topic": "Gastos por Categoria",
+        "patterns": [
+            r"(meus |os )?gastos? por categoria",
+            r"quanto (eu )?gastei (em cada|por) categoria",
+            r"(minhas |as )?compras por categoria",
+        ],
+    },
+]
+
+# Mensagens que pedem alteração de dados (registrar compra, pagamento etc.). Buscadas
+# (não precisam casar com a mensagem inteira) no texto normalizado; essas mensagens
+# nunca são respondidas a partir do cache de respostas.
+write_intent_patterns = [
+    # "gastei 50 no mercado" é escrita; "quanto gastei?" é consulta
+    r"(?<!quanto )(?<!quanto eu )(?<!onde )(?<!quando )(?<!o que )\b(gastei|comprei|paguei|recebi|transferi|depositei)\b",
+    r"\b(adicion|registr|insir|inser|lanc|inclu|anot|exclu|remov|apag|delet|atualiz|alter|corrig)\w*",
+    r"\bcadastr(?!ad)\w*",
+    r"\b(salv|marc)(a|ar|e|ou)\b",
+]
@@ -0,0 +1,235 @@
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple, Union
+from bisect import bisect_left
+import math
+import threading
+
+LabelValues = Tuple[str, ...]
+CallbackResult = Union[float, int, Iterable[Tuple[LabelValues, float]]]
+
+# Buckets (segundos) para chamadas rápidas (tools, banco) e lentas (webhook, LLM)
+FAST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+
+
+def _escape(value: Any) -> str:
+    """Escapa o valor de um label no formato texto do Prometheus"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _ShardedMetric:
+    """
+    Base das métricas com shards por thread.
+
+    Cada thread grava só no próprio shard (dicionário em threading.local),
+    então `inc`/`observe` não pegam lock. O lock só é usado quando uma thread
+    grava pela primeira vez e na coleta (/metrics), que soma os shards; os
+    shards de threads encerradas são incorporados a um acumulado.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, Dict[LabelValues, Any]]] = []
+        self._retired: Dict[LabelValues, Any] = {}
+
+    def _shard(self) -> Dict[LabelValues, Any]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _merge(self, target: Dict[LabelValues, Any], source: Dict[LabelValues, Any]) -> None:
+        raise NotImplementedError
+
+    def collect(self) -> Dict[LabelValues, Any]:
+        """Soma dos shards de todas as threads"""
+        merged: Dict[LabelValues, Any] = {}
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard.copy())
+            self._shards = alive
+            self._merge(merged, self._retired)
+            for _, shard in alive:
+                self._merge(merged, shard.copy())
+        return merged
+
+
+class Counter(_ShardedMetric):
+    """Contador monotônico (sufixo _total)"""
+
+    kind = "counter"
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        shard = self._shard()
+        shard[label_values] = shard.get(label_values, 0.0) + amount
+
+    def _merge(self, target: Dict[LabelValues, Any], source: Dict[LabelValues, Any]) -> None:
+        for key, value in source.items():
+            target[key] = target.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        values = self.collect()
+        if not values and not self.labels:
+            values = {(): 0.0}
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_ShardedMetric):
+    """Histograma de durações (buckets cumulativos, _sum e _count)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = FAST_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values: str) -> None:
+        shard = self._shard()
+        counts = shard.get(label_values)
+        if counts is None:
+            # Um contador por bucket (+Inf no fim), seguido da soma e da quantidade
+            counts = shard[label_values] = [0.0] * (len(self.buckets) + 3)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-2] += value
+        counts[-1] += 1
+
+    def _merge(self, target: Dict[LabelValues, Any], source: Dict[LabelValues, Any]) -> None:
+        for key, counts in source.items():
+            merged = target.get(key)
+            if merged is None:
+                target[key] = list(counts)
+            else:
+                for i, value in enumerate(counts):
+                    merged[i] += value
+
+    def render(self) -> List[str]:
+        lines = []
+        names = self.labels + ("le",)
+        for key, counts in sorted(self.collect().items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} {_format_value(cumulative)}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(counts[-1])}")
+        return lines
+
+
+class CallbackMetric:
+    """Métrica lida na hora da coleta (ex: profundidade de fila, uso do pool)"""
+
+    def __init__(self, name: str, description: str, func: Callable[[], CallbackResult],
+                 labels: Sequence[str] = (), kind: str = "gauge"):
+        self.name = name
+        self.description = description
+        self.func = func
+        self.labels = tuple(labels)
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        result = self.func()
+        if isinstance(result, (int, float)):
+            return [f"{self.name} {_format_value(result)}"]
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in result]
+
+
+class MetricsRegistry:
+    """
+    Métricas do processo no formato texto do Prometheus.
+
+    Os valores são por processo: com vários workers (ex: gunicorn) cada um
+    expõe os próprios números e o Prometheus agrega por instância.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {}
+
+    def _register(self, metric: Any) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica já registrada: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = FAST_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, labels, buckets))
+
+    def callback(self, name: str, description: str, func: Callable[[], CallbackResult],
+                 labels: Sequence[str] = (), kind: str = "gauge") -> CallbackMetric:
+        """Registra (ou substitui) uma métrica calculada na coleta"""
+        metric = CallbackMetric(name, description, func, labels, kind)
+        with self._lock:
+            self._metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Todas as métricas no formato de exposição texto (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.render()
+            except Exception as e:
+                # Uma fonte com erro (ex: banco indisponível) não derruba as demais
+                lines.append(f"# {metric.name} indisponível: {_escape(e)}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+# Registro global e métricas do chatbot
+metrics_registry = MetricsRegistry()
+
+bot_requests = metrics_registry.counter(
+    "chatbot_bot_requests_total", "Requisições ao webhook /bot por resultado", ("outcome",))
+bot_request_duration = metrics_registry.histogram(
+    "chatbot_bot_request_duration_seconds", "Duração das requisições ao webhook /bot", buckets=SLOW_BUCKETS)
+llm_calls = metrics_registry.counter(
+    "chatbot_llm_calls_total", "Chamadas ao modelo de chat por status", ("model", "status"))
+llm_call_duration = metrics_registry.histogram(
+    "chatbot_llm_call_duration_seconds", "Duração das chamadas ao modelo de chat", ("model",), buckets=SLOW_BUCKETS)
+llm_tokens = metrics_registry.counter(
+    "chatbot_llm_tokens_total", "Tokens consumidos pelo modelo de chat", ("model", "type"))
+tool_calls = metrics_registry.counter(
+    "chatbot_tool_calls_total", "Chamadas às tools por status", ("tool", "status"))
+tool_duration = metrics_registry.histogram(
+    "chatbot_tool_duration_seconds", "Duração das chamadas às tools", ("tool",))
+agent_parse_failures = metrics_registry.counter(
+    "chatbot_agent_parse_failures_total", "Respostas do agente que o PydanticOutputParser não conseguiu ler")
@@ -0,0 +1,233 @@
+from typing import Any, Callable, Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import json
+import os
+import random
+import threading
+import time
+
+
+class _Trace:
+    """Spans já finalizados de um request amostrado (exportados juntos quando a raiz termina)"""
+
+    __slots__ = ("trace_id", "request_id", "spans", "exported")
+
+    def __init__(self, trace_id: str, request_id: str):
+        self.trace_id = trace_id
+        self.request_id = request_id
+        self.spans: List[Dict[str, Any]] = []
+        self.exported = False
+
+
+class Span:
+    """Trecho cronometrado de um request (ids e campos no formato do OpenTelemetry)"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error", "_t0")
+
+    def __init__(self, trace: _Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self._t0 = time.perf_counter()
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Acrescenta um atributo ao span"""
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        """Marca o span com o erro que o encerrou"""
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        """Finaliza o span (só a primeira chamada conta)"""
+        if self.end_ns is not None:
+            return
+        duration = time.perf_counter() - self._t0
+        self.end_ns = self.start_ns + int(duration * 1e9)
+        self.trace.spans.append({
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(duration * 1000, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        })
+
+
+class _NoopSpan:
+    """Span de requests não amostrados: não mede nem guarda nada"""
+
+    __slots__ = ()
+
+    recording = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+NOOP_SPAN = _NoopSpan()
+
+# Span ativo no contexto atual (None fora de um request amostrado)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class JsonLinesSpanExporter:
+    """Grava os spans em um arquivo JSON lines (um span por linha, um write por request)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        """Acrescenta os spans de um request ao arquivo"""
+        data = "".join(json.dumps(s, ensure_ascii=False, default=str) + "\n" for s in spans)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+
+
+class Tracer:
+    """
+    Tracing leve por request.
+
+    `start_trace` abre o span raiz de um request (ex: bot()) e decide a
+    amostragem; `span` / `traced` criam spans filhos ligados pelo contexto
+    (contextvars, então os spans seguem threads que rodam com
+    copy_context(), como as tools em paralelo). Quando o request termina,
+    os spans são exportados de uma vez.
+
+    Com amostragem desligada (`sample_rate` 0, padrão) ou em requests não
+    amostrados, `span` devolve um span vazio depois de uma única leitura do
+    ContextVar, então a instrumentação custa quase nada.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, exporter: Optional[JsonLinesSpanExporter] = None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Cria o tracer a partir de TRACE_SAMPLE_RATE (0 a 1) e TRACE_EXPORT_FILE"""
+        return cls(
+            sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0")),
+            exporter=JsonLinesSpanExporter(os.getenv("TRACE_EXPORT_FILE", "traces.jsonl")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 and self.exporter is not None
+
+    @contextmanager
+    def start_trace(self, name: str, request_id: Optional[str] = None, **attributes: Any):
+        """Span raiz de um request; amostrado com probabilidade `sample_rate`"""
+        if not self.enabled or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            yield NOOP_SPAN
+            return
+        trace_id = os.urandom(16).hex()
+        trace = _Trace(trace_id, request_id or trace_id)
+        attributes["request_id"] = trace.request_id
+        span = Span(trace, name, None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self._export(trace)
+
+    def _export(self, trace: _Trace) -> None:
+        """Exporta os spans do request; falhas de exportação nunca afetam a resposta"""
+        trace.exported = True
+        try:
+            self.exporter.export(trace.spans)
+        except Exception as e:
+            print(f"Erro ao exportar spans: {e}")
+
+    def span(self, name: str, **attributes: Any):
+        """Span filho do span ativo (context manager); vazio fora de um request amostrado"""
+        parent = _current_span.get()
+        if parent is None or parent.trace.exported:
+            return NOOP_SPAN
+        return self._child_span(parent, name, attributes)
+
+    @contextmanager
+    def _child_span(self, parent: Span, name: str, attributes: Dict[str, Any]):
+        span = Span(parent.trace, name, parent.span_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def start_span(self, name: str, **attributes: Any):
+        """Span filho que não vira o span ativo; encerrado com `.end()` (ex: callbacks do LangChain)"""
+        parent = _current_span.get()
+        if parent is None or parent.trace.exported:
+            return NOOP_SPAN
+        return Span(parent.trace, name, parent.span_id, attributes)
+
+    def traced(self, name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator que envolve a função em um span (nome padrão: módulo.função)"""
+
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _current_span.get() is None:
+                    return func(*args, **kwargs)
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+def current_span():
+    """Span ativo (ou o span vazio), para acrescentar atributos"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def current_request_id() -> Optional[str]:
+    """Id do request amostrado em andamento (None se não houver)"""
+    span = _current_span.get()
+    return span.trace.request_id if span is not None else None
+
+
+# Instância global do tracer
+tracer = Tracer.from_env()
+traced = tracer.traced
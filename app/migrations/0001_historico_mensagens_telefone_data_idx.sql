@@ -0,0 +1,3 @@
+-- Índice para buscar as N mensagens mais recentes de um telefone sem varrer a janela inteira
+CREATE INDEX IF NOT EXISTS idx_historico_mensagens_telefone_data
+    ON historico_de_mensagens (numero_telefone, data_criacao DESC);
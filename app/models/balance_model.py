@@ -0,0 +1,35 @@
+class BalanceSnapshotModel:
+    """Modelo de dados para o balanço financeiro (entradas, saídas e faturas pendentes)."""
+    def __init__(self, total_entradas=0, total_saidas=0, total_faturas_pendentes=0, saldo=0,
+                 id_banco=None, nome_banco=None, por_banco=None):
+        self.id_banco = id_banco
+        self.nome_banco = nome_banco
+        self.total_entradas = total_entradas
+        self.total_saidas = total_saidas
+        self.total_faturas_pendentes = total_faturas_pendentes
+        self.saldo = saldo
+        self.por_banco = por_banco or []
+
+    @classmethod
+    def from_dict(cls, data):
+        """Converte dicionário do banco de dados em objeto do modelo."""
+        return cls(
+            id_banco=data.get('id_banco'),
+            nome_banco=data.get('nome_banco'),
+            total_entradas=data.get('total_entradas') or 0,
+            total_saidas=data.get('total_saidas') or 0,
+            total_faturas_pendentes=data.get('total_faturas_pendentes') or 0,
+            saldo=data.get('saldo') or 0,
+        )
+
+    def to_dict(self):
+        """Converte objeto do modelo em dicionário."""
+        return {
+            "id_banco": self.id_banco,
+            "nome_banco": self.nome_banco,
+            "total_entradas": self.total_entradas,
+            "total_saidas": self.total_saidas,
+            "total_faturas_pendentes": self.total_faturas_pendentes,
+            "saldo": self.saldo,
+            "por_banco": [b.to_dict() for b in self.por_banco],
+        }
@@ -1,4 +1,4 @@
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from pydantic import BaseModel
 
 def convert_history(history):
@@ -8,6 +8,8 @@ def convert_history(history):
             messages.append(HumanMessage(content=m.content))
         elif m.role == "bot":
             messages.append(AIMessage(content=m.content))
+        elif m.role == "system":
+            messages.append(SystemMessage(content=m.content))
     return messages
 
 class Message(BaseModel):
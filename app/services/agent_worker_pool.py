@@ -0,0 +1,158 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+import atexit
+import os
+import queue
+import threading
+import time
+from app.services.outbound_sender import OutboundSender
+from app.core.config import log_error_to_file
+from app.core.tracing import tracer
+from app.services.query_accounting import track_queries
+
+# (numero_telefone, mensagem, recebida_em)
+AgentJob = Tuple[str, str, datetime]
+
+# Sentinela que encerra uma thread de worker
+_STOP = object()
+
+
+class AgentWorkerPool:
+    """
+    Pool de threads que executa os turnos do agente fora do ciclo do webhook.
+
+    O webhook enfileira o turno e responde na hora; cada worker retira um turno
+    da fila limitada (`maxsize`) e executa `handler`, que envia as respostas com
+    o `sender` do pool (um handler pode responder a mais de uma mensagem, ver
+    PhoneTurnCoordinator.submit_nowait). `workers` é o número máximo de turnos
+    do agente rodando ao mesmo tempo neste processo. Com a fila cheia,
+    `submit()` retorna False e o webhook responde que o bot está ocupado.
+    """
+
+    def __init__(self, handler: Callable[[str, str, datetime], None], sender: OutboundSender,
+                 workers: int = 4, maxsize: int = 100):
+        self._handler = handler
+        self.sender = sender
+        self.workers = max(1, workers)
+        self.maxsize = maxsize
+        self._init_state()
+        atexit.register(self.shutdown)
+
+    @classmethod
+    def from_env(cls, handler: Callable[[str, str, datetime], None], sender: OutboundSender) -> "AgentWorkerPool":
+        """Cria o pool a partir das variáveis AGENT_WORKERS e AGENT_QUEUE_MAXSIZE"""
+        return cls(
+            handler,
+            sender,
+            workers=int(os.getenv("AGENT_WORKERS", "4")),
+            maxsize=int(os.getenv("AGENT_QUEUE_MAXSIZE", "100")),
+        )
+
+    def _init_state(self) -> None:
+        """(Re)inicializa fila e threads; usado na criação e após um fork"""
+        self._queue: "queue.Queue[Any]" = queue.Queue(self.maxsize)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._pid = os.getpid()
+        self._stopped = False
+        self._in_flight = 0
+        self._processed = 0
+        self._rejected = 0
+        self._failed = 0
+
+    def _ensure_started(self) -> None:
+        """Inicia as threads no primeiro uso (e de novo após um fork)"""
+        if self._pid != os.getpid():
+            self._init_state()
+        if self._threads:
+            return
+        with self._lock:
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._run, name=f"agent-worker-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def submit(self, numero_telefone: str, mensagem: str, recebida_em: Optional[datetime] = None) -> bool:
+        """Enfileira um turno; retorna False se a fila estiver cheia ou o pool encerrado"""
+        if self._stopped:
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((numero_telefone, mensagem, recebida_em or datetime.now()))
+            return True
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            return False
+
+    def _run(self) -> None:
+        """Loop do worker: retira e executa os turnos da fila"""
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                self._process(job)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job: AgentJob) -> None:
+        """Executa um turno sem deixar exceções derrubarem o worker"""
+        numero_telefone, mensagem, recebida_em = job
+        with self._lock:
+            self._in_flight += 1
+        try:
+            # No modo assíncrono o turno roda fora do request do webhook: vira um trace próprio
+            queue_wait_ms = round((datetime.now() - recebida_em).total_seconds() * 1000, 3)
+            with tracer.start_trace("agent_worker.turn", queue_wait_ms=queue_wait_ms) as span, \
+                    track_queries() as queries:
+                self._handler(numero_telefone, mensagem, recebida_em)
+                queries.annotate(span)
+            with self._lock:
+                self._processed += 1
+        except Exception as e:
+            with self._lock:
+                self._failed += 1
+            log_error_to_file(e)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def join(self, timeout: float = 30.0) -> bool:
+        """Espera a fila esvaziar e os turnos em andamento terminarem"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                idle = self._queue.unfinished_tasks == 0
+            if idle:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """Deixa de aceitar turnos, processa os pendentes e encerra as threads"""
+        if self._stopped or self._pid != os.getpid():
+            return
+        self._stopped = True
+        if not self._threads:
+            return
+        self.join(timeout)
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                break
+
+    def stats(self) -> Dict[str, int]:
+        """Profundidade da fila, turnos em andamento e contadores"""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_maxsize": self.maxsize,
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "processed": self._processed,
+                "rejected": self._rejected,
+                "failed": self._failed,
+            }
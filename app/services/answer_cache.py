@@ -0,0 +1,228 @@
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from app.core.intents import write_intent_patterns
+from app.models.research_models import ResearchResponse
+from app.services.data_versions import data_versions
+from app.services.intent_router import normalize_text
+
+# Palavras sem peso para comparar perguntas ("quanto gastei por categoria" ~ "gastos por categoria")
+_STOPWORDS = frozenset(
+    "a o as os de do da dos das e em no na nos nas um uma me meu minha meus minhas qual quais "
+    "quanto quanta quantos quantas por favor voce pode poderia mostra mostre mostrar ver sobre "
+    "com para pra que eu esta estao sao tenho tem".split()
+)
+# Tokens que mudam o sentido da pergunta mesmo com texto parecido: precisam ser iguais
+_MONTHS = frozenset(
+    "janeiro fevereiro marco abril maio junho julho agosto setembro outubro novembro dezembro "
+    "hoje ontem semana mes ano passado passada".split()
+)
+# Negação e polaridade, agrupadas por sentido ("faturas pagas" x "faturas não pagas",
+# "maior" x "menor"): a similaridade sozinha não separa essas perguntas
+_POLARITY = {
+    **dict.fromkeys("nao sem nunca nenhum nenhuma exceto".split(), "nao"),
+    **dict.fromkeys("maior maiores mais acima".split(), "maior"),
+    **dict.fromkeys("menor menores menos abaixo".split(), "menor"),
+    **dict.fromkeys("paga pagas pago pagos quitada quitadas".split(), "paga"),
+    **dict.fromkeys("pendente pendentes aberta abertas atrasada atrasadas vencida vencidas".split(), "pendente"),
+}
+# Prefixo usado como radical ("gastei"/"gastos" -> "gast")
+_STEM_CHARS = 5
+
+
+def _content_tokens(text: str) -> List[str]:
+    """Palavras relevantes da pergunta normalizada, reduzidas ao radical"""
+    return [w[:_STEM_CHARS] for w in normalize_text(text).split() if w not in _STOPWORDS]
+
+
+def _guard_tokens(text: str) -> FrozenSet[str]:
+    """Números, meses, referências de período e negação/polaridade presentes na pergunta"""
+    guard = set()
+    for w in normalize_text(text).split():
+        if w.isdigit() or w in _MONTHS:
+            guard.add(w)
+        elif w in _POLARITY:
+            guard.add(_POLARITY[w])
+    return frozenset(guard)
+
+
+def _history_key(chat_history: Optional[Sequence[Any]], messages: int) -> str:
+    """Hash das últimas `messages` mensagens do histórico ("" sem histórico).
+
+    Perguntas de continuação ("e no mês passado?") dependem da troca anterior,
+    então a resposta só é reaproveitada depois da mesma troca; a conversa mais
+    antiga não entra, senão quase nenhum turno com histórico teria acerto.
+    Perguntas sem histórico são compartilhadas entre conversas.
+    """
+    if not chat_history or messages <= 0:
+        return ""
+    digest = hashlib.blake2b(digest_size=16)
+    for message in chat_history[-messages:]:
+        role = getattr(message, "type", type(message).__name__)
+        content = getattr(message, "content", message)
+        digest.update(f"{role}\x00{content}\x01".encode("utf-8", "replace"))
+    return digest.hexdigest()
+
+
+class _CachedAnswer:
+    """Resposta guardada com o histórico e as tabelas de que dependeu e suas versões"""
+
+    __slots__ = ("response", "guard", "context", "tables", "versions", "expires_at")
+
+    def __init__(self, response: ResearchResponse, guard: FrozenSet[str], context: str,
+                 tables: Tuple[str, ...], versions: Tuple[int, ...], expires_at: float):
+        self.response = response
+        self.guard = guard
+        self.context = context
+        self.tables = tables
+        self.versions = versions
+        self.expires_at = expires_at
+
+
+class SemanticAnswerCache:
+    """
+    Cache de respostas do agente por similaridade da pergunta.
+
+    Cada pergunta vira um vetor de n-gramas de caracteres (hash em `dims`
+    posições, normalizado), e a busca é um produto interno NumPy contra os
+    slots já ocupados. Uma resposta é servida se a similaridade passar de
+    `threshold`, os números/meses citados, a negação/polaridade e a última
+    troca da conversa (`history_messages`) forem os mesmos e as versões das
+    tabelas de que ela dependeu não tiverem mudado (ver DataVersions).
+    Mensagens com intenção de escrita nunca são buscadas nem guardadas.
+    """
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 512, ttl: float = 600.0,
+                 dims: int = 2048, ngram: int = 3, enabled: bool = True, history_messages: int = 2):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.dims = dims
+        self.ngram = ngram
+        self.enabled = enabled
+        self.history_messages = history_messages
+        self._write_patterns = [re.compile(p) for p in write_intent_patterns]
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((max_entries, dims), dtype=np.float32)
+        self._entries: List[Optional[_CachedAnswer]] = [None] * max_entries
+        self._next_slot = 0
+        # Slots [0, _filled) já foram ocupados (preenchidos em ordem até dar a volta)
+        self._filled = 0
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticAnswerCache":
+        """Cria o cache a partir das variáveis ANSWER_CACHE_*"""
+        return cls(
+            threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.8")),
+            max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512")),
+            ttl=float(os.getenv("ANSWER_CACHE_TTL", "600")),
+            enabled=os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+            history_messages=int(os.getenv("ANSWER_CACHE_HISTORY_MESSAGES", "2")),
+        )
+
+    def is_write_intent(self, query: str) -> bool:
+        """Indica se a mensagem pede para registrar/alterar dados"""
+        text = normalize_text(query or "")
+        return any(p.search(text) for p in self._write_patterns)
+
+    def vectorize(self, query: str) -> np.ndarray:
+        """Vetor normalizado de n-gramas de caracteres das palavras relevantes"""
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for token in _content_tokens(query):
+            padded = f" {token} "
+            for i in range(len(padded) - self.ngram + 1):
+                vector[zlib.crc32(padded[i:i + self.ngram].encode()) % self.dims] += 1.0
+            vector[zlib.crc32(f"w:{token}".encode()) % self.dims] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, query: str, chat_history: Optional[Sequence[Any]] = None) -> Optional[ResearchResponse]:
+        """Resposta guardada para uma pergunta equivalente com o mesmo histórico, se ainda for válida"""
+        if not self.enabled or self.is_write_intent(query):
+            return None
+        vector = self.vectorize(query)
+        if not vector.any():
+            return None
+        guard = _guard_tokens(query)
+        context = _history_key(chat_history, self.history_messages)
+        with self._lock:
+            scores = self._vectors[:self._filled] @ vector
+            # Só os slots acima do limite, do mais parecido para o menos (quase sempre 0 ou 1)
+            candidates = np.flatnonzero(scores >= self.threshold)
+            for slot in candidates[np.argsort(scores[candidates])[::-1]]:
+                entry = self._entries[slot]
+                if entry is None or entry.guard != guard or entry.context != context:
+                    continue
+                if entry.expires_at <= time.monotonic() or data_versions.snapshot(entry.tables) != entry.versions:
+                    self._remove(int(slot))
+                    self._stale += 1
+                    continue
+                self._hits += 1
+                return entry.response.model_copy(deep=True)
+            self._misses += 1
+        return None
+
+    def store(self, query: str, response: ResearchResponse, tables: Sequence[str],
+              versions: Dict[str, int], chat_history: Optional[Sequence[Any]] = None) -> None:
+        """Guarda a resposta, válida enquanto as `tables` estiverem nas `versions` lidas antes do agente rodar"""
+        if not self.enabled or not tables or self.is_write_intent(query):
+            return
+        vector = self.vectorize(query)
+        if not vector.any():
+            return
+        tables = tuple(sorted(set(tables)))
+        entry = _CachedAnswer(
+            response.model_copy(deep=True),
+            _guard_tokens(query),
+            _history_key(chat_history, self.history_messages),
+            tables,
+            tuple(versions.get(t, 0) for t in tables),
+            time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            # Substitui a entrada da mesma pergunta, se houver; senão usa o próximo slot (circular)
+            slot = None
+            if self._filled:
+                scores = self._vectors[:self._filled] @ vector
+                best = int(np.argmax(scores))
+                current = self._entries[best]
+                if (scores[best] >= 0.999 and current is not None
+                        and current.guard == entry.guard and current.context == entry.context):
+                    slot = best
+            if slot is None:
+                slot = self._next_slot
+                self._next_slot = (self._next_slot + 1) % self.max_entries
+                self._filled = max(self._filled, slot + 1)
+            self._vectors[slot] = vector
+            self._entries[slot] = entry
+
+    def _remove(self, slot: int) -> None:
+        """Libera um slot (chamar com o lock adquirido)"""
+        self._vectors[slot] = 0.0
+        self._entries[slot] = None
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        with self._lock:
+            self._vectors[:] = 0.0
+            self._entries = [None] * self.max_entries
+            self._next_slot = 0
+            self._filled = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Acertos, falhas, entradas obsoletas e ocupação"""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale": self._stale,
+                "entries": sum(1 for e in self._entries if e is not None),
+            }
@@ -0,0 +1,76 @@
+from typing import Optional
+from app.services.postgres_service import PostgresService
+from app.models.balance_model import BalanceSnapshotModel
+
+
+class BalanceService:
+    """Serviço para o balanço financeiro consolidado, calculado em uma única consulta."""
+    def __init__(self, postgres_service: Optional[PostgresService] = None):
+        self.postgres_service = postgres_service or PostgresService()
+
+    def snapshot(self, por_banco: bool = False) -> BalanceSnapshotModel:
+        """Retorna totais de entradas, saídas frequentes, faturas não pagas e o saldo.
+        
+        Com por_banco=True, a mesma consulta também traz o detalhamento por "id_banco"
+        (em BalanceSnapshotModel.por_banco).
+        """
+        if por_banco:
+            return self._snapshot_por_banco()
+        
+        with self.postgres_service.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT t."total_entradas", t."total_saidas", t."total_faturas_pendentes",
+                           t."total_entradas" - t."total_saidas" - t."total_faturas_pendentes" AS "saldo"
+                    FROM (
+                        SELECT
+                            (SELECT COALESCE(SUM("valor_entrada"), 0) FROM "entradas") AS "total_entradas",
+                            (SELECT COALESCE(SUM("valor_saida"), 0) FROM "saidas_frequentes") AS "total_saidas",
+                            (SELECT COALESCE(SUM("valor_fatura"), 0) FROM "faturas_cartoes_de_credito"
+                             WHERE "paga" = false) AS "total_faturas_pendentes"
+                    ) t
+                """)
+                row = cur.fetchone()
+                return BalanceSnapshotModel.from_dict(row)
+    
+    def _snapshot_por_banco(self) -> BalanceSnapshotModel:
+        """Totais gerais e por banco em uma única consulta (GROUP BY ROLLUP)."""
+        with self.postgres_service.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    WITH movimentos AS (
+                        SELECT "id_banco", "valor_entrada" AS "entrada", 0 AS "saida", 0 AS "fatura"
+                        FROM "entradas"
+                        UNION ALL
+                        SELECT "id_banco", 0, "valor_saida", 0
+                        FROM "saidas_frequentes"
+                        UNION ALL
+                        SELECT "id_banco", 0, 0, "valor_fatura"
+                        FROM "faturas_cartoes_de_credito"
+                        WHERE "paga" = false
+                    )
+                    SELECT m."id_banco",
+                           b."nome_banco",
+                           GROUPING(m."id_banco") = 1 AS "is_total",
+                           COALESCE(SUM(m."entrada"), 0) AS "total_entradas",
+                           COALESCE(SUM(m."saida"), 0) AS "total_saidas",
+                           COALESCE(SUM(m."fatura"), 0) AS "total_faturas_pendentes",
+                           COALESCE(SUM(m."entrada") - SUM(m."saida") - SUM(m."fatura"), 0) AS "saldo"
+                    FROM movimentos m
+                    LEFT JOIN "bancos" b ON b."id_banco" = m."id_banco"
+                    GROUP BY ROLLUP ((m."id_banco", b."nome_banco"))
+                    ORDER BY "is_total" DESC, m."id_banco" NULLS LAST
+                """)
+                rows = cur.fetchall()
+        
+        total = BalanceSnapshotModel()
+        bancos = []
+        for row in rows:
+            if row["is_total"]:
+                total = BalanceSnapshotModel.from_dict(row)
+                total.id_banco = None
+                total.nome_banco = None
+            else:
+                bancos.append(BalanceSnapshotModel.from_dict(row))
+        total.por_banco = bancos
+        return total
@@ -3,8 +3,8 @@ from app.services.postgres_service import PostgresService
 from app.models.bancos_model import BancosModel
 
 class BancosService:
-    def __init__(self):
-        self.postgres_service = PostgresService()
+    def __init__(self, postgres_service: Optional[PostgresService] = None):
+        self.postgres_service = postgres_service or PostgresService()
         self.banco_model = BancosModel()
 
     def get_all_bancos(self) -> List[BancosModel]:
@@ -25,7 +25,7 @@ class BancosService:
     
     def insert_banco(self, nome_banco: str, valor_em_conta: float = 0.0, valor_investido: float = 0.0) -> int:
         """Insere um novo banco e retorna o ID gerado."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="bancos") as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     'INSERT INTO "bancos" ("nome_banco", "valor_em_conta", "valor_investido") VALUES (%s, %s, %s) RETURNING "id_banco"',
@@ -55,14 +55,14 @@ class BancosService:
         params.append(id_banco)
         query = f'UPDATE "bancos" SET {", ".join(updates)} WHERE "id_banco" = %s'
         
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="bancos") as conn:
             with conn.cursor() as cur:
                 cur.execute(query, params)
                 return cur.rowcount > 0
     
     def delete_banco(self, id_banco: int) -> bool:
         """Deleta um banco."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="bancos") as conn:
             with conn.cursor() as cur:
                 cur.execute('DELETE FROM "bancos" WHERE "id_banco" = %s', (id_banco,))
                 return cur.rowcount > 0
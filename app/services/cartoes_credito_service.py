@@ -3,8 +3,8 @@ from app.services.postgres_service import PostgresService
 from app.models.cartoes_credito_model import CartoesCreditoModel    
 
 class CartoesCreditoService:
-    def __init__(self):
-        self.postgres_service = PostgresService()
+    def __init__(self, postgres_service: Optional[PostgresService] = None):
+        self.postgres_service = postgres_service or PostgresService()
         self.cartao_credito_model = CartoesCreditoModel()
     
     def get_all_cartoes(self) -> List[CartoesCreditoModel]:
@@ -33,7 +33,7 @@ class CartoesCreditoService:
     
     def insert_cartao(self, id_banco: int, nome_cartao: str, tipo_cartao: int, dia_vencimento: int) -> int:
         """Insere um novo cartão de crédito."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="cartoes_de_credito") as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     'INSERT INTO "cartoes_de_credito" ("id_banco", "nome_cartao", "tipo_cartao", "dia_vencimento") VALUES (%s, %s, %s, %s) RETURNING "id_cartao"',
@@ -66,14 +66,14 @@ class CartoesCreditoService:
         params.append(id_cartao)
         query = f'UPDATE "cartoes_de_credito" SET {", ".join(updates)} WHERE "id_cartao" = %s'
         
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="cartoes_de_credito") as conn:
             with conn.cursor() as cur:
                 cur.execute(query, params)
                 return cur.rowcount > 0
     
     def delete_cartao(self, id_cartao: int) -> bool:
         """Deleta um cartão."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="cartoes_de_credito") as conn:
             with conn.cursor() as cur:
                 cur.execute('DELETE FROM "cartoes_de_credito" WHERE "id_cartao" = %s', (id_cartao,))
                 return cur.rowcount > 0
\ No newline at end of file
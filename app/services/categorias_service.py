@@ -3,8 +3,8 @@ from app.services.postgres_service import PostgresService
 from app.models.categorias_model import CategoriasModel 
 
 class CategoriasService():
-    def __init__(self):
-        self.postgres_service = PostgresService()
+    def __init__(self, postgres_service: Optional[PostgresService] = None):
+        self.postgres_service = postgres_service or PostgresService()
         self.categorias_model = CategoriasModel()
 
     def get_all_categorias(self) -> List[CategoriasModel]:
@@ -40,7 +40,7 @@ class CategoriasService():
     
     def insert_categoria(self, nome_categoria: str) -> int:
         """Insere uma nova categoria."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="categorias_de_compras") as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     'INSERT INTO "categorias_de_compras" ("nome_categoria") VALUES (%s) RETURNING "id_categoria"',
@@ -51,7 +51,7 @@ class CategoriasService():
     
     def update_categoria(self, id_categoria: int, nome_categoria: str) -> bool:
         """Atualiza dados de uma categoria."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="categorias_de_compras") as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     'UPDATE "categorias_de_compras" SET "nome_categoria" = %s WHERE "id_categoria" = %s',
@@ -61,7 +61,7 @@ class CategoriasService():
     
     def delete_categoria(self, id_categoria: int) -> bool:
         """Deleta uma categoria."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="categorias_de_compras") as conn:
             with conn.cursor() as cur:
                 cur.execute('DELETE FROM "categorias_de_compras" WHERE "id_categoria" = %s', (id_categoria,))
                 return cur.rowcount > 0
\ No newline at end of file
@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Optional
+from app.models.message_models import convert_history
+from app.core.config import log_error_to_file
+from app.core.tracing import current_span, tracer
+
+if TYPE_CHECKING:
+    # Só para anotações: evita carregar as tools (langchain) ao importar o pipeline
+    from app.services.conversation_history_service import ConversationHistoryService
+    from app.services.history_compactor import HistoryCompactor
+    from app.services.intent_router import IntentRouter
+
+# Respostas padrão quando o agente não consegue responder
+RESPOSTA_SEM_RESULTADO = "Não consegui gerar uma resposta agora. Tente novamente mais tarde."
+RESPOSTA_ERRO = "Ocorreu um erro no agente financeiro. Tente novamente em instantes."
+
+
+class ChatTurnService:
+    """
+    Pipeline de um turno de conversa: fast-path de intenções, histórico, agente
+    e persistência do turno. Usado tanto pelo webhook síncrono quanto pelos
+    workers em segundo plano (ver AgentWorkerPool).
+    """
+
+    def __init__(self, research_service: Any, conversation_service: "ConversationHistoryService",
+                 intent_router: Optional["IntentRouter"] = None, history_limit: int = 10,
+                 history_hours_back: int = 24, history_compactor: Optional["HistoryCompactor"] = None):
+        self.research_service = research_service
+        self.conversation_service = conversation_service
+        self.intent_router = intent_router
+        self.history_limit = history_limit
+        self.history_hours_back = history_hours_back
+        self.history_compactor = history_compactor
+
+    def process(self, numero_telefone: str, mensagem: str, recebida_em: Optional[datetime] = None) -> str:
+        """Processa a mensagem do usuário e retorna o texto da resposta.
+
+        Nunca propaga exceções: em caso de erro salva só a mensagem do usuário
+        e retorna uma resposta padrão.
+        """
+        recebida_em = recebida_em or datetime.now()
+        turno_salvo = False
+        try:
+            # Fast-path: perguntas inequívocas são respondidas direto pela tool, sem o modelo
+            with tracer.span("intent_router.route"):
+                result = self.intent_router.route(mensagem) if self.intent_router else None
+            current_span().set_attribute("fast_path", result is not None)
+
+            if result is None:
+                # Recupera o histórico do banco de dados (últimas mensagens da janela configurada)
+                chat_history = self.conversation_service.get_history(
+                    numero_telefone=numero_telefone,
+                    limit=self.history_limit,
+                    hours_back=self.history_hours_back
+                )
+
+                # Ajusta o histórico ao orçamento de tokens (mensagens antigas viram resumo)
+                if self.history_compactor is not None:
+                    with tracer.span("history.compact", messages=len(chat_history)):
+                        chat_history = self.history_compactor.compact(numero_telefone, chat_history)
+
+                # Converte para o formato esperado pelo LangChain
+                formatted_history = convert_history(chat_history)
+
+                # Processa a mensagem com o agente
+                result = self.research_service.run(mensagem, formatted_history)
+
+            if not result:
+                # Salva só a mensagem do usuário
+                self.conversation_service.save_turn(numero_telefone, mensagem, recebida_em=recebida_em)
+                turno_salvo = True
+                return RESPOSTA_SEM_RESULTADO
+
+            response_text = result.summary
+
+            # Salva pergunta e resposta juntas (em segundo plano, conforme HISTORY_PERSISTENCE_MODE)
+            self.conversation_service.save_turn(numero_telefone, mensagem, response_text, recebida_em=recebida_em)
+            turno_salvo = True
+            return response_text
+        except Exception as e:
+            log_error_to_file(e)
+            if not turno_salvo:
+                try:
+                    self.conversation_service.save_turn(numero_telefone, mensagem, recebida_em=recebida_em)
+                except Exception as save_error:
+                    log_error_to_file(save_error)
+            return RESPOSTA_ERRO
@@ -4,8 +4,8 @@ from datetime import date
 from app.models.compras_cartoes_model import ComprasCartoesModel
 
 class ComprasCartaoService:
-    def __init__(self):
-        self.postgres_service = PostgresService()
+    def __init__(self, postgres_service: Optional[PostgresService] = None):
+        self.postgres_service = postgres_service or PostgresService()
         self.compras_cartoes_model = ComprasCartoesModel()
     
     def get_all_compras_cartao(self) -> List[ComprasCartoesModel]:
@@ -40,10 +40,47 @@ class ComprasCartaoService:
                 rows = cur.fetchall()
                 return [self.compras_cartoes_model.from_dict(row) for row in rows]
     
+    def get_totais_por_categoria(self, data_inicio: Optional[date] = None, data_fim: Optional[date] = None,
+                                 id_cartao: Optional[int] = None) -> List[dict]:
+        """Retorna o total gasto por categoria (agregado no banco), do maior para o menor.
+        
+        Cada item contém "nome_categoria", "total" e "quantidade". Compras sem
+        categoria cadastrada aparecem como "Sem categoria".
+        """
+        filtros = []
+        params = []
+        
+        if data_inicio is not None:
+            filtros.append('c."data_compra" >= %s')
+            params.append(data_inicio)
+        if data_fim is not None:
+            filtros.append('c."data_compra" <= %s')
+            params.append(data_fim)
+        if id_cartao is not None:
+            filtros.append('c."id_cartao" = %s')
+            params.append(id_cartao)
+        
+        where = f'WHERE {" AND ".join(filtros)}' if filtros else ''
+        query = f"""
+            SELECT COALESCE(cat."nome_categoria", 'Sem categoria') AS "nome_categoria",
+                   SUM(c."valor_compra") AS "total",
+                   COUNT(*) AS "quantidade"
+            FROM "compras_cartao" c
+            LEFT JOIN "categorias_de_compras" cat ON cat."id_categoria" = c."id_categoria"
+            {where}
+            GROUP BY 1
+            ORDER BY "total" DESC
+        """
+        
+        with self.postgres_service.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                return [dict(row) for row in cur.fetchall()]
+    
     def insert_compra_cartao(self, id_cartao: int, id_banco: int, data_compra: date, estabelecimento: str, 
                              parcelas: str, id_categoria: int, valor_compra: float, observacoes: str = None) -> int:
         """Insere uma nova compra de cartão."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="compras_cartao") as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     'INSERT INTO "compras_cartao" ("id_cartao", "id_banco", "data_compra", "estabelecimento", "parcelas", "id_categoria", "valor_compra", "observacoes") VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING "id_compra_cartao"',
@@ -90,14 +127,14 @@ class ComprasCartaoService:
         params.append(id_compra)
         query = f'UPDATE "compras_cartao" SET {", ".join(updates)} WHERE "id_compra_cartao" = %s'
         
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="compras_cartao") as conn:
             with conn.cursor() as cur:
                 cur.execute(query, params)
                 return cur.rowcount > 0
     
     def delete_compra_cartao(self, id_compra: int) -> bool:
         """Deleta uma compra de cartão."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="compras_cartao") as conn:
             with conn.cursor() as cur:
                 cur.execute('DELETE FROM "compras_cartao" WHERE "id_compra_cartao" = %s', (id_compra,))
                 return cur.rowcount > 0
\ No newline at end of file
@@ -0,0 +1,370 @@
+from typing import Any, Dict, List, Optional
+import os
+import threading
+import time
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from dotenv import load_dotenv
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+
+# Conexões herdadas do processo pai após um fork. Ficam referenciadas aqui para
+# nunca serem coletadas no filho: o psycopg2 fecha a conexão ao liberá-la, o que
+# enviaria o Terminate pelo socket compartilhado e encerraria a sessão do pai.
+_inherited_connections: List[Any] = []
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão ficou disponível dentro do tempo limite do pool"""
+
+
+class _PooledConnection:
+    """Conexão física mantida pelo pool junto com seus metadados de idade/uso"""
+
+    __slots__ = ("connection", "created_at", "last_used_at")
+
+    def __init__(self, connection: Any):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class ConnectionPool:
+    """
+    Pool de conexões PostgreSQL thread-safe compartilhado pelo processo.
+
+    - Mantém entre `min_size` e `max_size` conexões abertas
+    - Verifica a saúde da conexão no checkout (conexões ociosas há mais de
+      `health_check_interval` segundos recebem um `SELECT 1`)
+    - Descarta conexões mais velhas que `max_lifetime` ou ociosas além de `max_idle`
+    - Após um fork, o processo filho descarta as conexões herdadas sem fechá-las
+      (fechar encerraria a sessão que ainda pertence ao processo pai)
+    """
+
+    def __init__(
+        self,
+        database_url: Optional[str],
+        min_size: int = 1,
+        max_size: int = 10,
+        max_lifetime: float = 1800.0,
+        max_idle: float = 300.0,
+        health_check_interval: float = 30.0,
+        timeout: float = 10.0,
+        cursor_factory: Any = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size deve ser maior ou igual a 1")
+        self.database_url = database_url
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self.cursor_factory = cursor_factory or psycopg2.extras.RealDictCursor
+        self._init_state()
+
+    def _init_state(self) -> None:
+        """(Re)inicializa o estado interno; usado na criação e após um fork"""
+        self._condition = threading.Condition(threading.Lock())
+        self._idle: List[_PooledConnection] = []
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._warmed = False
+        self._pid = os.getpid()
+        self._checkouts = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+
+    def _check_pid(self) -> None:
+        """Reinicia o pool se estivermos em um processo filho (fork)"""
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+
+    def reset_after_fork(self) -> None:
+        """Esquece as conexões herdadas do processo pai sem fechá-las.
+
+        As conexões vão para `_inherited_connections` em vez de serem descartadas:
+        se o filho as liberasse, o psycopg2 as fecharia pelo socket compartilhado
+        e a sessão do processo pai seria encerrada.
+        """
+        _inherited_connections.extend(entry.connection for entry in self._idle)
+        _inherited_connections.extend(entry.connection for entry in self._in_use.values())
+        self._init_state()
+
+    def _connect(self) -> _PooledConnection:
+        """Abre uma nova conexão física (fora do lock)"""
+        connection = psycopg2.connect(
+            self.database_url,
+            cursor_factory=self.cursor_factory
+        )
+        return _PooledConnection(connection)
+
+    def _is_expired(self, entry: _PooledConnection, now: float) -> bool:
+        """Indica se a conexão excedeu o tempo máximo de vida"""
+        return bool(self.max_lifetime) and now - entry.created_at > self.max_lifetime
+
+    def _is_healthy(self, entry: _PooledConnection, now: float) -> bool:
+        """Verifica se a conexão ainda pode ser usada antes de entregá-la"""
+        conn = entry.connection
+        if conn.closed or self._is_expired(entry, now):
+            return False
+        if now - entry.last_used_at < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, entry: _PooledConnection) -> None:
+        """Fecha a conexão física ignorando erros"""
+        try:
+            entry.connection.close()
+        except Exception:
+            pass
+
+    def _discard(self, entry: _PooledConnection) -> None:
+        """Fecha a conexão e libera sua vaga no pool"""
+        self._close_quietly(entry)
+        with self._condition:
+            self._size -= 1
+            self._discarded += 1
+            self._condition.notify()
+
+    def _warm(self) -> None:
+        """Abre as `min_size` conexões iniciais na primeira utilização"""
+        while True:
+            with self._condition:
+                if self._closed or self._size >= self.min_size:
+                    self._warmed = True
+                    return
+                self._size += 1
+            try:
+                entry = self._connect()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._warmed = True
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._created += 1
+                self._idle.append(entry)
+                self._condition.notify()
+
+    def getconn(self, timeout: Optional[float] = None) -> Any:
+        """
+        Empresta uma conexão do pool, aguardando até `timeout` segundos
+        quando todas estiverem em uso.
+
+        Raises:
+            PoolTimeoutError: Se nenhuma conexão ficar disponível a tempo
+        """
+        self._check_pid()
+        if not self._warmed:
+            self._warm()
+
+        started = time.monotonic()
+        deadline = started + (self.timeout if timeout is None else timeout)
+
+        while True:
+            entry = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise PoolTimeoutError("Pool de conexões fechado")
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Nenhuma conexão disponível após {self.timeout:.1f}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._condition.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if entry is None:
+                try:
+                    entry = self._connect()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                with self._condition:
+                    self._created += 1
+            elif not self._is_healthy(entry, time.monotonic()):
+                self._discard(entry)
+                continue
+
+            now = time.monotonic()
+            elapsed = now - started
+            with self._condition:
+                self._in_use[id(entry.connection)] = entry
+                self._checkouts += 1
+                self._checkout_time_total += elapsed
+                if elapsed > self._checkout_time_max:
+                    self._checkout_time_max = elapsed
+            return entry.connection
+
+    def putconn(self, connection: Any, discard: bool = False) -> None:
+        """Devolve uma conexão ao pool (ou a descarta se estiver quebrada/expirada)"""
+        if self._pid != os.getpid():
+            # Conexão herdada do processo pai: apenas esquece
+            self._check_pid()
+            return
+
+        with self._condition:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            # Conexão que não pertence ao pool (ou pool reiniciado)
+            try:
+                connection.close()
+            except Exception:
+                pass
+            return
+
+        now = time.monotonic()
+        if discard or self._closed or connection.closed or self._is_expired(entry, now):
+            self._discard(entry)
+            return
+
+        try:
+            status = connection.info.transaction_status
+            if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Exception:
+            self._discard(entry)
+            return
+
+        entry.last_used_at = now
+        stale = []
+        with self._condition:
+            self._idle.append(entry)
+            # Fecha conexões ociosas há muito tempo acima do mínimo configurado
+            if self.max_idle:
+                while self._size > self.min_size and self._idle and now - self._idle[0].last_used_at > self.max_idle:
+                    stale.append(self._idle.pop(0))
+                    self._size -= 1
+                    self._discarded += 1
+            self._condition.notify()
+        for old in stale:
+            self._close_quietly(old)
+
+    def close(self) -> None:
+        """Fecha todas as conexões ociosas e impede novos empréstimos"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for entry in idle:
+            self._close_quietly(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas de uso do pool"""
+        with self._condition:
+            checkouts = self._checkouts
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "waiting": self._waiting,
+                "checkouts": checkouts,
+                "checkout_latency_avg_ms": (self._checkout_time_total / checkouts * 1000) if checkouts else 0.0,
+                "checkout_latency_max_ms": self._checkout_time_max * 1000,
+                "timeouts": self._timeouts,
+                "connections_created": self._created,
+                "connections_discarded": self._discarded,
+            }
+
+
+def _env_int(name: str, default: int) -> int:
+    """Lê uma variável de ambiente inteira com valor padrão"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Lê uma variável de ambiente decimal com valor padrão"""
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(database_url: Optional[str] = None, cursor_factory: Any = None) -> ConnectionPool:
+    """Retorna o pool global do processo, criando-o na primeira chamada.
+
+    `database_url` e `cursor_factory` só valem na criação. O cursor padrão é o
+    AccountingCursor (contagem de comandos e log de consultas lentas); com
+    DB_QUERY_ACCOUNTING_ENABLED=false é o RealDictCursor.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if cursor_factory is None and os.getenv("DB_QUERY_ACCOUNTING_ENABLED", "true").lower() in ("1", "true", "yes"):
+                    from app.services.query_accounting import AccountingCursor
+                    cursor_factory = AccountingCursor
+                _pool = ConnectionPool(
+                    database_url or os.getenv("DATABASE_URL"),
+                    min_size=_env_int("DB_POOL_MIN_SIZE", 1),
+                    max_size=_env_int("DB_POOL_MAX_SIZE", 10),
+                    max_lifetime=_env_float("DB_POOL_MAX_LIFETIME", 1800.0),
+                    max_idle=_env_float("DB_POOL_MAX_IDLE", 300.0),
+                    health_check_interval=_env_float("DB_POOL_HEALTH_CHECK_INTERVAL", 30.0),
+                    timeout=_env_float("DB_POOL_TIMEOUT", 10.0),
+                    cursor_factory=cursor_factory,
+                )
+    return _pool
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Estatísticas do pool global (vazio se o pool ainda não foi criado)"""
+    return _pool.stats() if _pool is not None else {}
+
+
+def close_pool() -> None:
+    """Fecha o pool global; um novo será criado no próximo uso"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def _reset_pool_after_fork() -> None:
+    """Hook de fork: o filho não deve reutilizar conexões do processo pai"""
+    global _pool_lock
+    _pool_lock = threading.Lock()
+    if _pool is not None:
+        _pool.reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool_after_fork)
@@ -1,18 +1,47 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from cryptography.fernet import Fernet
+import atexit
+import threading
+import psycopg2.extras
 from app.services.postgres_service import PostgresService
 from app.models.historico_de_mensagens_model import ConversationHistory, ConversationMessage
 from app.models.message_models import Message
 from app.services.logs_service import log_service
+from app.services.history_cache import ConversationWindowCache
+from app.core.tracing import current_span, traced, tracer
 import os
 
 
 class ConversationHistoryService:
     """Serviço para gerenciar histórico de conversas com criptografia"""
     
-    def __init__(self):
-        self.db = PostgresService()
+    def __init__(
+        self,
+        postgres_service: Optional[PostgresService] = None,
+        cache: Optional[ConversationWindowCache] = None
+    ):
+        self.db = postgres_service or PostgresService()
+        # Cache write-through das janelas recentes (HISTORY_CACHE_ENABLED=false desativa)
+        self.cache = cache
+        if self.cache is None and os.getenv("HISTORY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"):
+            self.cache = ConversationWindowCache.from_env()
+        # Durabilidade do turno: "async" grava em segundo plano, "sync" grava antes de responder.
+        # Sem o cache de janelas o próximo turno lê direto do banco, então grava na hora.
+        default_mode = "async" if self.cache is not None else "sync"
+        self.persistence_mode = os.getenv("HISTORY_PERSISTENCE_MODE", default_mode).lower()
+        if self.cache is None and self.persistence_mode == "async":
+            log_service.warning("HISTORY_PERSISTENCE_MODE=async exige o cache de janelas; usando sync")
+            self.persistence_mode = "sync"
+        # Gravações em segundo plano ainda não concluídas, por telefone (get_history espera por elas)
+        self.pending_write_timeout = float(os.getenv("HISTORY_PENDING_WRITE_TIMEOUT", "5"))
+        self._pending_writes: Dict[str, List[Future]] = {}
+        self._pending_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid = os.getpid()
+        self._executor_lock = threading.Lock()
+        atexit.register(self.shutdown)
         self.encryption_key = os.getenv("CONVERSATION_ENCRYPTION_KEY")
         
         if not self.encryption_key:
@@ -39,6 +68,15 @@ class ConversationHistoryService:
             log_service.error(f"Erro ao descriptografar mensagem: {e}", exc_info=True)
             raise
     
+    @staticmethod
+    def _to_role(tipo_mensageiro: str) -> str:
+        """Ajusta o tipo_mensageiro para o formato esperado pelo sistema ('user' ou 'bot')"""
+        return 'user' if tipo_mensageiro == 'user' else 'bot'
+    
+    def cache_stats(self) -> dict:
+        """Acertos/falhas e ocupação do cache de janelas de conversa"""
+        return self.cache.stats() if self.cache is not None else {}
+    
     def save_message(self, numero_telefone: str, tipo_mensageiro: str, conteudo_mensagem: str) -> bool:
         """
         Salva uma mensagem no histórico (criptografada)
@@ -53,6 +91,7 @@ class ConversationHistoryService:
         """
         try:
             encrypted_conteudo_mensagem = self._encrypt_conteudo_mensagem(conteudo_mensagem)
+            data_criacao = datetime.now()
             
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
@@ -60,7 +99,14 @@ class ConversationHistoryService:
                     INSERT INTO historico_de_mensagens 
                     (numero_telefone, tipo_mensageiro, conteudo_mensagem, data_criacao)
                     VALUES (%s, %s, %s, %s)
-                """, (numero_telefone, tipo_mensageiro, encrypted_conteudo_mensagem, datetime.now()))
+                """, (numero_telefone, tipo_mensageiro, encrypted_conteudo_mensagem, data_criacao))
+            
+            if self.cache is not None:
+                self.cache.append(
+                    numero_telefone,
+                    Message(role=self._to_role(tipo_mensageiro), content=conteudo_mensagem),
+                    data_criacao
+                )
                 
             log_service.info(f"Mensagem salva para {numero_telefone}")
             return True
@@ -69,6 +115,140 @@ class ConversationHistoryService:
             log_service.error(f"Erro ao salvar mensagem: {e}", exc_info=True)
             return False
     
+    @traced("history.save_turn")
+    def save_turn(
+        self,
+        numero_telefone: str,
+        mensagem_usuario: str,
+        resposta_assistente: Optional[str] = None,
+        recebida_em: Optional[datetime] = None,
+        background: Optional[bool] = None
+    ) -> bool:
+        """
+        Salva um turno da conversa (mensagem do usuário + resposta) em uma única transação,
+        com um INSERT multi-linha.
+        
+        O cache de janelas é atualizado na hora; a gravação no banco pode rodar em
+        segundo plano (HISTORY_PERSISTENCE_MODE=async, padrão) para ficar fora do caminho
+        crítico da resposta, ou na thread chamadora (HISTORY_PERSISTENCE_MODE=sync).
+        
+        No modo assíncrono, se a janela do telefone sair do cache antes da gravação,
+        get_history espera as gravações pendentes deste processo antes de ler o banco.
+        Gravações de outro processo não são esperadas: com vários processos atendendo
+        o mesmo telefone sem afinidade, use HISTORY_PERSISTENCE_MODE=sync. Sem o cache
+        de janelas o modo é sempre síncrono.
+        
+        Args:
+            numero_telefone: Número do WhatsApp do usuário
+            mensagem_usuario: Conteúdo enviado pelo usuário
+            resposta_assistente: Resposta do assistente (None = só a mensagem do usuário)
+            recebida_em: Quando a mensagem do usuário chegou (padrão: agora)
+            background: Força o modo assíncrono (True) ou síncrono (False)
+            
+        Returns:
+            bool: True se salvou (modo síncrono) ou se agendou a gravação (modo assíncrono)
+        """
+        try:
+            recebida_em = recebida_em or datetime.now()
+            mensagens = [("user", mensagem_usuario, recebida_em)]
+            if resposta_assistente is not None:
+                # Garante que a resposta fique depois da pergunta na ordenação por data
+                resposta_em = max(datetime.now(), recebida_em + timedelta(microseconds=1))
+                mensagens.append(("assistant", resposta_assistente, resposta_em))
+            
+            with tracer.span("history.encrypt", messages=len(mensagens)):
+                rows = [
+                    (numero_telefone, tipo, self._encrypt_conteudo_mensagem(conteudo), data_criacao)
+                    for tipo, conteudo, data_criacao in mensagens
+                ]
+            
+            if self.cache is not None:
+                for tipo, conteudo, data_criacao in mensagens:
+                    self.cache.append(
+                        numero_telefone,
+                        Message(role=self._to_role(tipo), content=conteudo),
+                        data_criacao
+                    )
+            
+            if background is None:
+                background = self.persistence_mode == "async"
+            current_span().set_attribute("background", background)
+            if background:
+                future = self._get_executor().submit(self._persist_turn, numero_telefone, rows)
+                self._track_pending(numero_telefone, future)
+                return True
+            return self._persist_turn(numero_telefone, rows)
+            
+        except Exception as e:
+            log_service.error(f"Erro ao salvar turno: {e}", exc_info=True)
+            return False
+    
+    def _persist_turn(self, numero_telefone: str, rows: List[tuple]) -> bool:
+        """Grava as mensagens (já criptografadas) de um turno em uma transação"""
+        try:
+            with self.db.get_connection() as conn:
+                cursor = conn.cursor()
+                psycopg2.extras.execute_values(cursor, """
+                    INSERT INTO historico_de_mensagens 
+                    (numero_telefone, tipo_mensageiro, conteudo_mensagem, data_criacao)
+                    VALUES %s
+                """, rows)
+            
+            log_service.info(f"Turno salvo para {numero_telefone} ({len(rows)} mensagens)")
+            return True
+            
+        except Exception as e:
+            # O cache já tem o turno; descarta a janela para não divergir do banco
+            if self.cache is not None:
+                self.cache.invalidate(numero_telefone)
+            log_service.error(f"Erro ao salvar turno: {e}", exc_info=True)
+            return False
+    
+    def _track_pending(self, numero_telefone: str, future: Future) -> None:
+        """Registra a gravação em segundo plano até ela terminar"""
+        with self._pending_lock:
+            self._pending_writes.setdefault(numero_telefone, []).append(future)
+        future.add_done_callback(lambda f: self._forget_pending(numero_telefone, f))
+    
+    def _forget_pending(self, numero_telefone: str, future: Future) -> None:
+        with self._pending_lock:
+            futures = self._pending_writes.get(numero_telefone)
+            if futures and future in futures:
+                futures.remove(future)
+                if not futures:
+                    del self._pending_writes[numero_telefone]
+    
+    def _wait_pending_writes(self, numero_telefone: str) -> None:
+        """Espera as gravações em segundo plano do telefone antes de ler o histórico do banco"""
+        if self._executor_pid != os.getpid():
+            # Futures herdados do processo pai nunca terminam no filho
+            return
+        with self._pending_lock:
+            futures = list(self._pending_writes.get(numero_telefone, ()))
+        if futures:
+            with tracer.span("history.wait_pending_writes", writes=len(futures)):
+                wait(futures, timeout=self.pending_write_timeout)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Executor da gravação em segundo plano, criado no primeiro uso (e após fork)"""
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=int(os.getenv("HISTORY_PERSISTENCE_WORKERS", "2")),
+                        thread_name_prefix="history-persist"
+                    )
+                    self._executor_pid = os.getpid()
+                    self._pending_writes = {}
+        return self._executor
+    
+    def shutdown(self, wait: bool = True):
+        """Aguarda as gravações pendentes em segundo plano (chamado no encerramento)"""
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+    
+    @traced("history.get_history")
     def get_history(
         self, 
         numero_telefone: str, 
@@ -86,52 +266,67 @@ class ConversationHistoryService:
         Returns:
             List[Message]: Lista de mensagens no formato do message_models
         """
+        if self.cache is not None:
+            cached = self.cache.get(numero_telefone, limit, hours_back)
+            current_span().set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                return cached
+        
+        self._wait_pending_writes(numero_telefone)
         try:
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 
+                # Pega as N mais recentes pelo índice (numero_telefone, data_criacao DESC)
+                # e devolve em ordem cronológica
                 if hours_back:
                     time_filter = datetime.now() - timedelta(hours=hours_back)
                     cursor.execute("""
                         SELECT tipo_mensageiro, conteudo_mensagem, data_criacao
-                        FROM historico_de_mensagens
-                        WHERE numero_telefone = %s 
-                        AND data_criacao >= %s
+                        FROM (
+                            SELECT tipo_mensageiro, conteudo_mensagem, data_criacao
+                            FROM historico_de_mensagens
+                            WHERE numero_telefone = %s 
+                            AND data_criacao >= %s
+                            ORDER BY data_criacao DESC
+                            LIMIT %s
+                        ) recentes
                         ORDER BY data_criacao ASC
-                        LIMIT %s
                     """, (numero_telefone, time_filter, limit))
                 else:
                     cursor.execute("""
                         SELECT tipo_mensageiro, conteudo_mensagem, data_criacao
-                        FROM historico_de_mensagens
-                        WHERE numero_telefone = %s
-                        ORDER BY data_criacao DESC
-                        LIMIT %s
+                        FROM (
+                            SELECT tipo_mensageiro, conteudo_mensagem, data_criacao
+                            FROM historico_de_mensagens
+                            WHERE numero_telefone = %s
+                            ORDER BY data_criacao DESC
+                            LIMIT %s
+                        ) recentes
+                        ORDER BY data_criacao ASC
                     """, (numero_telefone, limit))
                 
                 rows = cursor.fetchall()
                 
                 # Descriptografa e converte para o modelo Message
-                messages = []
-                for row in rows:
-                    try:
-                        decrypted_conteudo_mensagem = self._decrypt_conteudo_mensagem(row['conteudo_mensagem'])
-                        
-                        # Ajusta o tipo_mensageiro para o formato esperado pelo sistema
-                        tipo_mensageiro = 'user' if row['tipo_mensageiro'] == 'user' else 'bot'
-                        
-                        messages.append(Message(
-                            role=tipo_mensageiro,
-                            content=decrypted_conteudo_mensagem
-                        ))
-                    except Exception as e:
-                        log_service.error(f"Erro ao descriptografar mensagem: {e}", exc_info=True)
-                        continue
+                timed_messages = []
+                with tracer.span("history.decrypt", messages=len(rows)):
+                    for row in rows:
+                        try:
+                            decrypted_conteudo_mensagem = self._decrypt_conteudo_mensagem(row['conteudo_mensagem'])
+                            
+                            timed_messages.append((row['data_criacao'], Message(
+                                role=self._to_role(row['tipo_mensageiro']),
+                                content=decrypted_conteudo_mensagem
+                            )))
+                        except Exception as e:
+                            log_service.error(f"Erro ao descriptografar mensagem: {e}", exc_info=True)
+                            continue
                 
-                # Se usou DESC, inverte para ordem cronológica
-                if not hours_back:
-                    messages.reverse()
+                if self.cache is not None:
+                    self.cache.put(numero_telefone, timed_messages, limit, hours_back)
                 
+                messages = [message for _, message in timed_messages]
                 log_service.info(f"Recuperadas {len(messages)} mensagens para {numero_telefone}")
                 return messages
                 
@@ -160,6 +355,9 @@ class ConversationHistoryService:
                 """, (cutoff_date,))
                 
                 deleted_count = cursor.rowcount
+            
+            if self.cache is not None:
+                self.cache.clear()
                 
             log_service.info(f"Removidas {deleted_count} mensagens antigas")
             return deleted_count
@@ -185,6 +383,9 @@ class ConversationHistoryService:
                     DELETE FROM historico_de_mensagens
                     WHERE numero_telefone = %s
                 """, (numero_telefone,))
+            
+            if self.cache is not None:
+                self.cache.invalidate(numero_telefone)
                 
             log_service.info(f"Histórico removido para {numero_telefone}")
             return True
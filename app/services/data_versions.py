@@ -0,0 +1,41 @@
+from typing import Dict, Iterable, Tuple
+import threading
+
+
+class DataVersions:
+    """
+    Versão dos dados de cada tabela no processo.
+
+    A versão é incrementada a cada insert/update/delete feito pelos serviços
+    (via PostgresService.notify_table_changed); caches que guardam um snapshot
+    das versões sabem que ficaram obsoletos quando o snapshot muda.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+
+    def bump(self, table_name: str) -> int:
+        """Incrementa e retorna a versão da tabela"""
+        with self._lock:
+            version = self._versions.get(table_name, 0) + 1
+            self._versions[table_name] = version
+            return version
+
+    def get(self, table_name: str) -> int:
+        """Versão atual da tabela (0 se nunca foi alterada neste processo)"""
+        return self._versions.get(table_name, 0)
+
+    def snapshot(self, table_names: Iterable[str]) -> Tuple[int, ...]:
+        """Versões atuais das tabelas, na ordem recebida"""
+        versions = self._versions
+        return tuple(versions.get(t, 0) for t in table_names)
+
+    def all(self) -> Dict[str, int]:
+        """Cópia de todas as versões conhecidas"""
+        with self._lock:
+            return dict(self._versions)
+
+
+# Instância global das versões de dados
+data_versions = DataVersions()
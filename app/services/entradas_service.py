@@ -3,8 +3,8 @@ from app.services.postgres_service import PostgresService
 from app.models.entradas_model import EntradasModel
 
 class EntradasService():
-    def __init__(self):
-        self.postgres_service = PostgresService()
+    def __init__(self, postgres_service: Optional[PostgresService] = None):
+        self.postgres_service = postgres_service or PostgresService()
         self.entradas_model = EntradasModel()
 
     def get_all_entradas(self) -> List[EntradasModel]:
@@ -33,7 +33,7 @@ class EntradasService():
     
     def insert_entrada(self, id_banco: int, nome_entrada: str, tipo_entrada: str, valor_entrada: float, dia_entrada: int) -> int:
         """Insere uma nova entrada."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="entradas") as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     'INSERT INTO "entradas" ("id_banco", "nome_entrada", "tipo_entrada", "valor_entrada", "dia_entrada") VALUES (%s, %s, %s, %s, %s) RETURNING "id_entrada"',
@@ -69,14 +69,14 @@ class EntradasService():
         params.append(id_entrada)
         query = f'UPDATE "entradas" SET {", ".join(updates)} WHERE "id_entrada" = %s'
         
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="entradas") as conn:
             with conn.cursor() as cur:
                 cur.execute(query, params)
                 return cur.rowcount > 0
     
     def delete_entrada(self, id_entrada: int) -> bool:
         """Deleta uma entrada."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="entradas") as conn:
             with conn.cursor() as cur:
                 cur.execute('DELETE FROM "entradas" WHERE "id_entrada" = %s', (id_entrada,))
                 return cur.rowcount > 0
\ No newline at end of file
@@ -0,0 +1,205 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult, LLMResult
+
+
+def _current_turn(messages: Sequence[BaseMessage]) -> Optional[int]:
+    """Índice da última mensagem do usuário (início do turno atual)"""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return i
+    return None
+
+
+def _message_to_dict(message: BaseMessage) -> Dict[str, Any]:
+    """Serializa uma resposta do modelo para o JSONL"""
+    tool_calls = getattr(message, "tool_calls", None) or []
+    return {
+        "content": message.content if isinstance(message.content, str) else json.dumps(message.content),
+        "tool_calls": [{"name": c["name"], "args": c["args"], "id": c["id"]} for c in tool_calls],
+    }
+
+
+def _message_from_dict(data: Dict[str, Any]) -> AIMessage:
+    """Reconstrói a resposta gravada"""
+    return AIMessage(content=data.get("content", ""), tool_calls=data.get("tool_calls") or [])
+
+
+def load_sessions(path: str) -> List[Dict[str, Any]]:
+    """Lê as sessões gravadas de um arquivo JSONL"""
+    sessions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                sessions.append(json.loads(line))
+    return sessions
+
+
+def final_answer(summary: str, topic: str = "Resposta Financeira", tools_used: Sequence[str] = ()) -> AIMessage:
+    """Resposta final no formato esperado pelo PydanticOutputParser(ResearchResponse)"""
+    return AIMessage(content=json.dumps(
+        {"topic": topic, "summary": summary, "sources": [], "tools_used": list(tools_used)},
+        ensure_ascii=False,
+    ))
+
+
+class IntentScriptedPolicy:
+    """
+    Política padrão do modo scripted: no primeiro passo chama a tool cuja rota
+    de intenção aparece em algum trecho da mensagem (ou responde direto se
+    nenhuma aparecer); depois que a tool respondeu, devolve a resposta final
+    com a saída dela.
+    """
+
+    def __init__(self, summary_max_chars: int = 500):
+        from app.services.intent_router import intent_router
+        self.router = intent_router
+        self.summary_max_chars = summary_max_chars
+
+    def __call__(self, messages: Sequence[BaseMessage]) -> AIMessage:
+        """Próxima resposta do modelo para as mensagens do turno"""
+        start = _current_turn(messages)
+        query = messages[start].content if start is not None else ""
+        turn = list(messages[start + 1:]) if start is not None else []
+        tool_results = [m for m in turn if isinstance(m, ToolMessage)]
+        if tool_results:
+            tools_used = [c["name"] for m in turn if isinstance(m, AIMessage) for c in m.tool_calls]
+            summary = "\n".join(str(m.content) for m in tool_results)[:self.summary_max_chars]
+            return final_answer(summary, tools_used=tools_used)
+
+        matched = self.router.match(str(query), full=False)
+        if matched is None:
+            return final_answer("Resposta simulada para: " + str(query)[:self.summary_max_chars])
+        tool, _ = matched
+        call_id = f"call_{zlib.crc32(str(query).encode()):08x}"
+        return AIMessage(content="", tool_calls=[{"name": tool.name, "args": {"__arg1": ""}, "id": call_id}])
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Modelo de chat sem rede para testes de carga do agente (parâmetro `llm` dos serviços).
+
+    - replay: reproduz as sessões gravadas pelo ChatSessionRecorder;
+    - scripted: segue uma política (ex: IntentScriptedPolicy).
+    A latência artificial (`latency_ms` ± `latency_jitter_ms`) simula o tempo do modelo.
+
+    Não guarda estado entre chamadas: o passo do turno é deduzido das mensagens
+    recebidas (respostas do modelo depois da última mensagem do usuário), então
+    a mesma instância pode atender várias requisições em paralelo.
+    """
+
+    sessions: List[Dict[str, Any]] = []
+    policy: Optional[Callable[[Sequence[BaseMessage]], AIMessage]] = None
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @classmethod
+    def from_env(cls) -> Optional["FakeChatModel"]:
+        """Cria o modelo falso se LLM_FAKE_MODE estiver definido (replay | scripted)"""
+        mode = os.getenv("LLM_FAKE_MODE", "").lower()
+        if not mode:
+            return None
+        latency = {
+            "latency_ms": float(os.getenv("LLM_FAKE_LATENCY_MS", "0")),
+            "latency_jitter_ms": float(os.getenv("LLM_FAKE_LATENCY_JITTER_MS", "0")),
+        }
+        if mode == "replay":
+            return cls(sessions=load_sessions(os.environ["LLM_FAKE_REPLAY_FILE"]), **latency)
+        if mode == "scripted":
+            return cls(policy=IntentScriptedPolicy(), **latency)
+        raise ValueError(f"LLM_FAKE_MODE inválido: {mode}")
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        """As tools não mudam as respostas gravadas/scripted"""
+        return self
+
+    def _sleep(self) -> None:
+        """Latência artificial de uma chamada ao modelo"""
+        delay = self.latency_ms
+        if self.latency_jitter_ms:
+            delay += random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def _replay(self, messages: Sequence[BaseMessage]) -> AIMessage:
+        """Resposta gravada para o passo atual do turno"""
+        start = _current_turn(messages)
+        query = str(messages[start].content) if start is not None else ""
+        step = sum(1 for m in messages[(start or 0) + 1:] if isinstance(m, AIMessage))
+        session = next((s for s in self.sessions if s.get("query") == query), None)
+        if session is None:
+            # Pergunta não gravada: escolhe uma sessão de forma determinística
+            session = self.sessions[zlib.crc32(query.encode()) % len(self.sessions)]
+        recorded = session["messages"]
+        return _message_from_dict(recorded[min(step, len(recorded) - 1)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._sleep()
+        if self.policy is not None:
+            message = self.policy(messages)
+        elif self.sessions:
+            message = self._replay(messages)
+        else:
+            message = final_answer("Resposta simulada.")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class ChatSessionRecorder(BaseCallbackHandler):
+    """
+    Callback que grava as respostas do modelo de cada turno em JSONL, no
+    formato usado pelo modo replay do FakeChatModel. Uma linha é escrita quando
+    o modelo dá a resposta final (sem tool calls):
+
+        {"query": "...", "messages": [{"content": "", "tool_calls": [{"name": "...", "args": {...}, "id": "..."}]},
+                                      {"content": "{\"summary\": ...}", "tool_calls": []}]}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], **kwargs: Any) -> None:
+        """Início de uma chamada: identifica o turno pela última mensagem do usuário"""
+        batch = messages[0] if messages else []
+        start = _current_turn(batch)
+        query = str(batch[start].content) if start is not None else ""
+        first_step = not any(isinstance(m, AIMessage) for m in batch[(start or 0) + 1:])
+        session = getattr(self._local, "session", None)
+        if first_step or session is None or session["query"] != query:
+            self._local.session = {"query": query, "messages": []}
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        """Guarda a resposta; grava a sessão quando ela for a resposta final"""
+        session = getattr(self._local, "session", None)
+        if session is None or not response.generations or not response.generations[0]:
+            return
+        message = getattr(response.generations[0][0], "message", None)
+        if message is None:
+            return
+        data = _message_to_dict(message)
+        session["messages"].append(data)
+        if not data["tool_calls"]:
+            with self._lock:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(session, ensure_ascii=False) + "\n")
+            self._local.session = None
+
+    @classmethod
+    def from_env(cls) -> Optional["ChatSessionRecorder"]:
+        """Cria o gravador se LLM_RECORD_FILE estiver definido"""
+        path = os.getenv("LLM_RECORD_FILE")
+        return cls(path) if path else None
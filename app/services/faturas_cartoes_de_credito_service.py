@@ -1,11 +1,12 @@
 from typing import Optional, List
+from datetime import date
 from app.services.postgres_service import PostgresService
 from app.models.faturas_cartoes_de_credito_model import FaturasCartoesDeCreditoModel
 
 class FaturasCartoesDeCreditoService():
  
-    def __init__(self):
-        self.postgres_service = PostgresService()
+    def __init__(self, postgres_service: Optional[PostgresService] = None):
+        self.postgres_service = postgres_service or PostgresService()
         self.faturas_cartoes_de_credito_model = FaturasCartoesDeCreditoModel()
 
     def get_all_faturas(self) -> List[FaturasCartoesDeCreditoModel]:
@@ -51,10 +52,63 @@ class FaturasCartoesDeCreditoService():
                 rows = cur.fetchall()
                 return [self.faturas_cartoes_de_credito_model.from_dict(row) for row in rows]
     
+    def get_totais_por_cartao(self, paga: Optional[bool] = None, mes_inicio: Optional[int] = None,
+                              ano_inicio: Optional[int] = None, mes_fim: Optional[int] = None,
+                              ano_fim: Optional[int] = None, limite: Optional[int] = None) -> List[dict]:
+        """Retorna o total de faturas por cartão, já com o nome do cartão, do maior para o menor.
+        
+        Args:
+            paga: True/False para filtrar faturas pagas/não pagas (None = todas)
+            mes_inicio, ano_inicio: início do período (inclusive)
+            mes_fim, ano_fim: fim do período (inclusive)
+            Mês sem ano usa o ano do outro extremo do período ou, sem nenhum, o ano atual.
+            limite: quantidade máxima de cartões retornados (top N)
+        
+        Cada item contém "id_cartao", "nome_cartao", "total" e "quantidade".
+        """
+        filtros = []
+        params = []
+        
+        if mes_inicio is not None and ano_inicio is None:
+            ano_inicio = ano_fim or date.today().year
+        if mes_fim is not None and ano_fim is None:
+            ano_fim = ano_inicio or date.today().year
+        
+        if paga is not None:
+            filtros.append('f."paga" = %s')
+            params.append(paga)
+        if ano_inicio is not None:
+            filtros.append('(f."ano_fatura", f."mes_fatura") >= (%s, %s)')
+            params.extend([ano_inicio, mes_inicio or 1])
+        if ano_fim is not None:
+            filtros.append('(f."ano_fatura", f."mes_fatura") <= (%s, %s)')
+            params.extend([ano_fim, mes_fim or 12])
+        
+        where = f'WHERE {" AND ".join(filtros)}' if filtros else ''
+        query = f"""
+            SELECT f."id_cartao" AS "id_cartao",
+                   COALESCE(c."nome_cartao", 'Cartão ' || f."id_cartao") AS "nome_cartao",
+                   SUM(f."valor_fatura") AS "total",
+                   COUNT(*) AS "quantidade"
+            FROM "faturas_cartoes_de_credito" f
+            LEFT JOIN "cartoes_de_credito" c ON c."id_cartao" = f."id_cartao"
+            {where}
+            GROUP BY f."id_cartao", c."nome_cartao"
+            ORDER BY "total" DESC, f."id_cartao"
+        """
+        if limite is not None:
+            query += " LIMIT %s"
+            params.append(limite)
+        
+        with self.postgres_service.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                return [dict(row) for row in cur.fetchall()]
+    
     def insert_fatura(self, id_cartao: int, id_banco: int, mes_fatura: int, ano_fatura: int, 
                      valor_fatura: float, paga: bool = False) -> int:
         """Insere uma nova fatura."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="faturas_cartoes_de_credito") as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     'INSERT INTO "faturas_cartoes_de_credito" ("id_cartao", "id_banco", "mes_fatura", "ano_fatura", "valor_fatura", "paga") VALUES (%s, %s, %s, %s, %s, %s) RETURNING "id_fatura_cartao_credito"',
@@ -95,14 +149,14 @@ class FaturasCartoesDeCreditoService():
         params.append(id_fatura)
         query = f'UPDATE "faturas_cartoes_de_credito" SET {", ".join(updates)} WHERE "id_fatura_cartao_credito" = %s'
         
-        with self.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="faturas_cartoes_de_credito") as conn:
             with conn.cursor() as cur:
                 cur.execute(query, params)
                 return cur.rowcount > 0
     
     def delete_fatura(self, id_fatura: int) -> bool:
         """Deleta uma fatura."""
-        with self.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="faturas_cartoes_de_credito") as conn:
             with conn.cursor() as cur:
                 cur.execute('DELETE FROM "faturas_cartoes_de_credito" WHERE "id_fatura_cartao_credito" = %s', (id_fatura,))
                 return cur.rowcount > 0
@@ -0,0 +1,154 @@
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import os
+import threading
+import time
+from app.models.message_models import Message
+
+# Custo fixo estimado (bytes) de cada mensagem em memória, além do conteúdo
+_MESSAGE_OVERHEAD_BYTES = 96
+
+
+def _message_size(message: Message) -> int:
+    """Tamanho aproximado de uma mensagem em memória"""
+    return len(message.content.encode("utf-8")) + _MESSAGE_OVERHEAD_BYTES
+
+
+class _CachedWindow:
+    """Janela das mensagens mais recentes de um telefone, já descriptografadas"""
+
+    __slots__ = ("messages", "limit", "hours_back", "size_bytes", "expires_at")
+
+    def __init__(self, messages: List[Tuple[datetime, Message]], limit: int,
+                 hours_back: Optional[int], expires_at: float):
+        self.messages = messages
+        self.limit = limit
+        self.hours_back = hours_back
+        self.size_bytes = sum(_message_size(m) for _, m in messages)
+        self.expires_at = expires_at
+
+    def covers(self, limit: int, hours_back: Optional[int]) -> bool:
+        """Indica se a janela carregada contém a resposta para (limit, hours_back)"""
+        if limit > self.limit:
+            return False
+        if self.hours_back is None:
+            return True
+        return hours_back is not None and hours_back <= self.hours_back
+
+
+class ConversationWindowCache:
+    """
+    Cache LRU em memória das janelas de conversa por telefone.
+
+    Limitado por quantidade de telefones (`max_entries`), por bytes (`max_bytes`)
+    e por tempo de vida (`ttl` em segundos). Cada janela guarda as mensagens mais
+    recentes do telefone; `append()` a mantém atualizada a cada mensagem salva
+    (write-through), então conversas ativas não precisam consultar o banco.
+
+    O cache é local ao processo: escritas feitas por outros workers só aparecem
+    depois que a entrada expira (`ttl`).
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 8 * 1024 * 1024, ttl: float = 900.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _CachedWindow]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ConversationWindowCache":
+        """Cria o cache a partir das variáveis HISTORY_CACHE_*"""
+        return cls(
+            max_entries=int(os.getenv("HISTORY_CACHE_MAX_ENTRIES", "1000")),
+            max_bytes=int(os.getenv("HISTORY_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+            ttl=float(os.getenv("HISTORY_CACHE_TTL", "900")),
+        )
+
+    def get(self, numero_telefone: str, limit: int, hours_back: Optional[int]) -> Optional[List[Message]]:
+        """Retorna as mensagens em ordem cronológica, ou None se não houver janela válida"""
+        with self._lock:
+            entry = self._entries.get(numero_telefone)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(numero_telefone)
+                entry = None
+            if entry is None or not entry.covers(limit, hours_back):
+                self._misses += 1
+                return None
+            self._entries.move_to_end(numero_telefone)
+            self._hits += 1
+            messages = entry.messages
+
+        if hours_back:
+            cutoff = datetime.now() - timedelta(hours=hours_back)
+            messages = [item for item in messages if item[0] >= cutoff]
+        return [m for _, m in messages[-limit:]] if limit > 0 else []
+
+    def put(self, numero_telefone: str, messages: List[Tuple[datetime, Message]],
+            limit: int, hours_back: Optional[int]) -> None:
+        """Guarda a janela carregada do banco (mensagens em ordem cronológica)"""
+        entry = _CachedWindow(list(messages[-limit:]) if limit > 0 else [], limit, hours_back,
+                              time.monotonic() + self.ttl)
+        if entry.size_bytes > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(numero_telefone)
+            self._entries[numero_telefone] = entry
+            self._bytes += entry.size_bytes
+            self._evict()
+
+    def append(self, numero_telefone: str, message: Message, created_at: datetime) -> None:
+        """Write-through: adiciona uma mensagem recém-salva à janela do telefone, se existir"""
+        with self._lock:
+            entry = self._entries.get(numero_telefone)
+            if entry is None:
+                return
+            entry.messages.append((created_at, message))
+            entry.size_bytes += _message_size(message)
+            self._bytes += _message_size(message)
+            while len(entry.messages) > entry.limit:
+                _, removed = entry.messages.pop(0)
+                entry.size_bytes -= _message_size(removed)
+                self._bytes -= _message_size(removed)
+            self._entries.move_to_end(numero_telefone)
+            self._evict()
+
+    def invalidate(self, numero_telefone: str) -> None:
+        """Remove a janela de um telefone"""
+        with self._lock:
+            self._remove(numero_telefone)
+
+    def clear(self) -> None:
+        """Remove todas as janelas"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de acertos/falhas e ocupação do cache"""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remove(self, numero_telefone: str) -> None:
+        """Remove uma entrada (chamar com o lock adquirido)"""
+        entry = self._entries.pop(numero_telefone, None)
+        if entry is not None:
+            self._bytes -= entry.size_bytes
+
+    def _evict(self) -> None:
+        """Remove as entradas menos usadas até respeitar os limites (com o lock adquirido)"""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size_bytes
+            self._evictions += 1
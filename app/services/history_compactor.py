@@ -0,0 +1,150 @@
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+import os
+import threading
+import time
+from app.models.message_models import Message
+from app.services.token_counter import TokenCounter
+
+# Tokens extras que cada mensagem custa no formato de chat (papel, separadores)
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+_ROLE_LABELS = {"user": "Usuário", "bot": "Assistente"}
+
+
+class _RollingSummary:
+    """Resumo extrativo das mensagens que saíram do orçamento, por telefone"""
+
+    __slots__ = ("lines", "expires_at")
+
+    def __init__(self, expires_at: float):
+        self.lines: List[Tuple[int, str]] = []
+        self.expires_at = expires_at
+
+
+class HistoryCompactor:
+    """
+    Ajusta o histórico da conversa a um orçamento de tokens.
+
+    Mensagens muito longas (ex: saídas de tools com tabelas) são cortadas em
+    `message_max_tokens`. As mensagens mais recentes são mantidas enquanto
+    couberem em `budget`; as mais antigas que não cabem viram linhas de um
+    resumo contínuo por telefone, limitado a `summary_max_tokens` e enviado
+    como mensagem de sistema no início do histórico. Assim os tokens de prompt
+    por turno ficam limitados mesmo em conversas verbosas.
+
+    O resumo fica em memória no processo (LRU com `max_entries` e `ttl`).
+    """
+
+    def __init__(self, token_counter: Optional[TokenCounter] = None, budget: int = 1500,
+                 message_max_tokens: int = 300, summary_max_tokens: int = 200,
+                 summary_line_tokens: int = 40, max_entries: int = 1000, ttl: float = 86400.0):
+        self.token_counter = token_counter or TokenCounter()
+        self.budget = budget
+        self.message_max_tokens = message_max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.summary_line_tokens = summary_line_tokens
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._summaries: "OrderedDict[str, _RollingSummary]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "HistoryCompactor":
+        """Cria o compactador a partir das variáveis HISTORY_TOKEN_BUDGET e HISTORY_SUMMARY_*"""
+        return cls(
+            token_counter=TokenCounter(os.getenv("HISTORY_TOKENIZER_MODEL", "gpt-4.1")),
+            budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "1500")),
+            message_max_tokens=int(os.getenv("HISTORY_MESSAGE_MAX_TOKENS", "300")),
+            summary_max_tokens=int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", "200")),
+            max_entries=int(os.getenv("HISTORY_SUMMARY_MAX_ENTRIES", "1000")),
+            ttl=float(os.getenv("HISTORY_SUMMARY_TTL", "86400")),
+        )
+
+    def _cost(self, message: Message) -> int:
+        """Tokens que a mensagem ocupa no prompt"""
+        return self.token_counter.count(message.content) + _MESSAGE_OVERHEAD_TOKENS
+
+    def _summary_line(self, message: Message) -> str:
+        """Linha do resumo para uma mensagem: papel + início do texto em uma linha"""
+        text = " ".join(message.content.replace("*", "").split())
+        label = _ROLE_LABELS.get(message.role, message.role)
+        return f"{label}: {self.token_counter.truncate(text, self.summary_line_tokens)}"
+
+    def compact(self, numero_telefone: str, messages: List[Message]) -> List[Message]:
+        """Retorna o histórico (ordem cronológica) ajustado ao orçamento de tokens"""
+        messages = [
+            Message(role=m.role, content=self.token_counter.truncate(m.content, self.message_max_tokens))
+            for m in messages
+        ]
+        total = sum(self._cost(m) for m in messages)
+        summary = self._get_summary(numero_telefone)
+        if total <= self.budget and summary is None:
+            return messages
+
+        # Reserva espaço para o resumo e mantém as mensagens mais recentes que couberem
+        available = self.budget - self.summary_max_tokens - _MESSAGE_OVERHEAD_TOKENS
+        kept: List[Message] = []
+        used = 0
+        for message in reversed(messages):
+            cost = self._cost(message)
+            if kept and used + cost > available:
+                break
+            kept.append(message)
+            used += cost
+        kept.reverse()
+        dropped = messages[:len(messages) - len(kept)]
+
+        summary_text = self._update_summary(numero_telefone, dropped, kept)
+        if not summary_text:
+            return kept
+        return [Message(role="system", content=f"Resumo da conversa anterior:\n{summary_text}")] + kept
+
+    def _get_summary(self, numero_telefone: str) -> Optional[_RollingSummary]:
+        """Resumo ainda válido do telefone, se houver"""
+        with self._lock:
+            summary = self._summaries.get(numero_telefone)
+            if summary is not None and summary.expires_at <= time.monotonic():
+                del self._summaries[numero_telefone]
+                summary = None
+            return summary
+
+    def _update_summary(self, numero_telefone: str, dropped: List[Message], kept: List[Message]) -> str:
+        """Acrescenta as mensagens descartadas ao resumo e retorna o texto a enviar"""
+        kept_keys = {hash((m.role, m.content)) for m in kept}
+        with self._lock:
+            summary = self._summaries.get(numero_telefone)
+            if summary is None:
+                if not dropped:
+                    return ""
+                summary = self._summaries[numero_telefone] = _RollingSummary(0.0)
+            known = {key for key, _ in summary.lines}
+            for message in dropped:
+                key = hash((message.role, message.content))
+                if key not in known:
+                    summary.lines.append((key, self._summary_line(message)))
+                    known.add(key)
+
+            # Mantém as linhas mais recentes dentro do limite do resumo
+            while summary.lines and sum(self.token_counter.count(line) + 1 for _, line in summary.lines) > self.summary_max_tokens:
+                summary.lines.pop(0)
+            summary.expires_at = time.monotonic() + self.ttl
+            self._summaries.move_to_end(numero_telefone)
+            while len(self._summaries) > self.max_entries:
+                self._summaries.popitem(last=False)
+
+            # Mensagens que voltaram a caber no orçamento não se repetem no resumo
+            return "\n".join(line for key, line in summary.lines if key not in kept_keys)
+
+    def reset(self, numero_telefone: Optional[str] = None) -> None:
+        """Descarta o resumo de um telefone (ou de todos)"""
+        with self._lock:
+            if numero_telefone is None:
+                self._summaries.clear()
+            else:
+                self._summaries.pop(numero_telefone, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Quantidade de resumos em memória"""
+        with self._lock:
+            return {"summaries": len(self._summaries)}
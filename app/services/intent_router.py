@@ -0,0 +1,98 @@
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+import functools
+import json
+import os
+import re
+import unicodedata
+from langchain_community.tools import Tool
+from app.core.intents import intent_routes
+from app.models.research_models import ResearchResponse
+from app.services.logs_service import log_service
+from app.tools.tool_cache import is_error_output
+from app.tools.tools import (
+    welcome_tool, bancos_tool, cartoes_tool, faturas_pendentes_tool, analyze_faturas_tool,
+    entradas_tool, saidas_tool, balance_tool, categorias_tool, compras_categoria_tool,
+)
+
+# Tools que o fast-path pode chamar: apenas leitura, sem argumentos obrigatórios
+ROUTABLE_TOOLS = [
+    welcome_tool, bancos_tool, cartoes_tool, faturas_pendentes_tool, analyze_faturas_tool,
+    entradas_tool, saidas_tool, balance_tool, categorias_tool, compras_categoria_tool,
+]
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sem acentos, sem pontuação e com espaços simples"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+class IntentRouter:
+    """
+    Roteador determinístico na frente do agente.
+
+    Mensagens curtas e inequívocas ("qual meu saldo?", "faturas pendentes") são
+    respondidas chamando a tool diretamente, sem passar pelo modelo. O padrão
+    precisa casar com a mensagem inteira; qualquer outra coisa (ou erro da tool)
+    retorna None e a mensagem segue para o agente.
+    """
+
+    def __init__(self, routes: Sequence[dict], tools: Sequence[Tool] = ROUTABLE_TOOLS, enabled: bool = True):
+        self.enabled = enabled
+        tools_by_name: Dict[str, Tool] = {tool.name: tool for tool in tools}
+        self._routes: List[Tuple[Pattern[str], Tool, str]] = []
+        for route in routes:
+            tool = tools_by_name.get(route["tool"])
+            if tool is None:
+                raise ValueError(f"Tool desconhecida na rota de intenção: {route['tool']}")
+            topic = route.get("topic") or "Resposta Financeira"
+            for pattern in route["patterns"]:
+                self._routes.append((re.compile(pattern), tool, topic))
+
+    @classmethod
+    def from_env(cls) -> "IntentRouter":
+        """Cria o roteador com as rotas de app/core/intents.py ou do JSON em INTENT_ROUTES_FILE"""
+        routes = intent_routes
+        routes_file = os.getenv("INTENT_ROUTES_FILE")
+        if routes_file:
+            with open(routes_file, encoding="utf-8") as f:
+                routes = json.load(f)
+        enabled = os.getenv("INTENT_FAST_PATH_ENABLED", "true").lower() in ("1", "true", "yes")
+        return cls(routes, enabled=enabled)
+
+    def match(self, query: str, full: bool = True) -> Optional[Tuple[Tool, str]]:
+        """Retorna (tool, tópico) da primeira rota que casa com a mensagem inteira
+        (ou com qualquer trecho dela, se `full=False`)"""
+        text = normalize_text(query or "")
+        if not text:
+            return None
+        for pattern, tool, topic in self._routes:
+            if (pattern.fullmatch(text) if full else pattern.search(text)):
+                return tool, topic
+        return None
+
+    def route(self, query: str) -> Optional[ResearchResponse]:
+        """Responde a mensagem direto pela tool, ou None para cair no agente"""
+        if not self.enabled:
+            return None
+        matched = self.match(query)
+        if matched is None:
+            return None
+        tool, topic = matched
+        # A resposta vai direto ao usuário: usa a renderização legível, não a saída compacta do agente
+        func = tool.func.func if isinstance(tool.func, functools.partial) else tool.func
+        try:
+            output = func("")
+        except Exception as e:
+            log_service.warning(f"Fast-path de intenção falhou em {tool.name}: {e}")
+            return None
+        if is_error_output(output):
+            return None
+        log_service.debug(f"Fast-path de intenção: {tool.name}")
+        return ResearchResponse(topic=topic, summary=output, sources=[], tools_used=[tool.name])
+
+
+# Instância global do roteador de intenções
+intent_router = IntentRouter.from_env()
@@ -4,8 +4,8 @@ from app.models.limites_de_compras_model import LimitesDeComprasModel
 
 class LimitesDeComprasService():
     """Serviço para interações com limites de compras."""
-    def __init__(self):
-        self.postgres_service = PostgresService()
+    def __init__(self, postgres_service: Optional[PostgresService] = None):
+        self.postgres_service = postgres_service or PostgresService()
         self.limites_de_compras_model = LimitesDeComprasModel()
     
     def get_all_limites(self) -> List[LimitesDeComprasModel]:
@@ -34,7 +34,7 @@ class LimitesDeComprasService():
     
     def insert_limite(self, id_categoria: int, limite_categoria: float) -> int:
         """Insere um novo limite de compra."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="limites_compras") as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     'INSERT INTO "limites_compras" ("id_categoria", "limite_categoria") VALUES (%s, %s) RETURNING "id_limite_compra"',
@@ -62,14 +62,14 @@ class LimitesDeComprasService():
         params.append(id_limite)
         query = f'UPDATE "limites_compras" SET {", ".join(updates)} WHERE "id_limite_compra" = %s'
         
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="limites_compras") as conn:
             with conn.cursor() as cur:
                 cur.execute(query, params)
                 return cur.rowcount > 0
     
     def delete_limite(self, id_limite: int) -> bool:
         """Deleta um limite."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="limites_compras") as conn:
             with conn.cursor() as cur:
                 cur.execute('DELETE FROM "limites_compras" WHERE "id_limite_compra" = %s', (id_limite,))
                 return cur.rowcount > 0
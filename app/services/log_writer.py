@@ -0,0 +1,224 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import atexit
+import os
+import queue
+import threading
+import time
+
+LogRecord = Tuple[Any, ...]
+
+OVERFLOW_DROP_NEW = "drop_new"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_SYNC = "sync"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_NEW, OVERFLOW_DROP_OLDEST, OVERFLOW_SYNC)
+
+
+class AsyncLogWriter:
+    """
+    Escritor de logs em segundo plano.
+
+    Os registros entram em uma fila em memória limitada e uma thread daemon
+    grava em lotes (insert multi-linha) quando o lote atinge `batch_size`
+    ou quando passam `flush_interval` segundos desde o primeiro registro pendente.
+
+    Política quando a fila está cheia (`overflow_policy`):
+    - drop_new: descarta o registro novo
+    - drop_oldest: descarta o registro mais antigo da fila
+    - sync: grava o registro novo de forma síncrona na thread chamadora
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[LogRecord]], None],
+        maxsize: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        overflow_policy: str = OVERFLOW_DROP_NEW,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Política de overflow inválida: {overflow_policy}")
+        self._write_batch = write_batch
+        self.maxsize = maxsize
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self._init_state()
+        atexit.register(self.shutdown)
+
+    def _init_state(self) -> None:
+        """(Re)inicializa fila e thread; usado na criação e após um fork"""
+        self._queue: "queue.Queue[Any]" = queue.Queue(self.maxsize)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._stopped = False
+        self._dropped = 0
+        self._written = 0
+        self._batches = 0
+        self._failed = 0
+
+    def _ensure_started(self) -> None:
+        """Inicia a thread de escrita no primeiro uso (e de novo após um fork)"""
+        if self._pid != os.getpid():
+            self._init_state()
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, record: LogRecord) -> bool:
+        """Enfileira um registro; retorna False se ele foi descartado"""
+        if self._stopped:
+            self._write([record])
+            return True
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            pass
+
+        if self.overflow_policy == OVERFLOW_SYNC:
+            self._write([record])
+            return True
+        if self.overflow_policy == OVERFLOW_DROP_OLDEST:
+            try:
+                self._queue.get_nowait()
+                self._queue.put_nowait(record)
+                with self._lock:
+                    self._dropped += 1
+                return True
+            except (queue.Empty, queue.Full):
+                pass
+        with self._lock:
+            self._dropped += 1
+        return False
+
+    def _write(self, batch: List[LogRecord]) -> None:
+        """Grava um lote sem deixar exceções escaparem"""
+        if not batch:
+            return
+        try:
+            self._write_batch(batch)
+            with self._lock:
+                self._written += len(batch)
+                self._batches += 1
+        except Exception as e:
+            with self._lock:
+                self._failed += len(batch)
+            print(f"Erro ao gravar lote de logs no banco: {e}")
+
+    def _run(self) -> None:
+        """Loop da thread: acumula registros e grava por tamanho ou por tempo"""
+        batch: List[LogRecord] = []
+        waiters: List[threading.Event] = []
+        deadline: Optional[float] = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, threading.Event):
+                # Pedido de flush: grava tudo o que estiver pendente
+                waiters.append(item)
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if len(batch) >= self.batch_size or due or waiters:
+                self._write(batch)
+                batch = []
+                deadline = None
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Bloqueia até os registros enfileirados até agora serem gravados"""
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Grava o que estiver pendente; registros posteriores passam a ser síncronos"""
+        if self._stopped:
+            return
+        self.flush(timeout)
+        self._stopped = True
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna profundidade da fila e contadores de registros"""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_maxsize": self.maxsize,
+                "written": self._written,
+                "batches": self._batches,
+                "dropped": self._dropped,
+                "failed": self._failed,
+            }
+
+
+class LogRateLimiter:
+    """
+    Limite de registros por ponto do código (janela fixa).
+
+    Cada chave (ex: arquivo + linha da chamada de log) pode gerar até
+    `per_window` registros a cada `window` segundos; os excedentes são
+    descartados e contados, e a quantidade suprimida é informada no próximo
+    registro permitido daquela chave. Guarda no máximo `max_keys` chaves.
+    """
+
+    def __init__(self, per_window: int = 30, window: float = 60.0, max_keys: int = 4096):
+        self.per_window = per_window
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # chave -> [início da janela, registros na janela, suprimidos ainda não informados]
+        self._windows: Dict[Any, List[float]] = {}
+        self._suppressed_total = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["LogRateLimiter"]:
+        """Cria o limitador a partir de LOG_RATE_LIMIT_PER_WINDOW (0 desativa) e LOG_RATE_LIMIT_WINDOW"""
+        per_window = int(os.getenv("LOG_RATE_LIMIT_PER_WINDOW", "30"))
+        if per_window <= 0:
+            return None
+        return cls(per_window=per_window, window=float(os.getenv("LOG_RATE_LIMIT_WINDOW", "60")))
+
+    def allow(self, key: Any) -> Tuple[bool, int]:
+        """Retorna se o registro pode ser gravado e quantos foram suprimidos antes dele"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None:
+                if len(self._windows) >= self.max_keys:
+                    self._windows.clear()
+                state = self._windows[key] = [now, 0, 0]
+            elif now - state[0] >= self.window:
+                state[0] = now
+                state[1] = 0
+            if state[1] >= self.per_window:
+                state[2] += 1
+                self._suppressed_total += 1
+                return False, 0
+            state[1] += 1
+            suppressed = int(state[2])
+            state[2] = 0
+            return True, suppressed
+
+    def stats(self) -> Dict[str, int]:
+        """Chaves acompanhadas e total de registros suprimidos"""
+        with self._lock:
+            return {"keys": len(self._windows), "suppressed": self._suppressed_total}
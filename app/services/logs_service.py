@@ -1,34 +1,52 @@
 from typing import Optional, List
 from datetime import datetime, timedelta
 import traceback as tb
-import inspect
-from app.models.logs_model import LogModel, LogCreateModel
+import os
+import random
+import sys
+import threading
+import psycopg2.extras
+from app.models.logs_model import LogModel
 from app.services.postgres_service import PostgresService
+from app.services.log_writer import AsyncLogWriter, LogRateLimiter, OVERFLOW_DROP_NEW
+from app.services.query_accounting import suppress_accounting
+
+# Ordem dos níveis para LOG_MIN_LEVEL
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
 
 
 class LogService:
     """Serviço para gerenciar logs no Supabase"""
     
-    def __init__(self):
-        self.postgres_service = PostgresService()
+    def __init__(self, postgres_service: Optional[PostgresService] = None):
+        self.postgres_service = postgres_service or PostgresService()
         self.table_name = "logs"
+        self._local = threading.local()
+        self.writer: Optional[AsyncLogWriter] = None
+        # Logs abaixo do nível mínimo retornam antes de qualquer trabalho (padrão: INFO)
+        self.min_level = LOG_LEVELS.get(os.getenv("LOG_MIN_LEVEL", "INFO").upper(), LOG_LEVELS["INFO"])
+        # Fração dos logs INFO/DEBUG que registram módulo/função/linha (WARNING+ sempre registram)
+        self.caller_sample_rate = float(os.getenv("LOG_CALLER_SAMPLE_RATE", "1.0"))
+        self.rate_limiter = LogRateLimiter.from_env()
+        if os.getenv("LOG_ASYNC_ENABLED", "true").lower() in ("1", "true", "yes"):
+            self.writer = AsyncLogWriter(
+                self._insert_logs,
+                maxsize=int(os.getenv("LOG_QUEUE_MAXSIZE", "10000")),
+                batch_size=int(os.getenv("LOG_BATCH_SIZE", "200")),
+                flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "1.0")),
+                overflow_policy=os.getenv("LOG_OVERFLOW_POLICY", OVERFLOW_DROP_NEW),
+            )
     
-    def _get_caller_info(self):
-        """Obtém informações sobre quem chamou o log"""
-        try:
-            # Pega o frame 3 níveis acima (0=aqui, 1=método de log, 2=método público)
-            frame = inspect.currentframe()
-            if frame:
-                caller_frame = frame.f_back.f_back.f_back
-                if caller_frame:
-                    return {
-                        'modulo': caller_frame.f_globals.get('__name__', 'unknown'),
-                        'funcao': caller_frame.f_code.co_name,
-                        'linha': caller_frame.f_lineno
-                    }
-        except Exception:
-            pass
-        return {'modulo': None, 'funcao': None, 'linha': None}
+    @staticmethod
+    def _get_caller_info(frame) -> dict:
+        """Módulo, função e linha de quem chamou o log (a partir do frame da chamada)"""
+        if frame is None:
+            return {'modulo': None, 'funcao': None, 'linha': None}
+        return {
+            'modulo': frame.f_globals.get('__name__', 'unknown'),
+            'funcao': frame.f_code.co_name,
+            'linha': frame.f_lineno
+        }
     
     def _salvar_log(
         self,
@@ -37,75 +55,135 @@ class LogService:
         include_traceback: bool = False,
         modulo: Optional[str] = None,
         funcao: Optional[str] = None,
-        linha: Optional[int] = None
+        linha: Optional[int] = None,
+        sync: bool = False
     ):
-        """Método interno para salvar log no banco"""
+        """Método interno para salvar log no banco.
+        Por padrão o registro vai para a fila do escritor em segundo plano;
+        com sync=True (ou fila desativada) é gravado na hora e retorna o id.
+        O nível mínimo (LOG_MIN_LEVEL) é verificado antes, nos métodos públicos."""
         try:
-            # Se não fornecidos, buscar info do chamador
+            # Frame de quem chamou o método público (0=aqui, 1=método de log, 2=chamador)
+            try:
+                frame = sys._getframe(2)
+            except ValueError:
+                frame = None
+            
+            detalhado = LOG_LEVELS[nivel] >= LOG_LEVELS["WARNING"]
+            if not detalhado and self.rate_limiter is not None:
+                # INFO/DEBUG de alto volume: limite por ponto do código que gerou o log
+                key = (frame.f_code, frame.f_lineno) if frame is not None else mensagem[:40]
+                allowed, suprimidas = self.rate_limiter.allow(key)
+                if not allowed:
+                    return None
+                if suprimidas:
+                    mensagem = f"{mensagem} (+{suprimidas} mensagens semelhantes suprimidas)"
+            
+            # Evita recursão quando a própria gravação de log gera um log de erro
+            if getattr(self._local, "writing", False):
+                return None
+            
+            # Informação do chamador: sempre em WARNING+, amostrada em INFO/DEBUG
             if modulo is None or funcao is None or linha is None:
-                caller_info = self._get_caller_info()
-                modulo = modulo or caller_info['modulo']
-                funcao = funcao or caller_info['funcao']
-                linha = linha or caller_info['linha']
+                if detalhado or self.caller_sample_rate >= 1 or random.random() < self.caller_sample_rate:
+                    caller_info = self._get_caller_info(frame)
+                    modulo = modulo or caller_info['modulo']
+                    funcao = funcao or caller_info['funcao']
+                    linha = linha or caller_info['linha']
             
             traceback_str = None
             if include_traceback:
                 traceback_str = tb.format_exc()
             
-            log_data = LogCreateModel(
-                nivel=nivel,
-                mensagem=mensagem,
-                modulo=modulo,
-                funcao=funcao,
-                linha=linha,
-                traceback=traceback_str
+            # Mesmos campos de LogCreateModel, sem o custo de validar um modelo por registro
+            record = (
+                nivel,
+                str(mensagem),
+                modulo,
+                funcao,
+                linha,
+                traceback_str,
+                datetime.now()
             )
             
-            with self.postgres_service.get_connection() as conn:
+            if sync or self.writer is None:
+                ids = self._insert_logs([record])
+                return ids[0] if ids else None
+            
+            self.writer.submit(record)
+            return None
+        except Exception as e:
+            # Se falhar ao salvar no banco, não gerar erro para não quebrar a aplicação
+            print(f"Erro ao salvar log no banco: {e}")
+            return None
+    
+    def _insert_logs(self, records: List[tuple]) -> List[int]:
+        """Grava um lote de logs com um único INSERT multi-linha"""
+        self._local.writing = True
+        try:
+            # A gravação de logs não entra na contagem de consultas do request
+            with suppress_accounting(), self.postgres_service.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute(
+                rows = psycopg2.extras.execute_values(
+                    cursor,
                     f"""
                     INSERT INTO {self.table_name} 
                     (nivel, mensagem, modulo, funcao, linha, traceback, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    VALUES %s
                     RETURNING id
                     """,
-                    (
-                        log_data.nivel,
-                        log_data.mensagem,
-                        log_data.modulo,
-                        log_data.funcao,
-                        log_data.linha,
-                        log_data.traceback,
-                        datetime.now()
-                    )
+                    records,
+                    page_size=max(len(records), 1),
+                    fetch=True
                 )
-                result = cursor.fetchone()
-                return result['id'] if result else None
-        except Exception as e:
-            # Se falhar ao salvar no banco, não gerar erro para não quebrar a aplicação
-            print(f"Erro ao salvar log no banco: {e}")
-            return None
+                return [row['id'] if isinstance(row, dict) else row[0] for row in rows]
+        finally:
+            self._local.writing = False
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Aguarda a gravação dos logs que estão na fila"""
+        return self.writer.flush(timeout) if self.writer else True
+    
+    def shutdown(self, timeout: float = 5.0):
+        """Grava os logs pendentes antes do processo encerrar"""
+        if self.writer:
+            self.writer.shutdown(timeout)
+    
+    def queue_stats(self) -> dict:
+        """Estatísticas da fila de logs (profundidade, descartados, gravados)"""
+        return self.writer.stats() if self.writer else {}
+    
+    def is_enabled(self, nivel: str) -> bool:
+        """Indica se o nível passa pelo LOG_MIN_LEVEL (útil para evitar montar mensagens caras)"""
+        return LOG_LEVELS[nivel] >= self.min_level
     
     def error(self, mensagem: str, exc_info: bool = False):
         """Registra um log de erro"""
+        if self.min_level > LOG_LEVELS["ERROR"]:
+            return None
         return self._salvar_log("ERROR", mensagem, include_traceback=exc_info)
     
     def info(self, mensagem: str):
         """Registra um log de informação"""
+        if self.min_level > LOG_LEVELS["INFO"]:
+            return None
         return self._salvar_log("INFO", mensagem)
     
     def warning(self, mensagem: str):
         """Registra um log de aviso"""
+        if self.min_level > LOG_LEVELS["WARNING"]:
+            return None
         return self._salvar_log("WARNING", mensagem)
     
     def debug(self, mensagem: str):
         """Registra um log de debug"""
+        if self.min_level > LOG_LEVELS["DEBUG"]:
+            return None
         return self._salvar_log("DEBUG", mensagem)
     
     def critical(self, mensagem: str, exc_info: bool = False):
-        """Registra um log crítico"""
-        return self._salvar_log("CRITICAL", mensagem, include_traceback=exc_info)
+        """Registra um log crítico (sempre gravado de forma síncrona)"""
+        return self._salvar_log("CRITICAL", mensagem, include_traceback=exc_info, sync=True)
 
 # Instância global do serviço de log
 log_service = LogService()
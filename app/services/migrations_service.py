@@ -0,0 +1,87 @@
+from typing import List, Optional, Set, Tuple
+from datetime import datetime
+import os
+from app.services.postgres_service import PostgresService
+from app.services.logs_service import log_service
+
+# Diretório padrão com os arquivos NNNN_descricao.sql
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+# Chave do advisory lock que impede dois workers de migrarem ao mesmo tempo
+_MIGRATIONS_LOCK_KEY = 7310402
+
+
+class MigrationsService:
+    """Aplica as migrações SQL de app/migrations em ordem, registrando cada uma em migracoes_aplicadas"""
+
+    def __init__(self, postgres_service: Optional[PostgresService] = None, migrations_dir: str = MIGRATIONS_DIR):
+        self.postgres_service = postgres_service or PostgresService()
+        self.migrations_dir = migrations_dir
+        self.table_name = "migracoes_aplicadas"
+
+    def _ensure_table(self) -> None:
+        """Cria a tabela de controle de migrações se ainda não existir"""
+        with self.postgres_service.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self.table_name} (
+                        versao TEXT PRIMARY KEY,
+                        nome TEXT NOT NULL,
+                        aplicada_em TIMESTAMP NOT NULL
+                    )
+                """)
+
+    def available(self) -> List[Tuple[str, str]]:
+        """Lista as migrações disponíveis como (versao, arquivo), em ordem"""
+        if not os.path.isdir(self.migrations_dir):
+            return []
+        migrations = []
+        for file_name in sorted(os.listdir(self.migrations_dir)):
+            if file_name.endswith(".sql"):
+                migrations.append((file_name.split("_", 1)[0], file_name))
+        return migrations
+
+    def applied(self) -> Set[str]:
+        """Retorna as versões já aplicadas"""
+        self._ensure_table()
+        with self.postgres_service.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT versao FROM {self.table_name}")
+                return {row["versao"] for row in cur.fetchall()}
+
+    def pending(self) -> List[Tuple[str, str]]:
+        """Retorna as migrações ainda não aplicadas"""
+        applied = self.applied()
+        return [(versao, nome) for versao, nome in self.available() if versao not in applied]
+
+    def apply_pending(self) -> List[str]:
+        """Aplica as migrações pendentes, cada uma em sua própria transação.
+
+        Returns:
+            List[str]: Arquivos aplicados nesta execução
+        """
+        self._ensure_table()
+        aplicadas = []
+        for versao, nome in self.available():
+            with open(os.path.join(self.migrations_dir, nome), encoding="utf-8") as f:
+                sql = f.read()
+            with self.postgres_service.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_advisory_xact_lock(%s)", (_MIGRATIONS_LOCK_KEY,))
+                    cur.execute(f"SELECT 1 FROM {self.table_name} WHERE versao = %s", (versao,))
+                    if cur.fetchone():
+                        continue
+                    cur.execute(sql)
+                    cur.execute(
+                        f"INSERT INTO {self.table_name} (versao, nome, aplicada_em) VALUES (%s, %s, %s)",
+                        (versao, nome, datetime.now())
+                    )
+            aplicadas.append(nome)
+            log_service.info(f"Migração aplicada: {nome}")
+        return aplicadas
+
+
+if __name__ == "__main__":
+    # Uso: python -m app.services.migrations_service
+    for migration in MigrationsService().apply_pending() or ["nenhuma migração pendente"]:
+        print(migration)
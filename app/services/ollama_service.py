@@ -2,14 +2,16 @@ from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain.agents import create_tool_calling_agent, AgentExecutor
-from app.tools.tools import gcp_tool, insert_gcp_tool, datetime_tool
+from app.tools.tools import agent_tools
+from app.core.metrics import agent_parse_failures
 
 class OllamaService:
-    def __init__(self, chat_prompt, parser):
-        self.llm = ChatOllama(model="llama3.1")
+    def __init__(self, chat_prompt, parser, llm=None):
+        # `llm` permite injetar outro modelo (ex: FakeChatModel em testes de carga)
+        self.llm = llm or ChatOllama(model="llama3.1")
         self.chat_prompt = chat_prompt
         self.parser = PydanticOutputParser(pydantic_object=parser)
-        self.tools = [gcp_tool, insert_gcp_tool, datetime_tool]
+        self.tools = list(agent_tools)
         self.prompt = self.init_prompt()
         agent = create_tool_calling_agent(llm=self.llm, prompt=self.prompt, tools=self.tools)
         self.agent_executor = AgentExecutor(agent=agent, tools=self.tools, verbose=True, return_intermediate_steps=True)
@@ -30,5 +32,6 @@ class OllamaService:
         try:
             return self.parser.parse(raw_response["output"])
         except Exception as e:
+            agent_parse_failures.inc()
             print(f"Error parsing response: {e}")
             return None
\ No newline at end of file
@@ -1,20 +1,83 @@
+import time
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from app.tools.tools import datetime_tool, welcome_tool, bancos_tool, cartoes_tool, faturas_pendentes_tool, analyze_faturas_tool, entradas_tool, saidas_tool, balance_tool, compras_categoria_tool, insert_compra_tool, categorias_tool
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain.agents import create_tool_calling_agent
+from app.tools.tools import agent_tools, read_only_tools
+from app.services.parallel_agent_executor import ParallelAgentExecutor
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.fake_chat_model import ChatSessionRecorder
+from app.services.data_versions import data_versions
 from app.services.logs_service import log_service
+from app.core.metrics import agent_parse_failures, llm_call_duration, llm_calls, llm_tokens
+from app.core.tracing import current_span, traced, tracer
+
+
+class LLMInstrumentationCallback(BaseCallbackHandler):
+    """Callback que mede cada chamada ao modelo: métricas (latência, tokens) e span do trace"""
+
+    def __init__(self):
+        self._calls = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or params.get("_type") or "unknown"
+        span = tracer.start_span("llm.chat", model=model, messages=len(messages[0]) if messages else 0)
+        self._calls[run_id] = (model, span, time.perf_counter())
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs):
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        model, span, started = call
+        llm_call_duration.observe(time.perf_counter() - started, model)
+        llm_calls.inc(model, "ok")
+        generation = response.generations[0][0] if response.generations and response.generations[0] else None
+        message = getattr(generation, "message", None)
+        usage = getattr(message, "usage_metadata", None) or {}
+        if usage:
+            llm_tokens.inc(model, "input", amount=usage.get("input_tokens") or 0)
+            llm_tokens.inc(model, "output", amount=usage.get("output_tokens") or 0)
+            span.set_attribute("input_tokens", usage.get("input_tokens"))
+            span.set_attribute("output_tokens", usage.get("output_tokens"))
+        span.set_attribute("tool_calls", len(getattr(message, "tool_calls", None) or []))
+        span.end()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        call = self._calls.pop(run_id, None)
+        if call is None:
+            return
+        model, span, started = call
+        llm_call_duration.observe(time.perf_counter() - started, model)
+        llm_calls.inc(model, "error")
+        span.set_error(error)
+        span.end()
 
 
 class OpenAIService:
-    def __init__(self, chat_prompt, parser):
-        self.llm = ChatOpenAI(model="gpt-4.1", temperature=0.1)
+    def __init__(self, chat_prompt, parser, answer_cache=None, llm=None):
+        # `llm` permite injetar outro modelo (ex: FakeChatModel em testes de carga)
+        self.llm = llm or ChatOpenAI(model="gpt-4.1", temperature=0.1)
         self.chat_prompt = chat_prompt
         self.parser = PydanticOutputParser(pydantic_object=parser)
-        self.tools = [datetime_tool, welcome_tool, bancos_tool, cartoes_tool, faturas_pendentes_tool, analyze_faturas_tool, entradas_tool, saidas_tool, balance_tool, categorias_tool, compras_categoria_tool, insert_compra_tool]
+        self.tools = list(agent_tools)
+        self.tools_by_name = {tool.name: tool for tool in self.tools}
+        self.answer_cache = answer_cache or SemanticAnswerCache.from_env()
+        # Com LLM_RECORD_FILE as respostas do modelo são gravadas em JSONL para replay
+        recorder = ChatSessionRecorder.from_env()
+        self.callbacks = [recorder] if recorder else []
+        self.callbacks.append(LLMInstrumentationCallback())
         self.prompt = self.init_prompt()
         agent = create_tool_calling_agent(llm=self.llm, prompt=self.prompt, tools=self.tools)
-        self.agent_executor = AgentExecutor(agent=agent, tools=self.tools, verbose=True, return_intermediate_steps=True)
+        self.agent_executor = ParallelAgentExecutor.from_env(
+            agent=agent,
+            tools=self.tools,
+            verbose=True,
+            return_intermediate_steps=True,
+            read_only_tools=frozenset(tool.name for tool in read_only_tools),
+        )
 
     def init_prompt(self):
         prompt = ChatPromptTemplate.from_messages(
@@ -27,6 +90,7 @@ class OpenAIService:
         
         return prompt
 
+    @traced("agent.run")
     def run(self, query: str, chat_history: list):
         """Executa o agente e retorna a resposta.
         
@@ -37,9 +101,45 @@ class OpenAIService:
         Returns:
             ResearchResponse ou None em caso de erro
         """
-        raw_response = self.agent_executor.invoke({"query": query, "chat_history": chat_history})
+        cached = self.answer_cache.lookup(query, chat_history)
+        current_span().set_attribute("answer_cache_hit", cached is not None)
+        if cached is not None:
+            return cached
+
+        # Versões lidas antes de rodar: uma escrita concorrente torna a resposta obsoleta
+        versions = data_versions.all()
+        with tracer.span("agent.invoke") as span:
+            raw_response = self.agent_executor.invoke(
+                {"query": query, "chat_history": chat_history},
+                config={"callbacks": self.callbacks},
+            )
+            if span.recording:
+                span.set_attribute("tools", [action.tool for action, _ in raw_response.get("intermediate_steps", [])])
         try:
-            return self.parser.parse(raw_response["output"])
+            with tracer.span("agent.parse"):
+                response = self.parser.parse(raw_response["output"])
         except Exception as e:
+            agent_parse_failures.inc()
             log_service.error(f"Erro ao parsear resposta do OpenAI: {e}", exc_info=True)
-            return None
\ No newline at end of file
+            return None
+
+        tables = self._tables_used(raw_response.get("intermediate_steps", []))
+        if tables:
+            self.answer_cache.store(query, response, tables, versions, chat_history)
+        return response
+
+    def _tables_used(self, intermediate_steps: list):
+        """Tabelas lidas pelas tools executadas; None se alguma tool não puder ter a resposta reaproveitada.
+
+        Só tools com `cache_tables` (leituras cacheáveis, ver cached_tool) entram;
+        escrita, data/hora ou boas-vindas tornam a resposta não cacheável.
+        """
+        tables = set()
+        for action, _ in intermediate_steps:
+            tool = self.tools_by_name.get(action.tool)
+            func = getattr(tool.func, "func", tool.func) if tool is not None else None
+            cache_tables = getattr(func, "cache_tables", None)
+            if not cache_tables:
+                return None
+            tables.update(cache_tables)
+        return sorted(tables) or None
\ No newline at end of file
@@ -0,0 +1,89 @@
+from typing import Any, Dict, List, Optional
+from abc import ABC, abstractmethod
+import os
+import threading
+
+# Limite de caracteres por mensagem do WhatsApp via Twilio
+TWILIO_MAX_BODY_CHARS = 1600
+
+
+def split_body(body: str, max_chars: int = TWILIO_MAX_BODY_CHARS) -> List[str]:
+    """Divide um texto longo em partes de até `max_chars`, preferindo quebras de linha"""
+    parts = []
+    while len(body) > max_chars:
+        cut = body.rfind("\n", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        parts.append(body[:cut])
+        body = body[cut:].lstrip("\n")
+    if body:
+        parts.append(body)
+    return parts
+
+
+class OutboundSender(ABC):
+    """Envia a resposta do agente para o usuário fora do ciclo do webhook"""
+
+    @abstractmethod
+    def send(self, numero_telefone: str, body: str) -> None:
+        """Envia `body` para `numero_telefone`"""
+
+
+class TwilioOutboundSender(OutboundSender):
+    """Envio pela API REST do Twilio (produção)"""
+
+    def __init__(self, account_sid: Optional[str] = None, auth_token: Optional[str] = None,
+                 from_number: Optional[str] = None):
+        self.account_sid = account_sid or os.getenv("TWILIO_ACCOUNT_SID")
+        self.auth_token = auth_token or os.getenv("TWILIO_AUTH_TOKEN")
+        self.from_number = from_number or os.getenv("TWILIO_WHATSAPP_FROM")
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    def _get_client(self) -> Any:
+        """Cria o cliente REST no primeiro envio"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    if not (self.account_sid and self.auth_token and self.from_number):
+                        raise ValueError(
+                            "TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN e TWILIO_WHATSAPP_FROM "
+                            "são obrigatórios para o envio assíncrono"
+                        )
+                    from twilio.rest import Client
+                    self._client = Client(self.account_sid, self.auth_token)
+        return self._client
+
+    def send(self, numero_telefone: str, body: str) -> None:
+        """Envia a resposta, dividida em partes se passar do limite do Twilio"""
+        client = self._get_client()
+        for part in split_body(body):
+            client.messages.create(to=numero_telefone, from_=self.from_number, body=part)
+
+
+class InMemoryOutboundSender(OutboundSender):
+    """Guarda as mensagens em memória em vez de enviá-las (testes e benchmarks)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent: List[Dict[str, str]] = []
+
+    def send(self, numero_telefone: str, body: str) -> None:
+        """Registra a mensagem enviada"""
+        with self._lock:
+            self.sent.append({"to": numero_telefone, "body": body})
+
+    def clear(self) -> None:
+        """Descarta as mensagens registradas"""
+        with self._lock:
+            self.sent.clear()
+
+
+def outbound_sender_from_env() -> OutboundSender:
+    """Escolhe o sender pela variável OUTBOUND_SENDER (twilio | memory)"""
+    kind = os.getenv("OUTBOUND_SENDER", "twilio").lower()
+    if kind == "memory":
+        return InMemoryOutboundSender()
+    if kind == "twilio":
+        return TwilioOutboundSender()
+    raise ValueError(f"OUTBOUND_SENDER inválido: {kind}")
@@ -0,0 +1,111 @@
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+import contextvars
+import os
+import threading
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentFinish, AgentStep
+from langchain_core.callbacks import CallbackManagerForChainRun
+from langchain_core.tools import BaseTool
+
+# Estado do passo em andamento, por thread (o executor é compartilhado entre requisições)
+_step_state = threading.local()
+
+_pool_lock = threading.Lock()
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_pid: Optional[int] = None
+
+
+def _get_tool_pool(max_workers: int) -> ThreadPoolExecutor:
+    """Pool de threads compartilhado para as tools, criado no primeiro uso (e de novo após um fork)"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-tool")
+                _pool_pid = os.getpid()
+    return _pool
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor que executa em paralelo as tools de leitura de um mesmo passo.
+
+    Quando o modelo pede várias tools no mesmo passo (ex: GetEntradasInfo +
+    GetSaidasInfo + GetFaturasPendentes), cada sequência contígua de tools em
+    `read_only_tools` é enviada junta para um pool limitado (`max_workers`).
+    Tools de escrita (ex: InsertCompraCartao) rodam sozinhas, na thread do
+    agente, depois que as anteriores terminaram; as leituras pedidas depois de
+    uma escrita só começam quando ela termina. Os resultados voltam na ordem em
+    que o modelo pediu as tools.
+    """
+
+    read_only_tools: FrozenSet[str] = frozenset()
+    max_workers: int = 4
+
+    def _iter_next_step(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        inputs: Dict[str, str],
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Iterator[Union[AgentFinish, AgentAction, AgentStep]]:
+        """Registra as ações pedidas no passo antes de o AgentExecutor executá-las"""
+        actions: List[AgentAction] = []
+        _step_state.actions = actions
+        _step_state.futures = {}
+        try:
+            for item in super()._iter_next_step(
+                name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+            ):
+                if isinstance(item, AgentAction):
+                    actions.append(item)
+                yield item
+        finally:
+            _step_state.actions = None
+            _step_state.futures = {}
+
+    def _perform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> AgentStep:
+        """Executa a ação, disparando junto as próximas ações de leitura do passo"""
+        perform = super()._perform_agent_action
+        actions: Optional[List[AgentAction]] = getattr(_step_state, "actions", None)
+        futures: Dict[int, "Future[AgentStep]"] = getattr(_step_state, "futures", {})
+
+        future = futures.pop(id(agent_action), None)
+        if future is None and actions and agent_action.tool in self.read_only_tools:
+            start = next((i for i, a in enumerate(actions) if a is agent_action), None)
+            batch: List[AgentAction] = []
+            if start is not None:
+                for action in actions[start:]:
+                    if action.tool not in self.read_only_tools:
+                        break
+                    batch.append(action)
+            if len(batch) > 1:
+                pool = _get_tool_pool(self.max_workers)
+                for action in batch:
+                    # Cada tool roda com uma cópia do contexto (contextvars) da thread do agente
+                    ctx = contextvars.copy_context()
+                    futures[id(action)] = pool.submit(
+                        ctx.run, perform, name_to_tool_map, color_mapping, action, run_manager
+                    )
+                future = futures.pop(id(agent_action))
+
+        if future is not None:
+            return future.result()
+        return perform(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> AgentExecutor:
+        """Cria o executor paralelo, ou um AgentExecutor comum se TOOLS_PARALLEL_ENABLED=false"""
+        if os.getenv("TOOLS_PARALLEL_ENABLED", "true").lower() not in ("1", "true", "yes"):
+            kwargs.pop("read_only_tools", None)
+            return AgentExecutor(**kwargs)
+        kwargs.setdefault("max_workers", int(os.getenv("TOOLS_PARALLEL_MAX_WORKERS", "4")))
+        return cls(**kwargs)
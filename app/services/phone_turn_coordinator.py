@@ -0,0 +1,198 @@
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime
+import os
+import threading
+import time
+from app.core.config import log_error_to_file
+
+# Separador usado ao juntar mensagens enfileiradas em um único turno
+SEPARADOR_MENSAGENS = "\n"
+
+
+class PhoneBusyError(Exception):
+    """A mensagem esperou mais que o limite pela vez do telefone"""
+
+
+class _PendingTurn:
+    """Mensagem aguardando sua vez de ser processada"""
+
+    __slots__ = ("mensagem", "recebida_em", "done", "resposta", "error")
+
+    def __init__(self, mensagem: str, recebida_em: datetime):
+        self.mensagem = mensagem
+        self.recebida_em = recebida_em
+        self.done = False
+        self.resposta: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class _PhoneState:
+    """Fila de turnos de um telefone"""
+
+    __slots__ = ("pending", "running")
+
+    def __init__(self):
+        self.pending: List[_PendingTurn] = []
+        self.running = False
+
+
+class PhoneTurnCoordinator:
+    """
+    Serializa os turnos por telefone.
+
+    Turnos do mesmo `numero_telefone` são processados um de cada vez e na ordem
+    de chegada, então cada um lê o histórico já com o turno anterior salvo;
+    telefones diferentes continuam rodando em paralelo.
+
+    - `submit` (webhook síncrono): a requisição espera a vez do telefone por no
+      máximo `wait_timeout` segundos; depois disso sai da fila com PhoneBusyError.
+    - `submit_nowait` (workers do modo assíncrono): nunca espera. Se o telefone
+      já tem um turno em andamento, a mensagem fica na fila dele e o worker que
+      está processando o telefone executa os próximos turnos ao terminar; o
+      worker que chamou fica livre para outros telefones.
+
+    Com `coalesce=True`, as mensagens que chegaram enquanto um turno estava em
+    andamento são juntadas em uma única execução do agente: a requisição mais
+    antiga recebe a resposta e as demais recebem None (já respondidas). Se o
+    turno falhar, todas as requisições juntadas recebem o erro.
+    """
+
+    def __init__(self, coalesce: bool = False, wait_timeout: float = 10.0):
+        self.coalesce = coalesce
+        self.wait_timeout = wait_timeout
+        self._cond = threading.Condition()
+        self._phones: Dict[str, _PhoneState] = {}
+
+    @classmethod
+    def from_env(cls) -> "PhoneTurnCoordinator":
+        """Cria o coordenador a partir das variáveis TURN_COALESCE_ENABLED e TURN_WAIT_TIMEOUT"""
+        return cls(
+            coalesce=os.getenv("TURN_COALESCE_ENABLED", "false").lower() in ("1", "true", "yes"),
+            # Abaixo do timeout de 15 s do webhook do Twilio
+            wait_timeout=float(os.getenv("TURN_WAIT_TIMEOUT", "10")),
+        )
+
+    def _enqueue(self, numero_telefone: str, turn: _PendingTurn) -> _PhoneState:
+        """Coloca o turno na fila do telefone (com o lock adquirido)"""
+        state = self._phones.get(numero_telefone)
+        if state is None:
+            state = self._phones[numero_telefone] = _PhoneState()
+        state.pending.append(turn)
+        return state
+
+    def _take_batch(self, state: _PhoneState) -> List[_PendingTurn]:
+        """Retira da fila os turnos da próxima execução (com o lock adquirido)"""
+        state.running = True
+        batch = list(state.pending) if self.coalesce else state.pending[:1]
+        del state.pending[:len(batch)]
+        return batch
+
+    def _run_batch(self, numero_telefone: str, batch: List[_PendingTurn],
+                   handler: Callable[[str, str, datetime], str]) -> Optional[str]:
+        """Executa o turno e marca as mensagens juntadas com a resposta ou o erro"""
+        resposta: Optional[str] = None
+        error: Optional[BaseException] = None
+        try:
+            merged = SEPARADOR_MENSAGENS.join(t.mensagem for t in batch)
+            resposta = handler(numero_telefone, merged, batch[0].recebida_em)
+            return resposta
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with self._cond:
+                for t in batch:
+                    t.done = True
+                    t.error = error
+                batch[0].resposta = resposta
+                self._cond.notify_all()
+
+    def _release(self, numero_telefone: str, state: _PhoneState) -> None:
+        """Libera o telefone para o próximo turno (com o lock adquirido)"""
+        state.running = False
+        if not state.pending:
+            self._phones.pop(numero_telefone, None)
+        self._cond.notify_all()
+
+    def submit(self, numero_telefone: str, mensagem: str, recebida_em: Optional[datetime],
+               handler: Callable[[str, str, datetime], str]) -> Optional[str]:
+        """Processa a mensagem na vez dela (na thread que chamou) e retorna a resposta.
+
+        Retorna None quando a mensagem foi juntada ao turno de outra requisição;
+        levanta PhoneBusyError se a vez não chegou em `wait_timeout` segundos e
+        o erro do turno quando a mensagem foi juntada a um turno que falhou.
+        """
+        turn = _PendingTurn(mensagem, recebida_em or datetime.now())
+        deadline = time.monotonic() + self.wait_timeout
+        with self._cond:
+            state = self._enqueue(numero_telefone, turn)
+            # Espera até a mensagem ser respondida por outro turno ou chegar à frente da fila
+            while not turn.done and (state.running or state.pending[0] is not turn):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    if turn not in state.pending:
+                        # Já foi juntada ao turno em andamento: a resposta sai por ele
+                        return None
+                    state.pending.remove(turn)
+                    if not state.pending and not state.running:
+                        self._phones.pop(numero_telefone, None)
+                    self._cond.notify_all()
+                    raise PhoneBusyError(f"Turno anterior de {numero_telefone} ainda em andamento")
+                self._cond.wait(remaining)
+            if turn.done:
+                if turn.error is not None:
+                    raise turn.error
+                return turn.resposta
+            batch = self._take_batch(state)
+
+        try:
+            return self._run_batch(numero_telefone, batch, handler)
+        finally:
+            with self._cond:
+                self._release(numero_telefone, state)
+
+    def submit_nowait(self, numero_telefone: str, mensagem: str, recebida_em: Optional[datetime],
+                      handler: Callable[[str, str, datetime], str],
+                      deliver: Callable[[str, str], Any]) -> bool:
+        """Processa a mensagem sem esperar a vez do telefone; as respostas saem por `deliver`.
+
+        Se outro worker já processa o telefone, só enfileira e retorna False (aquele
+        worker executa o turno). Caso contrário executa este turno e os que chegarem
+        para o telefone enquanto isso, e retorna True. Erros de um turno são
+        registrados e não impedem os seguintes.
+        """
+        turn = _PendingTurn(mensagem, recebida_em or datetime.now())
+        with self._cond:
+            state = self._enqueue(numero_telefone, turn)
+            if state.running:
+                return False
+            batch = self._take_batch(state)
+
+        try:
+            while True:
+                try:
+                    resposta = self._run_batch(numero_telefone, batch, handler)
+                    if resposta:
+                        deliver(numero_telefone, resposta)
+                except Exception as e:
+                    log_error_to_file(e)
+                with self._cond:
+                    # Verifica a fila e libera o telefone sob o mesmo lock: uma mensagem
+                    # que chegar depois já encontra running=False e é executada por quem chamou
+                    if not state.pending:
+                        self._release(numero_telefone, state)
+                        return True
+                    batch = self._take_batch(state)
+        except BaseException:
+            with self._cond:
+                self._release(numero_telefone, state)
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        """Telefones com turno em andamento e mensagens aguardando"""
+        with self._cond:
+            return {
+                "phones": len(self._phones),
+                "running": sum(1 for s in self._phones.values() if s.running),
+                "waiting": sum(len(s.pending) for s in self._phones.values()),
+            }
@@ -1,9 +1,12 @@
-from typing import Dict
-import psycopg2
-import psycopg2.extras 
+from typing import Any, Dict, Optional, Tuple
 from contextlib import contextmanager
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from app.services.connection_pool import get_pool, pool_stats
+from app.services.data_versions import data_versions
+from app.core.tracing import tracer
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -17,85 +20,162 @@ def get_log_service():
         # Fallback para não quebrar durante inicialização
         return None
 
+REQUIRED_TABLES = [
+    "bancos",
+    "cartoes_de_credito",
+    "entradas",
+    "saidas_frequentes",
+    "categorias_de_compras",
+    "faturas_cartoes_de_credito",
+]
+
+# Tempo (segundos) que o status das tabelas obrigatórias fica em cache
+TABLES_STATUS_TTL = float(os.getenv("SETUP_STATUS_TTL", "300"))
+
+_tables_status_lock = threading.Lock()
+_resolved_tables: Optional[Dict[str, Optional[str]]] = None
+_tables_status_cache: Optional[Tuple[float, Dict[str, int]]] = None
+
 class PostgresService:
     """Serviço para interações com PostgreSQL seguindo o modelo ConfigAccountModel"""
     
     def __init__(self):
         self.database_url = os.getenv("DATABASE_URL")
-        self._connection = None
-        
-    def _ensure_connection(self):
+    
+    @contextmanager
+    def get_connection(self, changed_table: Optional[str] = None):
         """
-        Garante que existe uma conexão ativa. Cria uma nova se necessário.
+        Context manager para conexões com o banco.
+        Empresta uma conexão do pool compartilhado do processo e a devolve ao final,
+        com commit em caso de sucesso e rollback em caso de erro.
         Usa RealDictCursor para retornar resultados como dicionários.
+        
+        Args:
+            changed_table: tabela alterada neste bloco; após o commit os caches
+                que dependem dela são invalidados (ver notify_table_changed)
         """
-        if self._connection is None or self._connection.closed:
-            self._connection = psycopg2.connect(
-                self.database_url,
-                cursor_factory=psycopg2.extras.RealDictCursor
-            )
-        return self._connection
+        pool = get_pool(self.database_url)
+        error = None
+        with tracer.span("db.connection") as span:
+            if changed_table:
+                span.set_attribute("changed_table", changed_table)
+            checkout_started = time.perf_counter()
+            try:
+                conn = pool.getconn()
+            except Exception as e:
+                self._log_connection_error(e)
+                raise
+            span.set_attribute("checkout_ms", round((time.perf_counter() - checkout_started) * 1000, 3))
+            try:
+                yield conn
+                conn.commit()
+                if changed_table:
+                    self.notify_table_changed(changed_table)
+            except Exception as e:
+                error = e
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                raise
+            finally:
+                pool.putconn(conn, discard=bool(conn.closed))
+                # Loga só depois de devolver a conexão para não segurar duas ao mesmo tempo
+                if error is not None:
+                    self._log_connection_error(error)
     
-    @contextmanager
-    def get_connection(self):
-        """Context manager para conexões com o banco - reutiliza conexão existente"""
-        conn = None
-        try:
-            conn = self._ensure_connection()
-            yield conn
-            conn.commit()
-        except Exception as e:
-            if conn:
-                conn.rollback()
-            log_svc = get_log_service()
-            if log_svc:
-                log_svc.error(f"Erro na conexão com o banco: {e}", exc_info=True)
-            raise
+    def _log_connection_error(self, error: Exception):
+        """Registra erro de banco no serviço de logs, se disponível"""
+        log_svc = get_log_service()
+        if log_svc:
+            log_svc.error(f"Erro na conexão com o banco: {error}", exc_info=True)
     
     def close(self):
-        """Fecha a conexão manualmente quando necessário"""
-        if self._connection and not self._connection.closed:
-            self._connection.close()
-            self._connection = None
+        """Mantido por compatibilidade: as conexões são devolvidas ao pool automaticamente.
+        Use close_pool() para encerrar o pool do processo."""
+        return None
+    
+    @staticmethod
+    def pool_stats() -> Dict[str, Any]:
+        """Estatísticas do pool de conexões (em uso, aguardando, latência de checkout)"""
+        return pool_stats()
     
-    def _count_rows_for_table(self, table_name: str) -> int:
-        """Conta linhas em uma tabela, tentando nomes não-aspados e aspados.
-        Retorna -1 se a tabela não existir em ambos os casos.
+    def resolve_table_names(self, refresh: bool = False) -> Dict[str, Optional[str]]:
+        """Resolve uma única vez por processo o identificador SQL de cada tabela obrigatória.
+        Tenta o nome sem aspas (tabelas criadas sem aspas viram minúsculas) e depois com aspas.
+        Tabelas ausentes ficam como None e são resolvidas de novo na próxima verificação.
         """
+        global _resolved_tables
+        with _tables_status_lock:
+            resolved = dict(_resolved_tables or {})
+        pending = [t for t in REQUIRED_TABLES if refresh or resolved.get(t) is None]
+        if not pending:
+            return resolved
+        
         with self.get_connection() as conn:
             with conn.cursor() as cur:
-                # Primeiro tenta sem aspas (tabelas criadas sem aspas viram minúsculas)
-                try:
-                    cur.execute(f"SELECT COUNT(*) AS c FROM {table_name}")
-                    row = cur.fetchone()
-                    return int(row["c"]) if isinstance(row, dict) else int(row[0])
-                except Exception:
-                    pass
-                # Depois tenta com aspas e nome conforme recebido
-                try:
-                    cur.execute(f'SELECT COUNT(*) AS c FROM "{table_name}"')
-                    row = cur.fetchone()
-                    return int(row["c"]) if isinstance(row, dict) else int(row[0])
-                except Exception:
-                    return -1
-
+                cur.execute(
+                    """
+                    SELECT nome,
+                           COALESCE(to_regclass(nome), to_regclass('"' || nome || '"'))::text AS identificador
+                    FROM unnest(%s::text[]) AS nome
+                    """,
+                    (pending,)
+                )
+                for row in cur.fetchall():
+                    resolved[row["nome"]] = row["identificador"]
+        
+        with _tables_status_lock:
+            _resolved_tables = resolved
+        return resolved
+    
     def check_required_tables_status(self) -> Dict[str, int]:
-        """Verifica o status das tabelas obrigatórias do sistema."""
-        required_tables = [
-            "bancos",
-            "cartoes_de_credito",
-            "entradas",
-            "saidas_frequentes",
-            "categorias_de_compras",
-            "faturas_cartoes_de_credito",
-        ]
-        status = {}
+        """Verifica o status das tabelas obrigatórias do sistema.
+        
+        Retorna, por tabela: 1 se tem registros, 0 se está vazia e -1 se não existe
+        ou não está acessível. Usa EXISTS (sem contar linhas) em uma única consulta e
+        guarda o resultado por SETUP_STATUS_TTL segundos; escritas feitas pelos serviços
+        (get_connection(changed_table=...)) invalidam o cache.
+        """
+        global _tables_status_cache
+        with _tables_status_lock:
+            cached = _tables_status_cache
+        if cached is not None and time.monotonic() - cached[0] < TABLES_STATUS_TTL:
+            return dict(cached[1])
+        
+        status = {t: -1 for t in REQUIRED_TABLES}
         try:
-            for t in required_tables:
-                count = self._count_rows_for_table(t)
-                status[t] = count
+            resolved = self.resolve_table_names()
+            existing = [(t, resolved[t]) for t in REQUIRED_TABLES if resolved.get(t)]
+            if existing:
+                # Identificadores vêm de to_regclass (já normalizados/aspados quando necessário)
+                columns = ", ".join(
+                    f'EXISTS (SELECT 1 FROM {identificador}) AS "{t}"' for t, identificador in existing
+                )
+                with self.get_connection() as conn:
+                    with conn.cursor() as cur:
+                        cur.execute(f"SELECT {columns}")
+                        row = cur.fetchone()
+                for t, _ in existing:
+                    status[t] = 1 if row[t] else 0
         except Exception:
             # Em caso de falha geral de conexão, marque todas como -1 (indefinido/não acessível)
-            for t in required_tables:
-                status[t] = -1
-        return status
\ No newline at end of file
+            # e não guarde em cache para tentar de novo na próxima chamada
+            return status
+        
+        with _tables_status_lock:
+            _tables_status_cache = (time.monotonic(), status)
+        return dict(status)
+    
+    def notify_table_changed(self, table_name: str):
+        """Avisa que uma tabela foi alterada: incrementa a versão dos dados da tabela
+        (invalidando caches de resultados das tools) e o cache de status das tabelas"""
+        data_versions.bump(table_name)
+        invalidate_tables_status()
+
+
+def invalidate_tables_status():
+    """Descarta o status das tabelas em cache; a próxima verificação consulta o banco"""
+    global _tables_status_cache
+    with _tables_status_lock:
+        _tables_status_cache = None
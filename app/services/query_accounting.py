@@ -0,0 +1,200 @@
+from typing import Any, Dict, Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import os
+import re
+import threading
+import time
+import psycopg2.extras
+
+# Comandos mais lentos que isso (ms) vão para o log com os parâmetros ocultos
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+
+_STRING_LITERAL = re.compile(r"[Ee]?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _statement_key(query: Any) -> str:
+    """SQL normalizado: espaços colapsados e literais trocados por `?`.
+
+    Comandos montados com os valores embutidos (ex: execute_values) também
+    viram a mesma chave e não levam dados do usuário para o log.
+    """
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    elif not isinstance(query, str):
+        query = str(query)
+    query = _STRING_LITERAL.sub("'?'", query)
+    query = _NUMBER_LITERAL.sub("?", query)
+    return _WHITESPACE.sub(" ", query).strip()[:300]
+
+
+def _redact_params(params: Any) -> str:
+    """Parâmetros do comando só com os tipos (nunca os valores)"""
+    if params is None:
+        return "-"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{k}: <{type(v).__name__}>" for k, v in params.items()) + "}"
+    if isinstance(params, (list, tuple)):
+        return "(" + ", ".join(f"<{type(v).__name__}>" for v in params) + ")"
+    return f"<{type(params).__name__}>"
+
+
+class QueryStats:
+    """Comandos SQL executados em um request: quantidade, tempo total, linhas lidas e repetições"""
+
+    __slots__ = ("queries", "time_ms", "rows", "slow", "statements", "_lock")
+
+    def __init__(self):
+        # As tools em paralelo herdam o contexto e gravam no mesmo objeto
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.time_ms = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.statements: Dict[str, int] = {}
+
+    def record(self, key: str, elapsed_ms: float, rows: int, slow: bool) -> None:
+        with self._lock:
+            self.queries += 1
+            self.time_ms += elapsed_ms
+            self.rows += rows
+            self.slow += slow
+            self.statements[key] = self.statements.get(key, 0) + 1
+
+    def annotate(self, span: Any) -> None:
+        """Anexa o resumo ao span do request (atributos db.*)"""
+        if span.recording:
+            for key, value in self.summary().items():
+                span.set_attribute(f"db.{key}", value)
+
+    def summary(self, top: int = 5) -> Dict[str, Any]:
+        """Resumo para o trace; `repeated` mostra os comandos repetidos (padrão N+1)"""
+        with self._lock:
+            repeated = sorted(((n, k) for k, n in self.statements.items() if n > 1), reverse=True)[:top]
+        return {
+            "queries": self.queries,
+            "time_ms": round(self.time_ms, 3),
+            "rows": self.rows,
+            "slow": self.slow,
+            "distinct": len(self.statements),
+            "repeated": {k[:120]: n for n, k in repeated},
+        }
+
+
+class _QueryTotals:
+    """Totais do processo (inclui threads de fundo, fora de qualquer request)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {"queries": 0, "time_ms": 0.0, "rows": 0, "slow": 0, "suppressed": 0}
+
+    def add(self, elapsed_ms: float, rows: int, slow: bool) -> None:
+        with self._lock:
+            self._values["queries"] += 1
+            self._values["time_ms"] += elapsed_ms
+            self._values["rows"] += rows
+            self._values["slow"] += slow
+
+    def add_suppressed(self) -> None:
+        with self._lock:
+            self._values["suppressed"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._values)
+
+
+_totals = _QueryTotals()
+
+# Estatísticas do request em andamento e flag de contabilização suspensa (ex: gravação de logs)
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+_suppressed: ContextVar[bool] = ContextVar("query_accounting_suppressed", default=False)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Contabiliza os comandos SQL executados no contexto atual (um request/turno)"""
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+@contextmanager
+def suppress_accounting() -> Iterator[None]:
+    """Não contabiliza os comandos do bloco (ex: gravação de logs, que não é trabalho do request)"""
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Estatísticas do request em andamento (None fora de track_queries)"""
+    return _request_stats.get()
+
+
+def query_totals() -> Dict[str, Any]:
+    """Totais do processo: comandos, tempo (ms), linhas lidas, lentos e não contabilizados"""
+    return _totals.snapshot()
+
+
+def _log_slow_query(key: str, params: Any, elapsed_ms: float, rows: int) -> None:
+    """Registra o comando lento no serviço de logs (sem contabilizar a própria gravação)"""
+    try:
+        from app.services.logs_service import log_service
+    except ImportError:
+        return
+    with suppress_accounting():
+        log_service.warning(
+            f"Consulta lenta ({elapsed_ms:.1f} ms, {rows} linhas): {key} | params={_redact_params(params)}"
+        )
+
+
+class AccountingCursor(psycopg2.extras.RealDictCursor):
+    """
+    RealDictCursor que conta e cronometra cada comando.
+
+    Soma nos totais do processo e nas estatísticas do request (track_queries);
+    comandos acima de DB_SLOW_QUERY_MS vão para o log com os parâmetros
+    ocultos. Dentro de suppress_accounting() só conta em `suppressed`.
+    """
+
+    def execute(self, query, vars=None):
+        if _suppressed.get():
+            _totals.add_suppressed()
+            return super().execute(query, vars)
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._account(query, vars, started)
+
+    def executemany(self, query, vars_list):
+        if _suppressed.get():
+            _totals.add_suppressed()
+            return super().executemany(query, vars_list)
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._account(query, None, started)
+
+    def _account(self, query: Any, params: Any, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # Linhas lidas: só comandos que retornam resultado
+        rows = max(self.rowcount, 0) if self.description is not None else 0
+        slow = elapsed_ms >= DB_SLOW_QUERY_MS
+        _totals.add(elapsed_ms, rows, slow)
+        stats = _request_stats.get()
+        key = None
+        if stats is not None:
+            key = _statement_key(query)
+            stats.record(key, elapsed_ms, rows, slow)
+        if slow:
+            _log_slow_query(key or _statement_key(query), params, elapsed_ms, rows)
@@ -3,8 +3,8 @@ from app.services.postgres_service import PostgresService
 from app.models.saidas_frequentes_model import SaidasFrequentesModel
 
 class SaidasFrequentesService():
-    def __init__(self):
-        self.postgres_service = PostgresService()
+    def __init__(self, postgres_service: Optional[PostgresService] = None):
+        self.postgres_service = postgres_service or PostgresService()
 
     def get_all_saidas_frequentes(self) -> List[SaidasFrequentesModel]:
         """Retorna todas as saídas frequentes."""
@@ -24,7 +24,7 @@ class SaidasFrequentesService():
     
     def insert_saida_frequente(self, nome_saida: str, tipo_saida: str, valor_saida: float, dia_saida: int) -> int:
         """Insere uma nova saída frequente."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="saidas_frequentes") as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     'INSERT INTO "saidas_frequentes" ("nome_saida", "tipo_saida", "valor_saida", "dia_saida") VALUES (%s, %s, %s, %s) RETURNING "id_saida_frequente"',
@@ -57,14 +57,14 @@ class SaidasFrequentesService():
         params.append(id_saida)
         query = f'UPDATE "saidas_frequentes" SET {", ".join(updates)} WHERE "id_saida_frequente" = %s'
         
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="saidas_frequentes") as conn:
             with conn.cursor() as cur:
                 cur.execute(query, params)
                 return cur.rowcount > 0
     
     def delete_saida_frequente(self, id_saida: int) -> bool:
         """Deleta uma saída frequente."""
-        with self.postgres_service.get_connection() as conn:
+        with self.postgres_service.get_connection(changed_table="saidas_frequentes") as conn:
             with conn.cursor() as cur:
                 cur.execute('DELETE FROM "saidas_frequentes" WHERE "id_saida_frequente" = %s', (id_saida,))
                 return cur.rowcount > 0
\ No newline at end of file
@@ -0,0 +1,100 @@
+from typing import Any, Callable, Dict, Type, TypeVar
+import os
+import threading
+from app.services.postgres_service import PostgresService
+from app.services.balance_service import BalanceService
+from app.services.bancos_service import BancosService
+from app.services.cartoes_credito_service import CartoesCreditoService
+from app.services.categorias_service import CategoriasService
+from app.services.compras_cartao_service import ComprasCartaoService
+from app.services.conversation_history_service import ConversationHistoryService
+from app.services.entradas_service import EntradasService
+from app.services.faturas_cartoes_de_credito_service import FaturasCartoesDeCreditoService
+from app.services.limites_de_compras_service import LimitesDeComprasService
+from app.services.saidas_frequentes_service import SaidasFrequentesService
+
+T = TypeVar("T")
+
+
+class ServiceRegistry:
+    """
+    Container de serviços do processo.
+
+    Cada serviço é construído uma única vez (por processo/worker) e recebe o
+    PostgresService compartilhado. Testes podem trocar qualquer serviço por um
+    fake com `override()` e voltar ao normal com `clear_overrides()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._factories: Dict[type, Callable[["ServiceRegistry"], Any]] = {}
+        self._instances: Dict[type, Any] = {}
+        self._overrides: Dict[type, Any] = {}
+        self._pid = os.getpid()
+
+    def register(self, service_cls: Type[T], factory: Callable[["ServiceRegistry"], T]) -> None:
+        """Registra a fábrica usada para construir `service_cls`"""
+        with self._lock:
+            self._factories[service_cls] = factory
+            self._instances.pop(service_cls, None)
+
+    def get(self, service_cls: Type[T]) -> T:
+        """Retorna a instância única de `service_cls`, construindo-a se necessário"""
+        if self._pid != os.getpid():
+            self.reset()
+        override = self._overrides.get(service_cls)
+        if override is not None:
+            return override
+        instance = self._instances.get(service_cls)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(service_cls)
+            if instance is None:
+                factory = self._factories.get(service_cls)
+                if factory is None:
+                    raise KeyError(f"Serviço não registrado: {service_cls.__name__}")
+                instance = factory(self)
+                self._instances[service_cls] = instance
+            return instance
+
+    def override(self, service_cls: Type[T], instance: T) -> None:
+        """Substitui o serviço por outra instância (ex: fake em testes)"""
+        with self._lock:
+            self._overrides[service_cls] = instance
+
+    def clear_overrides(self) -> None:
+        """Remove todas as substituições feitas com `override()`"""
+        with self._lock:
+            self._overrides.clear()
+
+    def reset(self) -> None:
+        """Descarta as instâncias construídas; serão recriadas no próximo `get()`"""
+        with self._lock:
+            self._instances.clear()
+            self._pid = os.getpid()
+
+
+def _with_shared_db(service_cls: Type[T]) -> Callable[[ServiceRegistry], T]:
+    """Fábrica padrão: injeta o PostgresService compartilhado no serviço"""
+    def factory(registry: ServiceRegistry) -> T:
+        return service_cls(postgres_service=registry.get(PostgresService))
+    return factory
+
+
+# Instância global do registro de serviços
+service_registry = ServiceRegistry()
+service_registry.register(PostgresService, lambda registry: PostgresService())
+for _service_cls in (
+    BalanceService,
+    BancosService,
+    CartoesCreditoService,
+    CategoriasService,
+    ComprasCartaoService,
+    ConversationHistoryService,
+    EntradasService,
+    FaturasCartoesDeCreditoService,
+    LimitesDeComprasService,
+    SaidasFrequentesService,
+):
+    service_registry.register(_service_cls, _with_shared_db(_service_cls))
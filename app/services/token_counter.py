@@ -0,0 +1,58 @@
+from typing import Any, Optional
+import threading
+from app.services.logs_service import log_service
+
+# Aproximação usada quando o tokenizer não está disponível (~4 caracteres por token)
+_CHARS_PER_TOKEN = 4
+
+
+class TokenCounter:
+    """
+    Conta tokens com o tokenizer do modelo (tiktoken).
+
+    O encoding é carregado no primeiro uso; se o tiktoken não conseguir
+    carregá-lo (ex: sem acesso à internet para baixar o arquivo BPE), a contagem
+    cai para a aproximação de ~4 caracteres por token.
+    """
+
+    def __init__(self, model: str = "gpt-4.1"):
+        self.model = model
+        self._encoding: Any = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _get_encoding(self) -> Optional[Any]:
+        """Carrega o encoding do modelo uma única vez"""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        import tiktoken
+                        try:
+                            self._encoding = tiktoken.encoding_for_model(self.model)
+                        except KeyError:
+                            self._encoding = tiktoken.get_encoding("o200k_base")
+                    except Exception as e:
+                        log_service.warning(f"tiktoken indisponível, usando contagem aproximada de tokens: {e}")
+                        self._encoding = None
+                    self._loaded = True
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        """Número de tokens de `text`"""
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int, suffix: str = "…") -> str:
+        """Corta `text` para caber em `max_tokens` (incluindo o sufixo)"""
+        if self.count(text) <= max_tokens:
+            return text
+        budget = max(0, max_tokens - self.count(suffix))
+        encoding = self._get_encoding()
+        if encoding is None:
+            return text[:budget * _CHARS_PER_TOKEN] + suffix
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:budget]) + suffix
@@ -0,0 +1,140 @@
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+from collections import OrderedDict
+import functools
+import inspect
+import os
+import threading
+import time
+from app.services.data_versions import data_versions
+from app.core.tracing import current_span
+
+
+def is_error_output(output: Any) -> bool:
+    """Saídas de erro das tools não devem ficar em cache"""
+    return not isinstance(output, str) or output.startswith(("Erro", "❌"))
+
+
+class _CachedOutput:
+    """Saída de uma tool junto com as versões das tabelas usadas para gerá-la"""
+
+    __slots__ = ("output", "versions", "expires_at")
+
+    def __init__(self, output: str, versions: Tuple[int, ...], expires_at: float):
+        self.output = output
+        self.versions = versions
+        self.expires_at = expires_at
+
+
+class ToolResultCache:
+    """
+    Cache LRU das saídas das tools de leitura.
+
+    Cada entrada guarda o snapshot das versões das tabelas de que a tool depende
+    (ver DataVersions); se alguma tabela foi alterada desde então, a entrada é
+    descartada. O `ttl` limita o tempo em que uma escrita feita por outro
+    processo/worker pode ficar invisível.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _CachedOutput]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ToolResultCache":
+        """Cria o cache a partir das variáveis TOOL_CACHE_*"""
+        return cls(
+            max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "256")),
+            ttl=float(os.getenv("TOOL_CACHE_TTL", "300")),
+            enabled=os.getenv("TOOL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes"),
+        )
+
+    def get(self, key: Hashable, versions: Tuple[int, ...]) -> Optional[str]:
+        """Retorna a saída em cache se ainda for válida para `versions`"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry.versions != versions or entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                self._stale += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.output
+
+    def put(self, key: Hashable, output: str, versions: Tuple[int, ...]) -> None:
+        """Guarda a saída da tool com o snapshot de versões usado no cálculo"""
+        with self._lock:
+            self._entries[key] = _CachedOutput(output, versions, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Métricas do cache: acertos, falhas, entradas obsoletas e despejadas"""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale": self._stale,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+            }
+
+
+# Instância global do cache de saídas das tools
+tool_cache = ToolResultCache.from_env()
+
+
+def cached_tool(tables: Sequence[str]) -> Callable[[Callable[..., str]], Callable[..., str]]:
+    """
+    Decorator que guarda a saída de uma tool de leitura em `tool_cache`,
+    válida enquanto as versões de `tables` não mudarem.
+    """
+    tables = tuple(tables)
+
+    def decorator(func: Callable[..., str]) -> Callable[..., str]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> str:
+            if not tool_cache.enabled:
+                return func(*args, **kwargs)
+            # Versões lidas antes de executar: uma escrita concorrente torna a entrada obsoleta
+            versions = data_versions.snapshot(tables)
+            try:
+                # Normaliza argumentos posicionais/nomeados/padrão para a mesma chave
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (func.__qualname__, tuple(bound.arguments.items()))
+                cached = tool_cache.get(key, versions)
+            except TypeError:
+                # Argumentos não hasheáveis: executa sem cache
+                return func(*args, **kwargs)
+            current_span().set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                return cached
+            output = func(*args, **kwargs)
+            if not is_error_output(output):
+                tool_cache.put(key, output, versions)
+            return output
+
+        wrapper.cache_tables = tables  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
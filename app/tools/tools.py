@@ -1,3 +1,4 @@
+from typing import Optional
 from langchain_community.tools import Tool
 from app.core.config import get_site_config_url
 from app.services.postgres_service import PostgresService
@@ -8,14 +9,80 @@ from app.services.entradas_service import EntradasService
 from app.services.saidas_frequentes_service import SaidasFrequentesService
 from app.services.compras_cartao_service import ComprasCartaoService
 from app.services.categorias_service import CategoriasService
-from datetime import datetime
+from app.services.balance_service import BalanceService
+from app.services.service_registry import service_registry
+from app.tools.tool_cache import cached_tool, is_error_output
+from app.core.metrics import tool_calls, tool_duration
+from app.core.tracing import traced
+from datetime import date, datetime
+import functools
 import json
+import os
 import re
+import time
 
+# Saída compacta (JSON com chaves curtas) nas tools usadas pelo agente; as respostas
+# diretas ao usuário (ex: fast-path de intenções) continuam com a formatação legível
+TOOLS_COMPACT_OUTPUT = os.getenv("TOOLS_COMPACT_OUTPUT", "true").lower() in ("1", "true", "yes")
 
-def get_current_datetime(_: str = "") -> str:
+
+def _parse_json_input(input_text: str) -> dict:
+    """Interpreta a entrada opcional de uma tool como JSON; retorna {} se não for um objeto válido."""
+    if not input_text or not input_text.strip():
+        return {}
+    try:
+        data = json.loads(input_text)
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def _compact_json(data) -> str:
+    """Serializa a saída compacta de uma tool: JSON sem espaços, valores com 2 casas."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+def _valor(value) -> float:
+    """Valor monetário como número com 2 casas (aceita Decimal)."""
+    return round(float(value or 0), 2)
+
+def _parse_data(value) -> Optional[date]:
+    """Converte "YYYY-MM-DD" ou "DD/MM/YYYY" em date (None se vazio/inválido)."""
+    if not value:
+        return None
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(str(value), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def instrumented_tool(name: str):
+    """Decorator das funções das tools: span no trace e métricas de chamadas/latência por tool."""
+    def decorator(func):
+        func = traced(f"tool.{name}")(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            status = "error"
+            try:
+                output = func(*args, **kwargs)
+                if not is_error_output(output):
+                    status = "ok"
+                return output
+            finally:
+                tool_calls.inc(name, status)
+                tool_duration.observe(time.perf_counter() - started, name)
+
+        return wrapper
+
+    return decorator
+
+@instrumented_tool("GetCurrentDateTime")
+def get_current_datetime(_: str = "", *, compact: bool = False) -> str:
     """Retorna data e horário atual."""
     now = datetime.now()
+    if compact:
+        return _compact_json({"data": now.strftime('%Y-%m-%d'), "hora": now.strftime('%H:%M:%S')})
     return f"Data atual: {now.strftime('%Y-%m-%d')}\nHorário atual: {now.strftime('%H:%M:%S')}"
 
 def first_message_tool(_: str = "") -> str:
@@ -25,15 +92,23 @@ def first_message_tool(_: str = "") -> str:
     """
     return first_mesage
 
-def welcome_or_setup(_: str = "") -> str:
+@instrumented_tool("WelcomeOrSetup")
+def welcome_or_setup(_: str = "", *, compact: bool = False) -> str:
     """Retorna mensagem de boas-vindas e link do site.
     Inclui lembrete de configuração se detectar tabelas vazias ou ausentes.
     """
     site_url = get_site_config_url()
-    service = PostgresService()
+    service = service_registry.get(PostgresService)
     status = service.check_required_tables_status()
     needs_setup = any(v <= 0 for v in status.values())
 
+    if compact:
+        # O agente redige as boas-vindas a partir do link e das pendências
+        return _compact_json({
+            "site": site_url,
+            "pendencias": [k for k, v in status.items() if v <= 0],
+        })
+
     if needs_setup:
         empty_or_missing = [k for k, v in status.items() if v <= 0]
         tables_list = ", ".join(empty_or_missing)
@@ -49,12 +124,20 @@ def welcome_or_setup(_: str = "") -> str:
             f"Se quiser ajustar suas informações a qualquer momento, acesse: {site_url}"
         )
 
-def get_bancos_info(_: str = "") -> str:
+@instrumented_tool("GetBancosInfo")
+@cached_tool(["bancos"])
+def get_bancos_info(_: str = "", *, compact: bool = False) -> str:
     """Retorna informações sobre todos os bancos cadastrados."""
     try:
-        service = BancosService()
+        service = service_registry.get(BancosService)
         bancos = service.get_all_bancos()
         
+        if compact:
+            return _compact_json([
+                {"id": b.id_banco, "nome": b.nome_banco, "conta": _valor(b.valor_em_conta), "invest": _valor(b.valor_investido)}
+                for b in bancos
+            ])
+        
         if not bancos:
             return "Nenhum banco cadastrado no sistema."
         
@@ -78,12 +161,20 @@ def get_bancos_info(_: str = "") -> str:
     except Exception as e:
         return f"Erro ao consultar bancos: {str(e)}"
 
-def get_cartoes_info(_: str = "") -> str:
+@instrumented_tool("GetCartoesInfo")
+@cached_tool(["cartoes_de_credito"])
+def get_cartoes_info(_: str = "", *, compact: bool = False) -> str:
     """Retorna informações sobre todos os cartões de crédito."""
     try:
-        service = CartoesCreditoService()
+        service = service_registry.get(CartoesCreditoService)
         cartoes = service.get_all_cartoes()
         
+        if compact:
+            return _compact_json([
+                {"id": c.id_cartao, "nome": c.nome_cartao, "tipo": getattr(c.tipo_cartao, "name", c.tipo_cartao), "banco": c.id_banco, "venc": c.dia_vencimento}
+                for c in cartoes
+            ])
+        
         if not cartoes:
             return "Nenhum cartão de crédito cadastrado."
         
@@ -100,12 +191,23 @@ def get_cartoes_info(_: str = "") -> str:
     except Exception as e:
         return f"Erro ao consultar cartões: {str(e)}"
 
-def get_faturas_pendentes(_: str = "") -> str:
+@instrumented_tool("GetFaturasPendentes")
+@cached_tool(["faturas_cartoes_de_credito"])
+def get_faturas_pendentes(_: str = "", *, compact: bool = False) -> str:
     """Retorna todas as faturas não pagas."""
     try:
-        service = FaturasCartoesDeCreditoService()
+        service = service_registry.get(FaturasCartoesDeCreditoService)
         faturas = service.get_faturas_nao_pagas()
         
+        if compact:
+            return _compact_json({
+                "faturas": [
+                    {"id": f.id_fatura_cartao_credito, "cartao": f.id_cartao, "mes": f.mes_fatura, "ano": f.ano_fatura, "valor": _valor(f.valor_fatura)}
+                    for f in faturas
+                ],
+                "total": _valor(sum(f.valor_fatura for f in faturas)),
+            })
+        
         if not faturas:
             return "✅ Não há faturas pendentes! Todas as faturas estão pagas."
         
@@ -125,57 +227,68 @@ def get_faturas_pendentes(_: str = "") -> str:
     except Exception as e:
         return f"Erro ao consultar faturas: {str(e)}"
 
-def analyze_faturas_por_cartao(_: str = "") -> str:
-    """Analisa e compara faturas por cartão, mostrando qual cartão tem maior fatura."""
+@instrumented_tool("AnalyzeFaturasPorCartao")
+@cached_tool(["faturas_cartoes_de_credito", "cartoes_de_credito"])
+def analyze_faturas_por_cartao(filtros_json: str = "", *, compact: bool = False) -> str:
+    """Analisa e compara faturas por cartão, mostrando qual cartão tem maior fatura.
+    
+    Filtros opcionais (JSON): {"paga": false, "mes_inicio": 1, "ano_inicio": 2025,
+    "mes_fim": 12, "ano_fim": 2025, "limite": 3}
+    O agrupamento, o nome do cartão e a ordenação vêm prontos do banco.
+    """
     try:
-        faturas_cartoes_service = FaturasCartoesDeCreditoService()
-        cartoes_service =  CartoesCreditoService()
-        faturas = faturas_cartoes_service.get_all_faturas()
-        cartoes = cartoes_service.get_all_cartoes()
-        
-        if not faturas:
-            return "Nenhuma fatura cadastrada no sistema."
-        
-        # Dicionário para armazenar total por cartão
-        totais_por_cartao = {}
-        cartoes_map = {c.id_cartao: c.nome_cartao for c in cartoes}
+        filtros = _parse_json_input(filtros_json)
+        faturas_cartoes_service = service_registry.get(FaturasCartoesDeCreditoService)
+        cartoes_ordenados = faturas_cartoes_service.get_totais_por_cartao(
+            paga=filtros.get('paga'),
+            mes_inicio=filtros.get('mes_inicio'),
+            ano_inicio=filtros.get('ano_inicio'),
+            mes_fim=filtros.get('mes_fim'),
+            ano_fim=filtros.get('ano_fim'),
+            limite=filtros.get('limite')
+        )
         
-        for fatura in faturas:
-            id_cartao = fatura.id_cartao
-            valor = fatura.valor_fatura
-            
-            if id_cartao not in totais_por_cartao:
-                totais_por_cartao[id_cartao] = 0
-            totais_por_cartao[id_cartao] += valor
+        if compact:
+            return _compact_json([
+                {"cartao": item['id_cartao'], "nome": item['nome_cartao'], "total": _valor(item['total']), "qtd": item['quantidade']}
+                for item in cartoes_ordenados
+            ])
         
-        # Ordenar por valor (maior para menor)
-        cartoes_ordenados = sorted(totais_por_cartao.items(), key=lambda x: x[1], reverse=True)
+        if not cartoes_ordenados:
+            return "Nenhuma fatura cadastrada no sistema."
         
         result = "📊 **ANÁLISE DE FATURAS POR CARTÃO**\n\n"
         
-        for i, (id_cartao, total) in enumerate(cartoes_ordenados, 1):
-            nome_cartao = cartoes_map.get(id_cartao, f"Cartão {id_cartao}")
+        for i, item in enumerate(cartoes_ordenados, 1):
             emoji = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else "💳"
-            result += f"{emoji} {nome_cartao}\n"
-            result += f"   Total: R$ {total:.2f}\n\n"
+            result += f"{emoji} {item['nome_cartao']}\n"
+            result += f"   Total: R$ {item['total']:.2f}\n\n"
         
         # Destacar o maior
-        if cartoes_ordenados:
-            id_maior = cartoes_ordenados[0][0]
-            valor_maior = cartoes_ordenados[0][1]
-            nome_maior = cartoes_map.get(id_maior, f"Cartão {id_maior}")
-            result += f"\n🏆 **MAIOR FATURA:** {nome_maior} com R$ {valor_maior:.2f}"
+        maior = cartoes_ordenados[0]
+        result += f"\n🏆 **MAIOR FATURA:** {maior['nome_cartao']} com R$ {maior['total']:.2f}"
         
         return result
     except Exception as e:
         return f"Erro ao analisar faturas: {str(e)}"
 
-def get_entradas_info(_: str = "") -> str:
+@instrumented_tool("GetEntradasInfo")
+@cached_tool(["entradas"])
+def get_entradas_info(_: str = "", *, compact: bool = False) -> str:
     """Retorna informações sobre todas as entradas (receitas)."""
     try:
-        service = EntradasService()
+        service = service_registry.get(EntradasService)
         entradas = service.get_all_entradas()
         
+        if compact:
+            return _compact_json({
+                "entradas": [
+                    {"id": e.id_entrada, "nome": e.nome_entrada, "tipo": e.tipo_entrada, "valor": _valor(e.valor_entrada), "dia": e.dia_entrada, "banco": e.id_banco}
+                    for e in entradas
+                ],
+                "total": _valor(sum(e.valor_entrada for e in entradas)),
+            })
+        
         if not entradas:
             return "Nenhuma entrada cadastrada."
         
@@ -196,12 +309,23 @@ def get_entradas_info(_: str = "") -> str:
     except Exception as e:
         return f"Erro ao consultar entradas: {str(e)}"
 
-def get_saidas_info(_: str = "") -> str:
+@instrumented_tool("GetSaidasInfo")
+@cached_tool(["saidas_frequentes"])
+def get_saidas_info(_: str = "", *, compact: bool = False) -> str:
     """Retorna informações sobre todas as saídas frequentes."""
     try:
-        service = SaidasFrequentesService()
+        service = service_registry.get(SaidasFrequentesService)
         saidas = service.get_all_saidas_frequentes()
         
+        if compact:
+            return _compact_json({
+                "saidas": [
+                    {"id": s.id_saida_frequente, "nome": s.nome_saida, "tipo": s.tipo_saida, "valor": _valor(s.valor_saida), "dia": s.dia_saida, "banco": s.id_banco}
+                    for s in saidas
+                ],
+                "total": _valor(sum(s.valor_saida for s in saidas)),
+            })
+        
         if not saidas:
             return "Nenhuma saída frequente cadastrada."
         
@@ -221,21 +345,38 @@ def get_saidas_info(_: str = "") -> str:
     except Exception as e:
         return f"Erro ao consultar saídas: {str(e)}"
 
-def analyze_balance(_: str = "") -> str:
-    """Analisa o balanço financeiro entre entradas e saídas."""
+@instrumented_tool("AnalyzeFinancialBalance")
+@cached_tool(["entradas", "saidas_frequentes", "faturas_cartoes_de_credito", "bancos"])
+def analyze_balance(filtros_json: str = "", *, compact: bool = False) -> str:
+    """Analisa o balanço financeiro entre entradas e saídas.
+    
+    Entrada opcional (JSON): {"por_banco": true} para incluir o detalhamento por banco.
+    Todos os totais vêm de uma única consulta (BalanceService.snapshot).
+    """
     try:
-        entrada_service = EntradasService()
-        saida_service = SaidasFrequentesService()
-        faturas_service = FaturasCartoesDeCreditoService()
-        entradas = entrada_service.get_all_entradas()
-        saidas = saida_service.get_all_saidas_frequentes()
-        faturas_pendentes = faturas_service.get_faturas_nao_pagas()
-        
-        total_entradas = sum(e.valor_entrada for e in entradas)
-        total_saidas = sum(s.valor_saida for s in saidas)
-        total_faturas_pendentes = sum(f.valor_fatura for f in faturas_pendentes)
-        
-        saldo = total_entradas - total_saidas - total_faturas_pendentes
+        filtros = _parse_json_input(filtros_json)
+        balance_service = service_registry.get(BalanceService)
+        snapshot = balance_service.snapshot(por_banco=bool(filtros.get('por_banco')))
+        
+        if compact:
+            data = {
+                "entradas": _valor(snapshot.total_entradas),
+                "saidas": _valor(snapshot.total_saidas),
+                "faturas": _valor(snapshot.total_faturas_pendentes),
+                "saldo": _valor(snapshot.saldo),
+            }
+            if snapshot.por_banco:
+                data["bancos"] = [
+                    {"id": b.id_banco, "nome": b.nome_banco, "entradas": _valor(b.total_entradas), "saidas": _valor(b.total_saidas),
+                     "faturas": _valor(b.total_faturas_pendentes), "saldo": _valor(b.saldo)}
+                    for b in snapshot.por_banco
+                ]
+            return _compact_json(data)
+        
+        total_entradas = snapshot.total_entradas
+        total_saidas = snapshot.total_saidas
+        total_faturas_pendentes = snapshot.total_faturas_pendentes
+        saldo = snapshot.saldo
         
         result = "📊 **ANÁLISE FINANCEIRA**\n\n"
         result += f"💰 Entradas mensais: R$ {total_entradas:.2f}\n"
@@ -250,16 +391,30 @@ def analyze_balance(_: str = "") -> str:
             result += f"❌ **Déficit: R$ {abs(saldo):.2f}**\n"
             result += "Status: Atenção! Gastos excedem receitas. ⚠️"
         
+        if snapshot.por_banco:
+            result += "\n\n🏦 **POR BANCO**\n"
+            for banco in snapshot.por_banco:
+                nome_banco = banco.nome_banco or (f"Banco {banco.id_banco}" if banco.id_banco else "Sem banco")
+                result += f"{nome_banco}: entradas R$ {banco.total_entradas:.2f}, "
+                result += f"saídas R$ {banco.total_saidas:.2f}, "
+                result += f"faturas R$ {banco.total_faturas_pendentes:.2f}, "
+                result += f"saldo R$ {banco.saldo:.2f}\n"
+        
         return result
     except Exception as e:
         return f"Erro ao analisar balanço: {str(e)}"
 
-def get_categorias_disponiveis(_: str = "") -> str:
+@instrumented_tool("GetCategoriasDisponiveis")
+@cached_tool(["categorias_de_compras"])
+def get_categorias_disponiveis(_: str = "", *, compact: bool = False) -> str:
     """Retorna lista de todas as categorias disponíveis para classificação de compras."""
     try:
-        categorias_service = CategoriasService()
+        categorias_service = service_registry.get(CategoriasService)
         categorias = categorias_service.get_all_categorias()
         
+        if compact:
+            return _compact_json([{"id": c.id_categoria, "nome": c.nome_categoria} for c in categorias])
+        
         if not categorias:
             return "Nenhuma categoria cadastrada no sistema."
         
@@ -275,40 +430,41 @@ def get_categorias_disponiveis(_: str = "") -> str:
     except Exception as e:
         return f"Erro ao consultar categorias: {str(e)}"
     
-def get_compras_por_categoria(_: str = "") -> str:
-    """Retorna análise de compras agrupadas por categoria."""
+@instrumented_tool("GetComprasPorCategoria")
+@cached_tool(["compras_cartao", "categorias_de_compras"])
+def get_compras_por_categoria(filtros_json: str = "", *, compact: bool = False) -> str:
+    """Retorna análise de compras agrupadas por categoria.
+    
+    Filtros opcionais (JSON): {"data_inicio": "YYYY-MM-DD", "data_fim": "YYYY-MM-DD", "id_cartao": 1}
+    A agregação é feita no banco, então só os totais por categoria são transferidos.
+    """
     try:
-        compras_service = ComprasCartaoService()
-        categorias_service = CategoriasService()
-        compras = compras_service.get_all_compras_cartao()
-        categorias = categorias_service.get_all_categorias()
-        
-        if not compras:
-            return "Nenhuma compra cadastrada."
+        filtros = _parse_json_input(filtros_json)
+        compras_service = service_registry.get(ComprasCartaoService)
+        totais = compras_service.get_totais_por_categoria(
+            data_inicio=_parse_data(filtros.get('data_inicio')),
+            data_fim=_parse_data(filtros.get('data_fim')),
+            id_cartao=filtros.get('id_cartao')
+        )
         
-        # Criar mapa de categorias
-        categorias_map = {c.id_categoria: c.nome_categoria for c in categorias}
+        if compact:
+            return _compact_json({
+                "categorias": [
+                    {"nome": item['nome_categoria'], "total": _valor(item['total']), "qtd": item['quantidade']}
+                    for item in totais
+                ],
+                "total": _valor(sum(item['total'] for item in totais)),
+            })
         
-        # Agrupar por categoria
-        totais_por_categoria = {}
-        for compra in compras:
-            id_cat = compra.id_categoria
-            nome_cat = categorias_map.get(id_cat, "Sem categoria")
-            valor = compra.valor_compra
-            
-            if nome_cat not in totais_por_categoria:
-                totais_por_categoria[nome_cat] = 0
-            totais_por_categoria[nome_cat] += valor
-        
-        # Ordenar por valor
-        categorias_ordenadas = sorted(totais_por_categoria.items(), key=lambda x: x[1], reverse=True)
+        if not totais:
+            return "Nenhuma compra cadastrada."
         
         result = "🛒 **COMPRAS POR CATEGORIA**\n\n"
         total_geral = 0
         
-        for categoria, total in categorias_ordenadas:
-            result += f"📦 {categoria}: R$ {total:.2f}\n"
-            total_geral += total
+        for item in totais:
+            result += f"📦 {item['nome_categoria']}: R$ {item['total']:.2f}\n"
+            total_geral += item['total']
         
         result += f"\n{'─' * 40}\n"
         result += f"**TOTAL GERAL: R$ {total_geral:.2f}**"
@@ -349,7 +505,8 @@ def _processar_parcelas(parcelas_input: str) -> str:
     return '1 de 1'
 
 
-def insert_compra_cartao(input_json: str) -> str:
+@instrumented_tool("InsertCompraCartao")
+def insert_compra_cartao(input_json: str, *, compact: bool = False) -> str:
     """Insere uma nova compra de cartão de crédito.
     
     Formato esperado (JSON):
@@ -375,8 +532,8 @@ def insert_compra_cartao(input_json: str) -> str:
 
     try:
         data = json.loads(input_json)
-        compras_service = ComprasCartaoService()
-        categorias_service = CategoriasService()
+        compras_service = service_registry.get(ComprasCartaoService)
+        categorias_service = service_registry.get(CategoriasService)
         
         # Processar data
         data_compra = datetime.strptime(data['data_compra'], '%Y-%m-%d').date()
@@ -420,6 +577,12 @@ def insert_compra_cartao(input_json: str) -> str:
         categoria = categorias_service.get_categoria_by_id(id_categoria)
         nome_cat = categoria.nome_categoria if categoria else "Não identificada"
         
+        if compact:
+            return _compact_json({
+                "ok": True, "id": id_compra, "estab": data['estabelecimento'], "valor": _valor(data['valor_compra']),
+                "parcelas": parcelas, "cat": nome_cat, "obs": observacoes,
+            })
+        
         return (
             f"✅ Compra inserida com sucesso!\n"
             f"ID: {id_compra}\n"
@@ -438,13 +601,13 @@ def insert_compra_cartao(input_json: str) -> str:
 
 datetime_tool = Tool(
     name="GetCurrentDateTime",
-    func=get_current_datetime,
+    func=functools.partial(get_current_datetime, compact=TOOLS_COMPACT_OUTPUT),
     description="Retorna a data e o horário atual do sistema."
 )
 
 welcome_tool = Tool(
     name="WelcomeOrSetup",
-    func=welcome_or_setup,
+    func=functools.partial(welcome_or_setup, compact=TOOLS_COMPACT_OUTPUT),
     description=(
         "Exibe uma mensagem de boas-vindas com o link do site para configurar a conta. "
         "Use quando o usuário pedir o link do site ou mencionar configuração/cadastro, "
@@ -454,56 +617,58 @@ welcome_tool = Tool(
 
 bancos_tool = Tool(
     name="GetBancosInfo",
-    func=get_bancos_info,
+    func=functools.partial(get_bancos_info, compact=TOOLS_COMPACT_OUTPUT),
     description="Retorna informações sobre todos os bancos cadastrados, incluindo valores em conta e investidos."
 )
 
 cartoes_tool = Tool(
     name="GetCartoesInfo",
-    func=get_cartoes_info,
+    func=functools.partial(get_cartoes_info, compact=TOOLS_COMPACT_OUTPUT),
     description="Retorna informações sobre todos os cartões de crédito cadastrados."
 )
 
 faturas_pendentes_tool = Tool(
     name="GetFaturasPendentes",
-    func=get_faturas_pendentes,
+    func=functools.partial(get_faturas_pendentes, compact=TOOLS_COMPACT_OUTPUT),
     description="Retorna todas as faturas de cartão de crédito que ainda não foram pagas."
 )
 
 analyze_faturas_tool = Tool(
     name="AnalyzeFaturasPorCartao",
-    func=analyze_faturas_por_cartao,
+    func=functools.partial(analyze_faturas_por_cartao, compact=TOOLS_COMPACT_OUTPUT),
     description=(
         "Analisa e compara todas as faturas por cartão de crédito. "
         "Mostra qual cartão tem o maior valor total de faturas. "
-        "Use quando o usuário perguntar sobre qual cartão tem mais gastos ou maior fatura."
+        "Use quando o usuário perguntar sobre qual cartão tem mais gastos ou maior fatura. "
+        "Entrada opcional (JSON) para filtrar: {paga, mes_inicio, ano_inicio, mes_fim, ano_fim, limite}."
     )
 )
 
 entradas_tool = Tool(
     name="GetEntradasInfo",
-    func=get_entradas_info,
+    func=functools.partial(get_entradas_info, compact=TOOLS_COMPACT_OUTPUT),
     description="Retorna informações sobre todas as entradas (receitas) cadastradas."
 )
 
 saidas_tool = Tool(
     name="GetSaidasInfo",
-    func=get_saidas_info,
+    func=functools.partial(get_saidas_info, compact=TOOLS_COMPACT_OUTPUT),
     description="Retorna informações sobre todas as saídas frequentes (despesas recorrentes)."
 )
 
 balance_tool = Tool(
     name="AnalyzeFinancialBalance",
-    func=analyze_balance,
+    func=functools.partial(analyze_balance, compact=TOOLS_COMPACT_OUTPUT),
     description=(
         "Analisa o balanço financeiro completo, comparando entradas, saídas e faturas pendentes. "
-        "Use quando o usuário perguntar sobre sua situação financeira geral ou saldo disponível."
+        "Use quando o usuário perguntar sobre sua situação financeira geral ou saldo disponível. "
+        "Entrada opcional (JSON): {por_banco: true} para detalhar por banco."
     )
 )
 
 categorias_tool = Tool(
     name="GetCategoriasDisponiveis",
-    func=get_categorias_disponiveis,
+    func=functools.partial(get_categorias_disponiveis, compact=TOOLS_COMPACT_OUTPUT),
     description=(
         "Lista todas as categorias disponíveis no sistema para classificação de compras. "
         "Use esta tool quando o usuário perguntar sobre categorias ou quando precisar saber quais categorias existem."
@@ -512,16 +677,17 @@ categorias_tool = Tool(
 
 compras_categoria_tool = Tool(
     name="GetComprasPorCategoria",
-    func=get_compras_por_categoria,
+    func=functools.partial(get_compras_por_categoria, compact=TOOLS_COMPACT_OUTPUT),
     description=(
         "Retorna análise de todas as compras agrupadas por categoria. "
-        "Mostra quanto foi gasto em cada categoria."
+        "Mostra quanto foi gasto em cada categoria. "
+        "Entrada opcional (JSON) para filtrar: {data_inicio, data_fim, id_cartao}."
     )
 )
 
 insert_compra_tool = Tool(
     name="InsertCompraCartao",
-    func=insert_compra_cartao,
+    func=functools.partial(insert_compra_cartao, compact=TOOLS_COMPACT_OUTPUT),
     description=(
         "Insere uma nova compra de cartão no banco de dados. "
         "SEMPRE use esta tool para registrar compras - NÃO pergunte ao usuário sobre categorias. "
@@ -529,4 +695,12 @@ insert_compra_tool = Tool(
         "Formato JSON: {id_cartao, id_banco, data_compra(opcional, padrão hoje), estabelecimento, parcelas(opcional), nome_categoria(opcional), valor_compra, observacoes(opcional)}. "
         "A tool retornará confirmação com todos os detalhes da compra inserida."
     )
-)
\ No newline at end of file
+)
+# Tools que só leem dados: podem rodar em paralelo no mesmo passo do agente
+read_only_tools = [
+    datetime_tool, welcome_tool, bancos_tool, cartoes_tool, faturas_pendentes_tool, analyze_faturas_tool,
+    entradas_tool, saidas_tool, balance_tool, categorias_tool, compras_categoria_tool,
+]
+
+# Tools oferecidas ao agente (OpenAIService/OllamaService)
+agent_tools = read_only_tools + [insert_compra_tool]
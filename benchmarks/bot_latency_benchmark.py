@@ -0,0 +1,290 @@
+"""
+Benchmark ponta a ponta do webhook /api/v1/bot.
+
+Dispara as mensagens de uma carga (fast-path e agente) com concorrência
+configurável, usando o Flask test client ou um servidor WSGI local, contra o
+PostgreSQL de DATABASE_URL e um LLM falso (FakeChatModel, sem rede). Reporta
+latência p50/p95/p99, vazão, consultas ao banco por turno e memória por
+requisição, em JSON com o commit atual para comparar regressões.
+
+Uso:
+    # banco local do docker-compose, com esquema e dados sintéticos (APAGA os dados!)
+    python benchmarks/bot_latency_benchmark.py --setup-db --seed
+    python benchmarks/bot_latency_benchmark.py --requests 500 --concurrency 16 --llm-latency-ms 300 \
+        --output benchmarks/results/$(git rev-parse --short HEAD).json
+"""
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+# Carga padrão: mensagens que caem no fast-path e mensagens que passam pelo agente
+DEFAULT_QUERIES = [
+    "qual meu saldo?",
+    "faturas pendentes",
+    "quais sao os meus cartoes?",
+    "me mostra o saldo atual por favor e compara com o mes passado",
+    "quanto eu gastei em cada categoria nos ultimos meses?",
+    "qual o cartao com a maior fatura deste ano?",
+    "oi, tudo bem? pode me ajudar com minhas financas?",
+    "quais as minhas despesas fixas e quanto sobra no fim do mes",
+]
+
+
+def _run_sql_file(path: str) -> None:
+    """Executa um arquivo .sql no banco de DATABASE_URL"""
+    import psycopg2
+    with open(path, encoding="utf-8") as f:
+        sql = f.read()
+    conn = psycopg2.connect(os.environ["DATABASE_URL"])
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(sql)
+    finally:
+        conn.close()
+
+
+def _git_commit() -> Optional[str]:
+    """Hash do commit atual (None fora de um repositório git)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Percentil por interpolação linear"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def _rss_mb() -> Optional[float]:
+    """Memória residente do processo (None sem psutil)"""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def _make_sender(mode: str, app: Any) -> Callable[[Dict[str, str]], int]:
+    """Função que envia um payload ao /bot e retorna o status HTTP"""
+    if mode == "client":
+        local = threading.local()
+
+        def send_client(payload: Dict[str, str]) -> int:
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = app.test_client()
+            return client.post("/api/v1/bot", json=payload).status_code
+
+        return send_client
+
+    import urllib.request
+    from werkzeug.serving import make_server
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-wsgi", daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/v1/bot"
+
+    def send_server(payload: Dict[str, str]) -> int:
+        request = urllib.request.Request(
+            url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            return response.status
+
+    return send_server
+
+
+def _measure_memory(send: Callable[[Dict[str, str]], int], payloads: List[Dict[str, str]]) -> Dict[str, float]:
+    """Pico de memória alocada por requisição (tracemalloc, requisições sequenciais)"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for payload in payloads:
+            gc.collect()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            send(payload)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    return {
+        "samples": len(peaks),
+        "peak_kb_p50": round(_percentile(peaks, 50), 1),
+        "peak_kb_p95": round(_percentile(peaks, 95), 1),
+        "peak_kb_max": round(max(peaks), 1) if peaks else 0.0,
+    }
+
+
+def main() -> int:
+    """Executa o benchmark e grava/imprime o resultado em JSON"""
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta do /api/v1/bot")
+    parser.add_argument("--requests", type=int, default=200, help="requisições medidas")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--phones", type=int, default=50, help="telefones distintos na carga")
+    parser.add_argument("--mode", choices=("client", "server"), default="client",
+                        help="Flask test client ou servidor WSGI local")
+    parser.add_argument("--llm-mode", choices=("scripted", "replay"), default="scripted")
+    parser.add_argument("--llm-replay-file", help="JSONL gravado com LLM_RECORD_FILE (modo replay)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--queries-file", help="arquivo com uma mensagem por linha (padrão: carga embutida)")
+    parser.add_argument("--memory-samples", type=int, default=20, help="requisições medidas com tracemalloc")
+    parser.add_argument("--setup-db", action="store_true", help="aplica benchmarks/schema.sql e as migrações")
+    parser.add_argument("--seed", action="store_true", help="APAGA e recarrega os dados com benchmarks/seed.sql")
+    parser.add_argument("--output", help="arquivo JSON de saída (além da saída padrão)")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        parser.error("DATABASE_URL não definido")
+
+    # Configuração do app antes do import: modo síncrono e LLM falso
+    os.environ["BOT_ASYNC_MODE"] = "false"
+    os.environ["APP_PREWARM"] = "false"
+    os.environ["LLM_FAKE_MODE"] = args.llm_mode
+    os.environ["LLM_FAKE_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["LLM_FAKE_LATENCY_JITTER_MS"] = str(args.llm_latency_jitter_ms)
+    if args.llm_replay_file:
+        os.environ["LLM_FAKE_REPLAY_FILE"] = args.llm_replay_file
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+    if args.setup_db:
+        _run_sql_file(os.path.join(BENCH_DIR, "schema.sql"))
+        from app.services.migrations_service import MigrationsService
+        MigrationsService().apply_pending()
+    if args.seed:
+        _run_sql_file(os.path.join(BENCH_DIR, "seed.sql"))
+
+    queries = DEFAULT_QUERIES
+    if args.queries_file:
+        with open(args.queries_file, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    def payload(i: int) -> Dict[str, str]:
+        return {"query": queries[i % len(queries)], "phone_number": f"+5500{i % args.phones:06d}"}
+
+    rss_before_import = _rss_mb()
+    from main import create_app
+    from app.api.financial_agent_endpoint import prewarm
+    from app.services.conversation_history_service import ConversationHistoryService
+    from app.services.logs_service import log_service
+    from app.services.query_accounting import query_totals
+    from app.services.service_registry import service_registry
+    from app.api.financial_agent_endpoint import get_research_service
+    app = create_app(prewarm_services=False)
+    prewarm()
+    # O log verboso do AgentExecutor (stdout) misturaria a saída JSON do benchmark
+    get_research_service().agent_executor.verbose = False
+    send = _make_sender(args.mode, app)
+
+    for i in range(args.warmup):
+        send(payload(i))
+    service_registry.get(ConversationHistoryService).shutdown(wait=True)
+    log_service.flush()
+    totals_start = query_totals()
+
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i: int) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            status = send(payload(args.warmup + i))
+        except Exception:
+            status = 0
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if status != 200:
+                errors += 1
+
+    rss_start = _rss_mb()
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(one, range(args.requests)))
+    wall = time.perf_counter() - wall_start
+    # Espera as gravações em segundo plano (histórico e logs) para contá-las no turno
+    service_registry.get(ConversationHistoryService).shutdown(wait=True)
+    log_service.flush()
+    rss_end = _rss_mb()
+    totals = {key: value - totals_start[key] for key, value in query_totals().items()}
+
+    memory = _measure_memory(send, [payload(i) for i in range(args.memory_samples)])
+
+    result: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mode": args.mode,
+            "phones": args.phones,
+            "llm_mode": args.llm_mode,
+            "llm_latency_ms": args.llm_latency_ms,
+            "queries": len(queries),
+        },
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 2),
+            "p95": round(_percentile(latencies, 95), 2),
+            "p99": round(_percentile(latencies, 99), 2),
+            "mean": round(statistics.mean(latencies), 2) if latencies else 0.0,
+            "max": round(max(latencies), 2) if latencies else 0.0,
+        },
+        "throughput_rps": round(args.requests / wall, 2) if wall else 0.0,
+        "errors": errors,
+        # Contabilização do AccountingCursor; "logs" são as gravações de log (não contam no turno)
+        "db_queries_per_turn": {
+            "logs": round(totals["suppressed"] / args.requests, 2),
+            "turn": round(totals["queries"] / args.requests, 2),
+        },
+        "db_time_ms_per_turn": round(totals["time_ms"] / args.requests, 3),
+        "db_rows_per_turn": round(totals["rows"] / args.requests, 2),
+        "db_slow_queries": totals["slow"],
+        "memory": {
+            "rss_before_import_mb": round(rss_before_import, 1) if rss_before_import else None,
+            "rss_start_mb": round(rss_start, 1) if rss_start else None,
+            "rss_end_mb": round(rss_end, 1) if rss_end else None,
+            "rss_growth_per_request_kb": (
+                round((rss_end - rss_start) * 1024 / args.requests, 2) if rss_start and rss_end else None
+            ),
+            "tracemalloc": memory,
+        },
+    }
+
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+-- Esquema mínimo usado pelo benchmark (mesmas tabelas/colunas lidas pelos serviços).
+-- Idempotente: pode ser aplicado sobre o banco do docker-compose.
+CREATE TABLE IF NOT EXISTS bancos (
+    id_banco SERIAL PRIMARY KEY,
+    nome_banco TEXT,
+    valor_em_conta NUMERIC(14, 2) DEFAULT 0,
+    valor_investido NUMERIC(14, 2) DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cartoes_de_credito (
+    id_cartao SERIAL PRIMARY KEY,
+    id_banco INT,
+    nome_cartao TEXT,
+    tipo_cartao INT,
+    dia_vencimento INT
+);
+CREATE TABLE IF NOT EXISTS entradas (
+    id_entrada SERIAL PRIMARY KEY,
+    id_banco INT,
+    nome_entrada TEXT,
+    tipo_entrada TEXT,
+    valor_entrada NUMERIC(14, 2),
+    dia_entrada INT
+);
+CREATE TABLE IF NOT EXISTS saidas_frequentes (
+    id_saida_frequente SERIAL PRIMARY KEY,
+    id_banco INT,
+    nome_saida TEXT,
+    tipo_saida TEXT,
+    valor_saida NUMERIC(14, 2),
+    dia_saida INT
+);
+CREATE TABLE IF NOT EXISTS categorias_de_compras (
+    id_categoria SERIAL PRIMARY KEY,
+    nome_categoria TEXT
+);
+CREATE TABLE IF NOT EXISTS faturas_cartoes_de_credito (
+    id_fatura_cartao_credito SERIAL PRIMARY KEY,
+    id_cartao INT,
+    id_banco INT,
+    mes_fatura INT,
+    ano_fatura INT,
+    valor_fatura NUMERIC(14, 2),
+    paga BOOLEAN DEFAULT false
+);
+CREATE TABLE IF NOT EXISTS compras_cartao (
+    id_compra_cartao SERIAL PRIMARY KEY,
+    id_cartao INT,
+    id_banco INT,
+    data_compra DATE,
+    estabelecimento TEXT,
+    parcelas TEXT,
+    id_categoria INT,
+    valor_compra NUMERIC(14, 2),
+    observacoes TEXT
+);
+CREATE TABLE IF NOT EXISTS limites_compras (
+    id_limite_compra SERIAL PRIMARY KEY,
+    id_categoria INT,
+    limite_categoria NUMERIC(14, 2)
+);
+CREATE TABLE IF NOT EXISTS logs (
+    id SERIAL PRIMARY KEY,
+    nivel TEXT,
+    mensagem TEXT,
+    modulo TEXT,
+    funcao TEXT,
+    linha INT,
+    traceback TEXT,
+    created_at TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS historico_de_mensagens (
+    mensagem_id SERIAL PRIMARY KEY,
+    numero_telefone TEXT,
+    tipo_mensageiro TEXT,
+    conteudo_mensagem TEXT,
+    data_criacao TIMESTAMP
+);
@@ -0,0 +1,46 @@
+-- Dados sintéticos do benchmark. APAGA os dados das tabelas abaixo antes de inserir.
+TRUNCATE bancos, cartoes_de_credito, entradas, saidas_frequentes, categorias_de_compras,
+         faturas_cartoes_de_credito, compras_cartao, limites_compras, historico_de_mensagens
+         RESTART IDENTITY;
+
+INSERT INTO bancos (nome_banco, valor_em_conta, valor_investido)
+VALUES ('Nubank', 2500.00, 10000.00), ('Itau', 800.00, 0), ('Inter', 150.00, 3200.00);
+
+INSERT INTO cartoes_de_credito (id_banco, nome_cartao, tipo_cartao, dia_vencimento)
+VALUES (1, 'Nubank Roxo', 1, 10), (2, 'Itau Click', 1, 15), (3, 'Inter Gold', 2, 5), (1, 'Nubank Virtual', 1, 10);
+
+INSERT INTO categorias_de_compras (nome_categoria)
+SELECT unnest(ARRAY['Mercado', 'Restaurante', 'Transporte', 'Lazer', 'Saude',
+                    'Educacao', 'Casa', 'Vestuario', 'Assinaturas', 'Viagem']);
+
+INSERT INTO entradas (id_banco, nome_entrada, tipo_entrada, valor_entrada, dia_entrada)
+VALUES (1, 'Salario', 'fixo', 7500.00, 5), (3, 'Freela', 'variavel', 1200.00, 20);
+
+INSERT INTO saidas_frequentes (id_banco, nome_saida, tipo_saida, valor_saida, dia_saida)
+VALUES (2, 'Aluguel', 'fixo', 2200.00, 10), (1, 'Internet', 'fixo', 120.00, 15),
+       (1, 'Academia', 'fixo', 99.90, 1), (2, 'Condominio', 'fixo', 650.00, 10);
+
+-- 24 meses de faturas por cartão; só os últimos 2 meses em aberto
+INSERT INTO faturas_cartoes_de_credito (id_cartao, id_banco, mes_fatura, ano_fatura, valor_fatura, paga)
+SELECT c.id_cartao, c.id_banco,
+       EXTRACT(MONTH FROM d)::int, EXTRACT(YEAR FROM d)::int,
+       round((300 + random() * 2500)::numeric, 2),
+       d < date_trunc('month', now()) - interval '1 month'
+FROM cartoes_de_credito c
+CROSS JOIN generate_series(date_trunc('month', now()) - interval '23 months', date_trunc('month', now()), interval '1 month') AS d;
+
+-- 5000 compras espalhadas pelos últimos 2 anos
+INSERT INTO compras_cartao (id_cartao, id_banco, data_compra, estabelecimento, parcelas, id_categoria, valor_compra, observacoes)
+SELECT 1 + (i % 4), 1 + (i % 3),
+       (now() - (i % 730) * interval '1 day')::date,
+       'Estabelecimento ' || (i % 200),
+       '1/1',
+       CASE WHEN i % 17 = 0 THEN NULL ELSE 1 + (i % 10) END,
+       round((5 + random() * 495)::numeric, 2),
+       NULL
+FROM generate_series(1, 5000) AS i;
+
+INSERT INTO limites_compras (id_categoria, limite_categoria)
+SELECT id_categoria, 1000.00 FROM categorias_de_compras;
+
+ANALYZE;
@@ -0,0 +1,94 @@
+"""
+Benchmark de inicialização do app (import de main.py e pre-warm).
+
+Cada medição roda em um processo Python novo, como um worker recém-criado pelo
+autoscaling. Sai com código 1 se a mediana do import passar do orçamento.
+
+Uso:
+    python benchmarks/startup_benchmark.py --runs 5 --budget-ms 800
+    python benchmarks/startup_benchmark.py --prewarm   # mede também o prewarm() (precisa do banco)
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+prewarm_ms = None
+if {prewarm}:
+    from app.api.financial_agent_endpoint import prewarm
+    prewarm()
+    prewarm_ms = (time.perf_counter() - t1) * 1000
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "prewarm_ms": prewarm_ms}}))
+"""
+
+
+def _run_child(prewarm: bool) -> Dict[str, Any]:
+    """Importa o app em um processo novo e retorna os tempos medidos"""
+    env = dict(os.environ, APP_PREWARM="false")
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(prewarm=prewarm)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _top_imports(limit: int) -> List[Tuple[str, float]]:
+    """Módulos com maior tempo acumulado de import (python -X importtime)"""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=dict(os.environ, APP_PREWARM="false"), capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((parts[2].strip(), int(parts[1]) / 1000))
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:limit]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    """Mediana, mínimo e máximo em ms"""
+    return {
+        "median_ms": round(statistics.median(values), 1),
+        "min_ms": round(min(values), 1),
+        "max_ms": round(max(values), 1),
+    }
+
+
+def main() -> int:
+    """Executa o benchmark e imprime o resultado em JSON"""
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", "800")))
+    parser.add_argument("--prewarm", action="store_true", help="mede também o prewarm() (precisa do banco)")
+    parser.add_argument("--top", type=int, default=10, help="quantidade de módulos mais lentos no relatório")
+    args = parser.parse_args()
+
+    runs = [_run_child(args.prewarm) for _ in range(args.runs)]
+    result: Dict[str, Any] = {
+        "runs": args.runs,
+        "import": _summary([r["import_ms"] for r in runs]),
+        "budget_ms": args.budget_ms,
+        "top_imports_ms": _top_imports(args.top),
+    }
+    if args.prewarm:
+        result["prewarm"] = _summary([r["prewarm_ms"] for r in runs])
+    result["within_budget"] = result["import"]["median_ms"] <= args.budget_ms
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0 if result["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,47 @@
+import os
 from flask import Flask
-from app.api.financial_agent_endpoint import financial_agent_bp
+from app.api.financial_agent_endpoint import financial_agent_bp, prewarm
+from app.api.metrics_endpoint import metrics_bp
 
 
-app = Flask(__name__)
-app.register_blueprint(financial_agent_bp, url_prefix="/api/v1")
\ No newline at end of file
+def apply_migrations() -> None:
+    """Aplica as migrações pendentes (ex: índices das consultas de histórico).
+
+    Falhas (ex: banco indisponível na subida) vão para o log sem impedir o
+    worker de subir; as migrações continuam pendentes e são tentadas de novo
+    na próxima inicialização.
+    """
+    try:
+        from app.services.migrations_service import MigrationsService
+        MigrationsService().apply_pending()
+    except Exception as e:
+        from app.core.config import log_error_to_file
+        log_error_to_file(e)
+
+
+def create_app(prewarm_services=None) -> Flask:
+    """Cria a aplicação Flask.
+
+    As migrações pendentes são aplicadas aqui (DB_AUTO_MIGRATE=false desativa,
+    para aplicar no deploy com `python -m app.services.migrations_service`).
+    O agente, o LLM e o pool de conexões são construídos no primeiro uso. Com
+    APP_PREWARM=true (ou prewarm_services=True) eles são preparados aqui, antes
+    do worker receber tráfego.
+    """
+    app = Flask(__name__)
+    app.register_blueprint(financial_agent_bp, url_prefix="/api/v1")
+    # /metrics (Prometheus); METRICS_ENABLED=false desativa
+    if os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes"):
+        app.register_blueprint(metrics_bp)
+
+    if os.getenv("DB_AUTO_MIGRATE", "true").lower() in ("1", "true", "yes"):
+        apply_migrations()
+
+    if prewarm_services is None:
+        prewarm_services = os.getenv("APP_PREWARM", "false").lower() in ("1", "true", "yes")
+    if prewarm_services:
+        prewarm()
+    return app
+
+
+app = create_app()